@@ -12,55 +12,89 @@ Scammeur (User) → DirectorAgent → [AudienceEventManager] → VictimAgent →
 """
 
 import sys
-from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
-from rich import print as rprint
-from colorama import init as colorama_init, Fore, Style
 
-# Imports du projet
-from simulateur_arnaque.agents.victim_agent import VictimAgent
-from simulateur_arnaque.agents.moderator import ModeratorAgent
-from simulateur_arnaque.agents import director
-from simulateur_arnaque.scripts import script_loader
-from simulateur_arnaque.audience_events import AudienceEventManager
-from simulateur_arnaque.audience_interface import AudienceInterface
-from simulateur_arnaque.config.llm_config import (
-    GOOGLE_PROJECT_ID,
-    GOOGLE_CREDENTIALS,
-    AUDIENCE_VOTE_FREQUENCY
-)
+# Profil de démarrage : installé avant tout autre import pour les chronométrer
+from simulateur_arnaque.startup import StartupProfile, warm_up
+startup_profile = StartupProfile(enabled="--startup-profile" in sys.argv)
+
+with startup_profile.phase("imports de main.py"):
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.live import Live
+
+    # Imports du projet (légers : les agents et LangChain sont importés à la demande)
+    from simulateur_arnaque.agents import director
+    from simulateur_arnaque.scripts import script_loader
+    from simulateur_arnaque.scripts.script_watcher import get_watcher
+    from simulateur_arnaque.llm import get_pool_stats
+    from simulateur_arnaque.llm.hedging import get_hedging_stats
+    from simulateur_arnaque.llm.circuit_breaker import get_breaker_stats
+    from simulateur_arnaque.llm.instrumentation import get_metrics, start_metrics_server
+    from simulateur_arnaque.llm.response_cache import get_cache_stats
+    from simulateur_arnaque.llm.batching import get_batching_stats
+    from simulateur_arnaque.config.llm_config import (
+        GOOGLE_PROJECT_ID,
+        GOOGLE_CREDENTIALS,
+        LLM_BACKEND,
+        AUDIENCE_VOTE_FREQUENCY,
+        DIRECTOR_RISK_DECAY,
+        DIRECTOR_RISK_WINDOW,
+        SCRIPT_HOT_RELOAD,
+        SCRIPT_RELOAD_INTERVAL,
+        VICTIM_STREAMING,
+        LLM_METRICS_PORT,
+        LLM_CACHE_MODE,
+        LLM_CASSETTE
+    )
 
 # Initialisation
-colorama_init()
 console = Console()
 
+# Scénario utilisé si le choix du menu est invalide
+DEFAULT_SCRIPT_ID = "microsoft_support"
+
 
 class ScamSimulator:
     """Orchestrateur principal du simulateur d'arnaque"""
     
-    def __init__(self, script_id: str, use_audience: bool = True):
+    def __init__(
+        self,
+        script_id: str,
+        use_audience: bool = True,
+        hot_reload: bool = SCRIPT_HOT_RELOAD,
+        streaming: bool = VICTIM_STREAMING
+    ):
         """
         Initialiser le simulateur
         
         Args:
             script_id: ID du script d'arnaque à charger (ex: "microsoft_support")
             use_audience: Activer ou non le système d'audience
+            hot_reload: Appliquer les modifications du script JSON sans redémarrer
+            streaming: Afficher la réponse de Jeanne au fil de la génération
         """
         # Charger le script d'arnaque
         console.print(f"[cyan]📜 Chargement du script : {script_id}...[/cyan]")
         self.script = script_loader.load_script(script_id)
         
-        # Initialiser les agents
+        # Initialiser les agents (clients LLM déjà créés par le préchauffage)
         console.print("[cyan]🤖 Initialisation des agents...[/cyan]")
-        self.victim = VictimAgent()
+        from simulateur_arnaque.agents.victim_agent import VictimAgent
+        with startup_profile.phase("VictimAgent"):
+            self.victim = VictimAgent(script=self.script)
         
         # Initialiser le système d'audience
         self.use_audience = use_audience
         if self.use_audience:
             console.print("[cyan]👥 Activation du système d'audience...[/cyan]")
+            from simulateur_arnaque.agents.moderator import ModeratorAgent
+            from simulateur_arnaque.audience_events import AudienceEventManager
+            from simulateur_arnaque.audience_interface import AudienceInterface
             # Créer les composants de l'audience
-            moderator = ModeratorAgent()  # Utilise les credentials Google Cloud par défaut
+            with startup_profile.phase("ModeratorAgent"):
+                moderator = ModeratorAgent()  # Utilise les credentials Google Cloud par défaut
+            # Mesures des appels LLM regroupées par session
+            moderator.session_id = self.victim.session_id
             interface = AudienceInterface(mode="console")  # Options: "console", "simulated", "web"
             self.audience_manager = AudienceEventManager(
                 moderator=moderator,
@@ -71,17 +105,54 @@ class ScamSimulator:
             self.audience_manager = None
         
         # État de la simulation
+        self.director_state = director.DirectorState(
+            self.script,
+            risk_decay=DIRECTOR_RISK_DECAY,
+            risk_window=DIRECTOR_RISK_WINDOW
+        )
         self.conversation_history = []
         self.turn_count = 0
         self.current_update = None
+        self.streaming = streaming
+        
+        # Rechargement à chaud : le watcher dépose la nouvelle version ici,
+        # elle est appliquée au début du tour suivant
+        self.script_id = script_id
+        self._pending_script = None
+        self._watcher = get_watcher(SCRIPT_RELOAD_INTERVAL) if hot_reload else None
+        if self._watcher:
+            self._watcher.subscribe(script_id, self._on_script_reloaded)
         
         console.print("[green]✅ Simulateur initialisé avec succès ![/green]\n")
     
+    def _on_script_reloaded(self, script):
+        """Callback du watcher (thread de polling) : mémorise la nouvelle version"""
+        self._pending_script = script
+    
+    def _apply_pending_script(self):
+        """Bascule sur la dernière version du script, entre deux tours"""
+        script, self._pending_script = self._pending_script, None
+        if script is None:
+            return
+        self.script = script
+        self.director_state = self.director_state.rebind(script)
+        self.victim.canned.set_script(script)
+        console.print(f"[cyan]🔄 Script rechargé : {script['title']}[/cyan]")
+    
+    def close(self):
+        """Libérer les ressources de la session (abonnement au watcher, modération en avance)"""
+        if self._watcher:
+            self._watcher.unsubscribe(self.script_id, self._on_script_reloaded)
+            self._watcher = None
+        if self.audience_manager:
+            self.audience_manager.close()
+    
     def display_script_info(self):
         """Afficher les informations du script chargé"""
+        description = self.script.get('description', "Scénario d'arnaque interactif")
         console.print(Panel.fit(
             f"[bold cyan]{self.script['title']}[/bold cyan]\n\n"
-            f"{self.script.get('description', 'Scénario d\'arnaque interactif')}\n\n"
+            f"{description}\n\n"
             f"[yellow]Nombre d'étapes :[/yellow] {len(self.script['stages'])}",
             title="📋 Scénario",
             border_style="cyan"
@@ -94,6 +165,8 @@ class ScamSimulator:
         
         risk_color = risk_colors[min(update.risk_level, 3)]
         risk_label = risk_labels[min(update.risk_level, 3)]
+        if update.risk_factors:
+            risk_label += f" ({', '.join(update.risk_factors)})"
         
         console.print(Panel.fit(
             f"[yellow]Étape courante :[/yellow] {update.stage_id}\n"
@@ -104,16 +177,19 @@ class ScamSimulator:
             border_style="blue"
         ))
     
-    def run_turn(self, scammer_input: str) -> str:
+    def _prepare_turn(self, scammer_input: str) -> tuple:
         """
-        Exécuter un tour de conversation
+        Début d'un tour : analyse du Director et événements d'audience
         
         Args:
             scammer_input: Ce que dit le scammeur (utilisateur)
         
         Returns:
-            str: Réponse de la victime
+            tuple: (objectif pour Jeanne, contrainte du public)
         """
+        # Appliquer un éventuel rechargement du script
+        self._apply_pending_script()
+        
         # Incrémenter le compteur de tours
         self.turn_count += 1
         
@@ -123,11 +199,8 @@ class ScamSimulator:
             "content": scammer_input
         })
         
-        # 1. Analyser avec le DirectorAgent
-        self.current_update = director.analyze_conversation(
-            self.conversation_history,
-            self.script
-        )
+        # 1. Analyser avec le DirectorAgent (seuls les nouveaux messages sont relus)
+        self.current_update = self.director_state.update(self.conversation_history)
         
         # Afficher l'analyse du director
         if self.turn_count > 1:  # Ne pas afficher au premier tour
@@ -138,17 +211,14 @@ class ScamSimulator:
         if self.use_audience and self.audience_manager:
             # Vérifier si c'est le moment de déclencher l'audience
             if self.audience_manager.should_trigger_audience():
-                # Construire le contexte de conversation pour le modérateur
-                convo_context = f"Script: {self.script['title']}\n"
-                convo_context += f"Étape: {self.current_update.stage_id}\n"
-                convo_context += f"Dernière phrase scammeur: {scammer_input}"
-                
-                # Lancer l'événement d'audience
+                # Lancer l'événement d'audience (options déjà prêtes si préparées en avance)
                 audience_result = self.audience_manager.process_audience_round(
-                    conversation_context=convo_context,
+                    conversation_context=self._audience_context(scammer_input),
                     current_objective=self.current_update.next_objective_for_victim,
                     collect_mode="simulated",  # "console" pour vraie interaction, "simulated" pour démo
-                    vote_mode="simulated"
+                    vote_mode="simulated",
+                    script_id=self.script_id,
+                    stage_id=self.current_update.stage_id
                 )
                 
                 if audience_result:
@@ -158,20 +228,81 @@ class ScamSimulator:
                         title="👥 Événement Public",
                         border_style="magenta"
                     ))
+            
+            # Modération du prochain tour d'audience en arrière-plan
+            if self.audience_manager.should_prefetch():
+                self.audience_manager.prefetch(
+                    conversation_context=self._audience_context(scammer_input),
+                    current_objective=self.current_update.next_objective_for_victim,
+                    collect_mode="simulated",
+                    script_id=self.script_id,
+                    stage_id=self.current_update.stage_id
+                )
+        
+        return self.current_update.next_objective_for_victim, audience_constraint
+    
+    def _audience_context(self, scammer_input: str) -> str:
+        """Contexte de conversation transmis au modérateur"""
+        convo_context = f"Script: {self.script['title']}\n"
+        convo_context += f"Étape: {self.current_update.stage_id}\n"
+        convo_context += f"Dernière phrase scammeur: {scammer_input}"
+        return convo_context
+    
+    def _finish_turn(self, victim_response: str):
+        """Fin d'un tour : ajouter la réponse de la victime à l'historique"""
+        self.conversation_history.append({
+            "role": "victim",
+            "content": victim_response
+        })
+    
+    def run_turn(self, scammer_input: str) -> str:
+        """
+        Exécuter un tour de conversation
+        
+        Args:
+            scammer_input: Ce que dit le scammeur (utilisateur)
+        
+        Returns:
+            str: Réponse de la victime
+        """
+        objective, audience_constraint = self._prepare_turn(scammer_input)
         
         # 3. Générer la réponse de la victime
         victim_response = self.victim.respond(
             scammer_input=scammer_input,
-            objective=self.current_update.next_objective_for_victim,
+            objective=objective,
             audience_constraint=audience_constraint
         )
         
-        # Ajouter la réponse à l'historique
-        self.conversation_history.append({
-            "role": "victim",
-            "content": victim_response
-        })
+        self._finish_turn(victim_response)
+        return victim_response
+    
+    def run_turn_streamed(self, scammer_input: str) -> str:
+        """
+        Exécuter un tour en affichant la réponse de Jeanne au fil de l'eau
+        
+        Args:
+            scammer_input: Ce que dit le scammeur (utilisateur)
+        
+        Returns:
+            str: Réponse complète de la victime
+        """
+        objective, audience_constraint = self._prepare_turn(scammer_input)
         
+        # 3. Générer la réponse de la victime, affichée dès le premier morceau
+        console.print(f"\n[bold green]👵 Jeanne Dubois:[/bold green]")
+        victim_response = ""
+        with Live(Panel.fit("[dim]…[/dim]", border_style="green"), console=console, refresh_per_second=15) as live:
+            for chunk in self.victim.respond_stream(
+                scammer_input=scammer_input,
+                objective=objective,
+                audience_constraint=audience_constraint
+            ):
+                victim_response += chunk
+                live.update(Panel.fit(victim_response, border_style="green"))
+        
+        victim_response = victim_response.strip()
+        self._finish_turn(victim_response)
         return victim_response
     
     def run(self):
@@ -207,6 +338,7 @@ class ScamSimulator:
                 # Commandes spéciales
                 if user_input.lower() in ['quit', 'exit', 'q']:
                     console.print("\n[yellow]👋 Fin de la simulation. À bientôt ![/yellow]")
+                    self.close()
                     break
                 
                 if user_input.lower() == 'status':
@@ -214,11 +346,51 @@ class ScamSimulator:
                         self.display_director_update(self.current_update)
                     console.print(f"\n[cyan]Tours joués :[/cyan] {self.turn_count}")
                     console.print(f"[cyan]Messages :[/cyan] {len(self.conversation_history)}")
+                    pool = get_pool_stats()
+                    console.print(f"[cyan]Clients LLM partagés :[/cyan] {pool['size']} (réutilisés {pool['reused']} fois)")
+                    for label, stats in get_hedging_stats().items():
+                        console.print(
+                            f"[cyan]Appels {label} :[/cyan] {stats['calls']} "
+                            f"(doublés {stats['hedge_rate']:.0%}, p99 {stats['p99_ms']:.0f} ms, "
+                            f"gain p99 {stats['p99_improvement_ms']:.0f} ms, {stats['retries']} nouvelles tentatives)"
+                        )
+                    for agent, calls in get_metrics().summary().items():
+                        console.print(
+                            f"[cyan]LLM {agent} :[/cyan] {calls['calls']} appels, "
+                            f"{calls['latency_mean_s'] * 1000:.0f} ms en moyenne, "
+                            f"{calls['prompt_tokens']} + {calls['completion_tokens']} tokens, "
+                            f"~{calls['cost_usd']:.4f} $"
+                        )
+                    cache = get_cache_stats()
+                    if cache:
+                        hits = cache.get("hits", cache.get("memory_hits", 0) + cache.get("disk_hits", 0))
+                        console.print(
+                            f"[cyan]Cache LLM ({cache['mode']}) :[/cyan] {cache['entries']} réponses, "
+                            f"{hits} servies, {cache['misses']} absentes"
+                        )
+                    for label, batching in get_batching_stats().items():
+                        console.print(
+                            f"[cyan]Batching {label} :[/cyan] {batching['requests']} requêtes en "
+                            f"{batching['batches']} batches (moy. {batching['avg_batch_size']:.1f}, "
+                            f"attente {batching['avg_wait_ms']:.0f} ms)"
+                        )
+                    if self.audience_manager:
+                        prefetch = self.audience_manager.prefetch_stats
+                        console.print(
+                            f"[cyan]Audience préparée en avance :[/cyan] {prefetch['used']}/{prefetch['started']} "
+                            f"(périmées {prefetch['stale']}, attente {prefetch['waited_ms']:.0f} ms)"
+                        )
+                    for name, breaker in get_breaker_stats().items():
+                        console.print(
+                            f"[cyan]Disjoncteur {name} :[/cyan] {breaker['state']} "
+                            f"(ouvert {breaker['opened']} fois, {breaker['rejected']} réponses de secours)"
+                        )
                     continue
                 
                 if user_input.lower() == 'reset':
                     console.print("\n[yellow]🔄 Réinitialisation...[/yellow]")
                     self.victim.reset_memory()
+                    self.director_state.reset()
                     self.conversation_history = []
                     self.turn_count = 0
                     self.current_update = None
@@ -230,6 +402,10 @@ class ScamSimulator:
                     continue
                 
                 # Exécuter le tour
+                if self.streaming:
+                    self.run_turn_streamed(user_input)
+                    continue
+                
                 victim_response = self.run_turn(user_input)
                 
                 # Afficher la réponse
@@ -268,29 +444,47 @@ def main():
 [/bold cyan]
 """)
     
-    # Vérifier la configuration Google Cloud
+    # Vérifier la configuration Google Cloud (inutile avec le backend local)
     import os
-    if not os.path.exists(GOOGLE_CREDENTIALS):
+    if LLM_BACKEND == "fake":
+        console.print("[yellow]🧪 Backend LLM local (fake) : réponses simulées, aucun appel réseau[/yellow]")
+    elif not os.path.exists(GOOGLE_CREDENTIALS):
         console.print("[red]❌ Erreur : Fichier de credentials Google Cloud introuvable ![/red]")
         console.print(f"[yellow]Fichier attendu : {GOOGLE_CREDENTIALS}[/yellow]")
         console.print("[yellow]Assurez-vous que google-credentials.json est présent.[/yellow]")
         sys.exit(1)
+    else:
+        console.print(f"[green]✅ Credentials Google Cloud détectés (Projet: {GOOGLE_PROJECT_ID})[/green]")
+    
+    if LLM_CACHE_MODE in ("record", "replay", "strict"):
+        console.print(f"[yellow]📼 Cassette LLM ({LLM_CACHE_MODE}) : {LLM_CASSETTE}[/yellow]")
+    
+    # Endpoint local des mesures LLM (texte Prometheus)
+    if LLM_METRICS_PORT:
+        start_metrics_server(LLM_METRICS_PORT)
+        console.print(f"[green]📈 Mesures LLM : http://127.0.0.1:{LLM_METRICS_PORT}/metrics[/green]")
+    
+    # Préchauffer les agents et les clients LLM pendant les menus
+    warm_up(startup_profile)
     
-    console.print(f"[green]✅ Credentials Google Cloud détectés (Projet: {GOOGLE_PROJECT_ID})[/green]")
+    # Charger tous les scénarios disponibles une seule fois
+    registry = script_loader.get_registry()
+    with startup_profile.phase("préchargement des scénarios"):
+        registry.preload()
+    scripts = registry.list_scripts()
+    # Le scénario par défaut en premier, les autres par identifiant
+    scripts.sort(key=lambda item: item[0] != DEFAULT_SCRIPT_ID)
     
     # Menu de sélection du scénario
     console.print("\n[bold]📜 Choisissez un scénario :[/bold]")
-    console.print("  [cyan]1.[/cyan] Faux support technique Microsoft")
-    console.print("  [cyan]2.[/cyan] Arnaque bancaire - Faux conseiller")
+    for i, (_, title) in enumerate(scripts, 1):
+        console.print(f"  [cyan]{i}.[/cyan] {title}")
     
-    choice = input("\n[bold]Votre choix (1-2) :[/bold] ").strip()
+    choice = input(f"\n[bold]Votre choix (1-{len(scripts)}) :[/bold] ").strip()
     
-    script_map = {
-        "1": "microsoft_support",
-        "2": "bank_fraud"
-    }
+    script_map = {str(i): script_id for i, (script_id, _) in enumerate(scripts, 1)}
     
-    script_id = script_map.get(choice, "microsoft_support")
+    script_id = script_map.get(choice, DEFAULT_SCRIPT_ID)
     
     # Demander si on active l'audience
     audience_input = input("\n[bold]Activer le système d'audience ? (o/N) :[/bold] ").strip().lower()
@@ -299,6 +493,7 @@ def main():
     # Lancer le simulateur
     console.print("\n")
     simulator = ScamSimulator(script_id=script_id, use_audience=use_audience)
+    startup_profile.report(console)
     simulator.run()
 
 
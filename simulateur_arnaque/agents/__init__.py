@@ -7,8 +7,20 @@ Agents disponibles:
 - ModeratorAgent: Modérateur d'événements audience
 """
 
-from .base_agent import BaseAgent
-from .victim_agent import VictimAgent
-from .moderator import ModeratorAgent
+import importlib
 
-__all__ = ["BaseAgent", "VictimAgent", "ModeratorAgent"]
\ No newline at end of file
+# Imports différés : LangChain et les SDK des fournisseurs ne sont chargés
+# qu'au premier accès à une classe (et pas à l'import du package)
+_LAZY_IMPORTS = {
+    "BaseAgent": ".base_agent",
+    "VictimAgent": ".victim_agent",
+    "ModeratorAgent": ".moderator",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
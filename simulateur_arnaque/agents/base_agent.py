@@ -3,41 +3,53 @@ BaseAgent - Classe de base pour tous les agents LLM
 """
 
 from abc import ABC, abstractmethod
-from langchain_google_vertexai import ChatVertexAI
-from google.oauth2 import service_account
-from ..config.llm_config import GOOGLE_PROJECT_ID, GOOGLE_LOCATION, GOOGLE_MODEL, GOOGLE_CREDENTIALS
-import os
+from typing import Any, ContextManager
+from ..llm.factory import create_chat_model, model_label
+from ..llm.rate_limiter import PRIORITY_MODERATOR, rate_limited
+from ..llm.instrumentation import CallRecord, get_metrics, new_session_id, track_call
+from ..llm.response_cache import cached
+from ..llm.batching import batched
 
 
 class BaseAgent(ABC):
     """Classe abstraite pour tous les agents"""
     
-    def __init__(self, name: str, temperature: float = 0.5):
+    # Nom de l'agent dans les mesures des appels LLM
+    metrics_label = "agent"
+    
+    def __init__(
+        self,
+        name: str,
+        temperature: float = 0.5,
+        priority: int = PRIORITY_MODERATOR,
+        batching: bool = False
+    ):
         """
         Initialiser un agent
         
         Args:
             name: Nom de l'agent
             temperature: Température du LLM (0.0 = déterministe, 1.0 = créatif)
+            priority: Priorité des appels LLM dans le limiteur partagé (PRIORITY_*)
+            batching: Regrouper invoke / ainvoke avec ceux des autres sessions (micro-batching)
         """
         self.name = name
         self.temperature = temperature
         
-        # Charger les credentials explicitement avec le bon scope
-        credentials = None
-        if os.path.exists(GOOGLE_CREDENTIALS):
-            credentials = service_account.Credentials.from_service_account_file(
-                GOOGLE_CREDENTIALS,
-                scopes=["https://www.googleapis.com/auth/cloud-platform"]
-            )
+        # Modèle selon le backend configuré (Vertex AI ou backend local "fake"),
+        # appels soumis au limiteur de débit partagé, sauf réponses déjà en cache
+        self.model_name = model_label()
+        model = rate_limited(create_chat_model(temperature=temperature), priority)
+        if batching:
+            model = batched(model, self.metrics_label)
+        self.llm = cached(model, self.model_name, temperature)
         
-        self.llm = ChatVertexAI(
-            project=GOOGLE_PROJECT_ID,
-            location=GOOGLE_LOCATION,
-            model_name=GOOGLE_MODEL,
-            temperature=temperature,
-            credentials=credentials
-        )
+        # Session de simulation (remplacée par le simulateur pour regrouper ses agents)
+        self.session_id = new_session_id()
+    
+    def _track(self, operation: str, prompt: Any) -> ContextManager[CallRecord]:
+        """Mesurer un appel LLM de l'agent (latence, tokens, coût)"""
+        return track_call(self.metrics_label, self.model_name, operation, self.session_id, prompt)
     
     @abstractmethod
     def process(self, input_text: str) -> str:
@@ -49,5 +61,7 @@ class BaseAgent(ABC):
         return {
             "name": self.name,
             "temperature": self.temperature,
-            "model": OPENAI_MODEL
+            "model": self.model_name,
+            "session_id": self.session_id,
+            "llm_calls": get_metrics().summary(self.metrics_label).get(self.metrics_label, {})
         }
\ No newline at end of file
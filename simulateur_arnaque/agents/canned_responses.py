@@ -0,0 +1,135 @@
+"""
+Réponses de secours locales (sans appel LLM)
+
+Servies quand le disjoncteur d'un agent est ouvert (voir llm.circuit_breaker)
+ou quand l'appel LLM échoue :
+- CannedResponder : répliques de Jeanne choisies selon les victim_objectives
+  de l'étape courante du script ;
+- pick_default_events : tirage pondéré dans DEFAULT_EVENTS pour le modérateur.
+"""
+
+import random
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Familles de répliques : mots-clés (sans accents, en minuscules) présents dans l'objectif
+_LINE_FAMILIES: Tuple[Tuple[Tuple[str, ...], Tuple[str, ...]], ...] = (
+    (("refuser", "jamais", "code", "paiement", "virement", "carte", "installer"), (
+        "Oh non non non, je ne donne rien par téléphone. Mon fils me l'a bien répété.",
+        "Ah ça, certainement pas, mon petit monsieur. Je ne fais rien de tout ça au téléphone.",
+        "Non, non... Ma banque m'a dit de ne jamais faire ça. Je préfère attendre.",
+    )),
+    (("preuve", "nom", "identifier", "numero", "sceptique", "service"), (
+        "Attendez... Vous êtes qui exactement ? Redonnez-moi votre nom, je note.",
+        "Et comment vous avez eu mon numéro, vous ? Ça ne me plaît pas beaucoup, tout ça.",
+        "Hmm, vous pouvez me prouver que vous êtes bien de chez eux ? On entend tellement d'histoires.",
+    )),
+    (("temps", "distraction", "excuse", "lunettes", "ordinateur", "savoir"), (
+        "Oh là là, attendez, je ne trouve plus mes lunettes... Elles étaient là tout à l'heure.",
+        "Pardon, Scooty aboie, je reviens... Voilà. Vous disiez quoi déjà ?",
+        "Je ne suis pas devant l'ordinateur, moi. Et puis je n'y comprends rien, à ces machines.",
+    )),
+    (("rappeler", "famille", "proche", "agence", "banque"), (
+        "Je vais plutôt en parler à mon fils ce soir, il s'occupe de ces choses-là.",
+        "Écoutez, je vais rappeler ma banque moi-même, avec le numéro sur ma carte.",
+        "Je passerai à l'agence demain matin, c'est plus simple pour moi.",
+    )),
+    (("police", "signaler", "raccrocher", "calme", "pression", "paniquer"), (
+        "Ne me pressez pas comme ça, jeune homme. Je ne suis plus toute jeune, moi.",
+        "Bon, je crois que je vais raccrocher et appeler la gendarmerie, par prudence.",
+        "Vous savez, ma voisine s'est fait avoir l'an dernier. Je vais signaler cet appel.",
+    )),
+)
+
+_DEFAULT_LINES = (
+    "Oh pardon... Je n'ai pas bien compris. Vous pouvez répéter plus lentement ?",
+    "Hmm, excusez-moi, la ligne est mauvaise. Qu'est-ce que vous disiez ?",
+    "Oh mon Dieu, tout ça est bien compliqué pour moi... Répétez, s'il vous plaît.",
+)
+
+
+def _normalize(text: str) -> str:
+    """Minuscules, sans accents"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=256)
+def lines_for_objectives(objectives: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Répliques adaptées à une liste d'objectifs (objectif courant en premier)
+
+    Returns:
+        Répliques des familles correspondantes, par ordre de priorité
+        (répliques génériques si aucune ne correspond)
+    """
+    lines: List[str] = []
+    for objective in objectives:
+        normalized = _normalize(objective)
+        for keywords, family in _LINE_FAMILIES:
+            if any(keyword in normalized for keyword in keywords):
+                lines.extend(line for line in family if line not in lines)
+    return tuple(lines) or _DEFAULT_LINES
+
+
+class CannedResponder:
+    """Répliques de secours de Jeanne selon l'étape du script"""
+
+    def __init__(self, script: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            script: Script courant (les autres objectifs de l'étape enrichissent les répliques)
+        """
+        self._stage_objectives: Dict[str, Tuple[str, ...]] = {}
+        self._used: Dict[Tuple[str, ...], int] = {}
+        self.served = 0
+        self.set_script(script)
+
+    def set_script(self, script: Optional[Dict[str, Any]]) -> None:
+        """Indexer les objectifs par étape (appelé aussi au rechargement du script)"""
+        self._stage_objectives = {}
+        for stage in (script or {}).get('stages', []):
+            objectives = tuple(stage.get('victim_objectives') or ())
+            for objective in objectives:
+                self._stage_objectives.setdefault(objective, objectives)
+
+    def respond(self, objective: str) -> str:
+        """Réplique suivante pour l'objectif courant (sans répéter tant que possible)"""
+        stage = self._stage_objectives.get(objective, ())
+        objectives = (objective,) + tuple(o for o in stage if o != objective)
+        lines = lines_for_objectives(objectives)
+        index = self._used.get(objectives, 0)
+        self._used[objectives] = index + 1
+        self.served += 1
+        return lines[index % len(lines)]
+
+
+def pick_default_events(
+    count: int = 3,
+    exclude: Sequence[str] = (),
+    rng: random.Random = random
+) -> List[Dict[str, str]]:
+    """
+    Tirage pondéré (sans remise) d'événements de DEFAULT_EVENTS
+
+    Args:
+        count: Nombre d'événements
+        exclude: Événements récemment proposés (évités si possible)
+        rng: Générateur aléatoire
+
+    Returns:
+        Liste de dictionnaires 'event' / 'description'
+    """
+    from ..audience_events import DEFAULT_EVENTS
+
+    pool = [e for e in DEFAULT_EVENTS if e['event'] not in exclude]
+    if len(pool) < count:
+        pool = list(DEFAULT_EVENTS)
+    picked = []
+    while pool and len(picked) < count:
+        event = rng.choices(pool, weights=[e.get('weight', 1) for e in pool])[0]
+        pool.remove(event)
+        picked.append({'event': event['event'], 'description': event['description']})
+    return picked
+
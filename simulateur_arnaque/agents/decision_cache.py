@@ -0,0 +1,93 @@
+"""
+Mémoïsation des décisions du modérateur
+
+Les mêmes suggestions et les mêmes contextes (script + étape) reviennent d'une
+session à l'autre. DecisionCache garde les résultats du modérateur dans un LRU
+à durée de vie limitée (MODERATOR_CACHE_SIZE, MODERATOR_CACHE_TTL_SECONDS),
+partagé par toutes les sessions du processus :
+- "decisions" : les 3 événements retenus pour un ensemble normalisé de
+  suggestions (ou pour une génération de secours) dans un contexte donné ;
+- "verdicts" : le verdict de chaque suggestion (événement retenu, ou False si
+  rejetée), réutilisable par des ensembles qui se recoupent partiellement.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..config.llm_config import MODERATOR_CACHE_SIZE, MODERATOR_CACHE_TTL_SECONDS
+
+
+class DecisionCache:
+    """LRU avec durée de vie, sûr entre threads"""
+
+    def __init__(
+        self,
+        max_entries: int = MODERATOR_CACHE_SIZE,
+        ttl: float = MODERATOR_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_entries: Entrées gardées au maximum (0 = cache désactivé)
+            ttl: Durée de vie d'une entrée en secondes (0 = illimitée)
+            clock: Horloge (injectable pour les tests)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valeur encore valide (copie), ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self.clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                **self.stats,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+_caches: Dict[str, DecisionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_decision_cache(name: str) -> DecisionCache:
+    """Cache partagé par toutes les sessions ("decisions", "verdicts")"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = DecisionCache()
+        return _caches[name]
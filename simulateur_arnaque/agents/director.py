@@ -1,10 +1,13 @@
 """
 Module Director : analyse l'historique et fournit l'état/scénario pour la victime.
 """
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set, Tuple, FrozenSet
+from dataclasses import dataclass, field
+from functools import lru_cache
 import re
 
+from ..scripts.signal_matcher import get_stage_matcher
+
 @dataclass
 class DirectorUpdate:
     script_id: str
@@ -13,45 +16,92 @@ class DirectorUpdate:
     next_objective_for_victim: str
     dynamic_context_from_director: str
     risk_level: int
+    risk_factors: list = field(default_factory=list)
 
 def _find_stage(history: List[Dict[str, str]], script: Dict[str, Any]) -> (str, list):
     """Détermine le stage courant et les stages complétés."""
-    completed = []
-    current_stage_id = script['stages'][0]['stage_id']
-    for stage in script['stages']:
-        found = False
-        for signal in stage['success_signals']:
-            for msg in history:
-                if re.search(rf"\\b{re.escape(signal)}\\b", msg['content'], re.IGNORECASE):
-                    found = True
-                    break
-            if found:
-                break
-        if found:
-            completed.append(stage['stage_id'])
-            current_stage_id = stage['stage_id']
-        else:
-            break
-    return current_stage_id, completed
+    matcher = get_stage_matcher(script)
+    hit_stages = matcher.scan(msg['content'] for msg in history)
+    return matcher.progress(hit_stages)
+
+# Catégories de mots-clés de risque : nom -> (niveau, motifs)
+RISK_CATEGORIES = {
+    "sensitive": (3, [r"iban", r"carte", r"sms", r"otp", r"paiement", r"numéro de carte", r"virement", r"mot de passe"]),
+    "remote": (2, [r"teamviewer", r"anydesk", r"prise en main", r"installer un logiciel"]),
+    "urgent": (1, [r"urgence", r"immédiat", r"dépêcher", r"vite"]),
+}
+
+# Motifs compilés une seule fois (une regex par catégorie)
+_RISK_PATTERNS = [
+    (name, level, re.compile("|".join(patterns)))
+    for name, (level, patterns) in RISK_CATEGORIES.items()
+]
+
+# Seuil d'activation sous lequel une catégorie "oubliée" (decay) ne compte plus
+RISK_ACTIVATION_THRESHOLD = 0.5
+
+@lru_cache(maxsize=4096)
+def _score_message(content: str) -> Tuple[int, FrozenSet[str]]:
+    """Calcule le niveau de risque (0-3) d'un message et les catégories détectées (mis en cache)."""
+    text = content.lower()
+    categories = frozenset(name for name, _, pattern in _RISK_PATTERNS if pattern.search(text))
+    level = max((RISK_CATEGORIES[name][0] for name in categories), default=0)
+    return level, categories
 
 def _get_risk_level(history: List[Dict[str, str]]) -> int:
     """Calcule le niveau de risque (0-3) selon le contenu de l'historique."""
-    sensitive = [r"iban", r"carte", r"sms", r"otp", r"paiement", r"numéro de carte", r"virement", r"mot de passe"]
-    remote = [r"teamviewer", r"anydesk", r"prise en main", r"installer un logiciel"]
-    urgent = [r"urgence", r"immédiat", r"dépêcher", r"vite"]
-    text = " ".join([m['content'].lower() for m in history])
-    if any(re.search(s, text) for s in sensitive):
-        return 3
-    if any(re.search(r, text) for r in remote):
-        return 2
-    if any(re.search(u, text) for u in urgent):
-        return 1
-    return 0
-
-def _build_context(script: Dict[str, Any], stage_id: str, next_objective: str) -> str:
+    return max((_score_message(m['content'])[0] for m in history), default=0)
+
+class RiskTracker:
+    """
+    Agrégat du risque d'une session, mis à jour message par message en O(1).
+
+    Par défaut le risque ne redescend jamais (comportement historique). Avec
+    `decay` < 1 ou une fenêtre `window`, une catégorie qui n'apparaît plus finit
+    par s'éteindre, ce qui permet au risque de baisser quand le scammeur recule.
+    """
+
+    def __init__(self, decay: float = 1.0, window: Optional[int] = None):
+        """
+        Args:
+            decay: Facteur appliqué à chaque message sans la catégorie (1.0 = pas d'oubli)
+            window: Nombre de messages après lequel une catégorie non revue est oubliée
+        """
+        self.decay = decay
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        """Réinitialiser l'agrégat."""
+        self.messages = 0
+        self._activation = {name: 0.0 for name in RISK_CATEGORIES}
+        self._last_seen = {name: 0 for name in RISK_CATEGORIES}
+        self.level = 0
+        self.factors: List[str] = []
+
+    def _is_active(self, name: str) -> bool:
+        if self._activation[name] < RISK_ACTIVATION_THRESHOLD:
+            return False
+        return self.window is None or self.messages - self._last_seen[name] < self.window
+
+    def add(self, content: str) -> int:
+        """Intègre un nouveau message et retourne le niveau de risque de la session."""
+        self.messages += 1
+        _, categories = _score_message(content)
+        for name in self._activation:
+            if name in categories:
+                self._activation[name] = 1.0
+                self._last_seen[name] = self.messages
+            else:
+                self._activation[name] *= self.decay
+        active = [name for name in RISK_CATEGORIES if self._is_active(name)]
+        self.level = max((RISK_CATEGORIES[name][0] for name in active), default=0)
+        self.factors = [name for name in active if RISK_CATEGORIES[name][0] == self.level]
+        return self.level
+
+def _build_context(script: Dict[str, Any], stage: Dict[str, Any], next_objective: str) -> str:
     """Construit le contexte dynamique à injecter dans le prompt de la victime."""
     title = script['title']
-    stage = next(s for s in script['stages'] if s['stage_id'] == stage_id)
     summary = stage['summary']
     conseils = (
         "Rappel : ne jamais donner d'informations sensibles (IBAN, carte, code, mot de passe).\n"
@@ -65,19 +115,102 @@ def _build_context(script: Dict[str, Any], stage_id: str, next_objective: str) -
         f"{conseils}"
     )
 
+class DirectorState:
+    """
+    État incrémental du Director pour une session.
+
+    Mémorise les étapes touchées, le stage courant et le risque accumulé : à
+    chaque tour, seuls les messages ajoutés depuis le dernier appel sont analysés.
+    """
+
+    def __init__(self, script: Dict[str, Any], risk_decay: float = 1.0, risk_window: Optional[int] = None):
+        """
+        Args:
+            script: Script d'arnaque suivi pendant la session
+            risk_decay: Oubli progressif des catégories de risque (voir RiskTracker)
+            risk_window: Fenêtre glissante (en messages) pour le risque, None = toute la session
+        """
+        self.script = script
+        self.matcher = get_stage_matcher(script)
+        self.risk = RiskTracker(decay=risk_decay, window=risk_window)
+        self.reset()
+
+    def reset(self) -> None:
+        """Réinitialiser l'état (nouvelle conversation)."""
+        self.processed_messages = 0
+        # Dernier message analysé (role, contenu) : détecte un historique remplacé
+        self.last_message: Optional[Tuple[str, str]] = None
+        self.hit_stages: Set[int] = set()
+        self.stage_id, self.completed_stages = self.matcher.progress(self.hit_stages)
+        self.risk.reset()
+
+    def _advance(self) -> None:
+        """Valide les étapes suivantes tant qu'elles ont été touchées, dans l'ordre du script."""
+        pos = len(self.completed_stages)
+        while pos < len(self.matcher.stage_ids) and pos in self.hit_stages:
+            self.completed_stages.append(self.matcher.stage_ids[pos])
+            self.stage_id = self.matcher.stage_ids[pos]
+            pos += 1
+
+    def rebind(self, script: Dict[str, Any]) -> "DirectorState":
+        """
+        Retourne un état pour une nouvelle version du script (rechargement à chaud)
+
+        Les étapes déjà touchées, le nombre de messages analysés et le risque sont
+        conservés pour les stage_id qui existent encore dans la nouvelle version.
+        """
+        state = DirectorState(script, risk_decay=self.risk.decay, risk_window=self.risk.window)
+        state.processed_messages = self.processed_messages
+        state.last_message = self.last_message
+        state.risk = self.risk
+        state.hit_stages = {
+            state.matcher.stage_index[stage_id]
+            for stage_id in (self.matcher.stage_ids[pos] for pos in self.hit_stages)
+            if stage_id in state.matcher.stage_index
+        }
+        state._advance()
+        return state
+
+    @staticmethod
+    def _fingerprint(message: Dict[str, str]) -> Tuple[str, str]:
+        return message.get('role', ""), message['content']
+
+    def update(self, history: List[Dict[str, str]]) -> DirectorUpdate:
+        """
+        Analyse les nouveaux messages de l'historique et retourne l'état pour la victime
+
+        Args:
+            history: Historique complet de la conversation (seule la partie non
+                encore analysée est relue)
+        """
+        if self.processed_messages and (
+            len(history) < self.processed_messages
+            or self._fingerprint(history[self.processed_messages - 1]) != self.last_message
+        ):
+            # L'historique a été vidé, raccourci ou remplacé : repartir de zéro
+            self.reset()
+        for msg in history[self.processed_messages:]:
+            self.hit_stages |= self.matcher.stages_in(msg['content'])
+            self.risk.add(msg['content'])
+        self.processed_messages = len(history)
+        if history:
+            self.last_message = self._fingerprint(history[-1])
+        self._advance()
+
+        stage = self.script['stages'][self.matcher.stage_index[self.stage_id]]
+        # Objectif suivant : premier non atteint
+        next_objective = stage['victim_objectives'][0] if stage['victim_objectives'] else "Rester prudent"
+        context = _build_context(self.script, stage, next_objective)
+        return DirectorUpdate(
+            script_id=self.script['script_id'],
+            stage_id=self.stage_id,
+            completed_stages=list(self.completed_stages),
+            next_objective_for_victim=next_objective,
+            dynamic_context_from_director=context,
+            risk_level=self.risk.level,
+            risk_factors=list(self.risk.factors)
+        )
+
 def analyze_conversation(history: List[Dict[str, str]], script: Dict[str, Any]) -> DirectorUpdate:
     """Analyse l'historique et retourne l'état/scénario pour la victime."""
-    stage_id, completed = _find_stage(history, script)
-    stage = next(s for s in script['stages'] if s['stage_id'] == stage_id)
-    # Objectif suivant : premier non atteint
-    next_objective = stage['victim_objectives'][0] if stage['victim_objectives'] else "Rester prudent"
-    context = _build_context(script, stage_id, next_objective)
-    risk = _get_risk_level(history)
-    return DirectorUpdate(
-        script_id=script['script_id'],
-        stage_id=stage_id,
-        completed_stages=completed,
-        next_objective_for_victim=next_objective,
-        dynamic_context_from_director=context,
-        risk_level=risk
-    )
+    return DirectorState(script).update(history)
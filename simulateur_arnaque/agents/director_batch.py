@@ -0,0 +1,155 @@
+"""
+Module director_batch : analyse hors-ligne d'un grand nombre de transcriptions.
+
+Construit une matrice NumPy (message x signal) des signaux détectés, puis en
+déduit la progression des étapes et le niveau de risque de chaque
+transcription par opérations vectorisées. Les messages identiques (fréquents
+dans les archives d'appels) ne sont analysés qu'une seule fois.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from ..scripts.signal_matcher import StageMatcher, get_stage_matcher
+from .director import DirectorUpdate, RISK_CATEGORIES, _build_context, _score_message
+
+# Ordre des colonnes de la matrice de catégories de risque
+RISK_CATEGORY_NAMES = list(RISK_CATEGORIES)
+_RISK_CATEGORY_LEVELS = np.array([RISK_CATEGORIES[name][0] for name in RISK_CATEGORY_NAMES], dtype=np.int8)
+
+
+@dataclass
+class BatchDirectorResult:
+    """Résultat columnaire d'une analyse par lot (une ligne par transcription)."""
+    script: Dict[str, Any]
+    stage_ids: List[str]
+    stage_position: np.ndarray       # (N,) position du stage courant dans le script
+    completed_count: np.ndarray      # (N,) nombre d'étapes complétées (préfixe du script)
+    risk_level: np.ndarray           # (N,) niveau de risque 0-3
+    risk_categories: np.ndarray      # (N, C) catégories de risque détectées
+
+    def __len__(self) -> int:
+        return len(self.stage_position)
+
+    def current_stage_ids(self) -> List[str]:
+        """Retourne le stage courant de chaque transcription."""
+        names = np.array(self.stage_ids, dtype=object)
+        return list(names[self.stage_position])
+
+    def to_updates(self) -> List[DirectorUpdate]:
+        """Convertit le résultat en une liste de DirectorUpdate (comme analyze_conversation)."""
+        objectives = [
+            stage['victim_objectives'][0] if stage['victim_objectives'] else "Rester prudent"
+            for stage in self.script['stages']
+        ]
+        contexts = [
+            _build_context(self.script, stage, objective)
+            for stage, objective in zip(self.script['stages'], objectives)
+        ]
+        updates = []
+        for pos, count, level, categories in zip(
+            self.stage_position.tolist(),
+            self.completed_count.tolist(),
+            self.risk_level.tolist(),
+            self.risk_categories
+        ):
+            factors = [
+                name for name, present, cat_level in zip(RISK_CATEGORY_NAMES, categories, _RISK_CATEGORY_LEVELS)
+                if present and cat_level == level
+            ]
+            updates.append(DirectorUpdate(
+                script_id=self.script['script_id'],
+                stage_id=self.stage_ids[pos],
+                completed_stages=self.stage_ids[:count],
+                next_objective_for_victim=objectives[pos],
+                dynamic_context_from_director=contexts[pos],
+                risk_level=level,
+                risk_factors=factors
+            ))
+        return updates
+
+
+def build_signal_matrix(texts: Sequence[str], matcher: StageMatcher) -> np.ndarray:
+    """
+    Construit la matrice booléenne (message x signal) des signaux détectés
+
+    Args:
+        texts: Messages à analyser
+        matcher: Matcher compilé du script
+    """
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for col in matcher.signals_in(text):
+            rows.append(row)
+            cols.append(col)
+    hits = np.zeros((len(texts), len(matcher.signals)), dtype=bool)
+    hits[rows, cols] = True
+    return hits
+
+
+def _reduce_per_transcript(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """OU logique des lignes de chaque transcription (les transcriptions vides donnent 0)."""
+    starts = np.cumsum(lengths) - lengths
+    # Ligne sentinelle pour les transcriptions vides en fin de lot
+    padded = np.vstack([values, np.zeros((1, values.shape[1]), dtype=values.dtype)])
+    reduced = np.maximum.reduceat(padded, starts, axis=0)
+    reduced[lengths == 0] = 0
+    return reduced
+
+
+def analyze_batch(transcripts: Sequence[List[Dict[str, str]]], script: Dict[str, Any]) -> BatchDirectorResult:
+    """
+    Analyse N transcriptions d'un même script en une seule passe vectorisée
+
+    Donne les mêmes étapes et le même risque qu'analyze_conversation appelé sur
+    chaque transcription.
+
+    Args:
+        transcripts: Liste d'historiques ({'role', 'content'})
+        script: Script d'arnaque de référence
+
+    Returns:
+        BatchDirectorResult (utiliser to_updates() pour obtenir des DirectorUpdate)
+    """
+    matcher = get_stage_matcher(script)
+    n_stages = len(matcher.stage_ids)
+    lengths = np.fromiter((len(t) for t in transcripts), dtype=np.int64, count=len(transcripts))
+
+    # Dédoublonnage des messages : chaque texte distinct n'est analysé qu'une fois
+    unique_index: Dict[str, int] = {}
+    inverse = np.fromiter(
+        (unique_index.setdefault(msg['content'], len(unique_index)) for t in transcripts for msg in t),
+        dtype=np.int64,
+        count=int(lengths.sum())
+    )
+    unique_texts = list(unique_index)
+
+    signal_hits = build_signal_matrix(unique_texts, matcher)
+    signal_to_stage = np.zeros((len(matcher.signals), n_stages), dtype=np.int32)
+    for signal, stages in enumerate(matcher.signal_stages):
+        signal_to_stage[signal, list(stages)] = 1
+    stage_hits = (signal_hits.astype(np.int32) @ signal_to_stage) > 0
+
+    category_column = {name: col for col, name in enumerate(RISK_CATEGORY_NAMES)}
+    risk_hits = np.zeros((len(unique_texts), len(RISK_CATEGORY_NAMES)), dtype=bool)
+    for row, text in enumerate(unique_texts):
+        for name in _score_message(text)[1]:
+            risk_hits[row, category_column[name]] = True
+
+    transcript_stages = _reduce_per_transcript(stage_hits[inverse].astype(np.uint8), lengths).astype(bool)
+    transcript_risk = _reduce_per_transcript(risk_hits[inverse].astype(np.uint8), lengths).astype(bool)
+
+    # Étapes validées dans l'ordre : préfixe de stages touchés
+    completed_count = np.logical_and.accumulate(transcript_stages, axis=1).sum(axis=1)
+    stage_position = np.maximum(completed_count - 1, 0)
+    risk_level = (transcript_risk * _RISK_CATEGORY_LEVELS).max(axis=1, initial=0)
+
+    return BatchDirectorResult(
+        script=script,
+        stage_ids=matcher.stage_ids,
+        stage_position=stage_position,
+        completed_count=completed_count,
+        risk_level=risk_level,
+        risk_categories=transcript_risk
+    )
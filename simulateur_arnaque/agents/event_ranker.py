@@ -0,0 +1,307 @@
+"""
+Sélection locale des événements d'audience (sans appel LLM)
+
+LocalEventRanker classe les suggestions pré-filtrées et DEFAULT_EVENTS par
+rapport au contexte de la conversation et à l'objectif de Jeanne :
+- similarité TF-IDF sur n-grammes de caractères (hachés, calcul matriciel numpy) ;
+- priors par étape, lus dans le champ "audience_priors" de l'étape du script
+  (lunettes quand on demande un code, sonnette quand l'arnaqueur presse...) ;
+- popularité (nombre de spectateurs, poids des événements par défaut).
+
+La confiance est l'écart entre les 3 premiers et le suivant : sous
+MODERATOR_LOCAL_CONFIDENCE, le modérateur en mode "auto" demande au LLM.
+
+Accord avec le LLM sur des tours simulés (backend et cache configurés) :
+    python -m simulateur_arnaque.agents.event_ranker
+"""
+
+import math
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..config.llm_config import MODERATOR_LOCAL_CONFIDENCE
+from .suggestion_filter import FilterResult, normalize_suggestion, similarity
+
+HASH_DIM = 1 << 12
+NGRAM_SIZES = (3, 4)
+
+AUDIENCE_BONUS = 0.1  # À pertinence égale, l'audience passe avant les événements par défaut
+DEFAULT_DESCRIPTION = "Événement perturbateur"
+
+
+@lru_cache(maxsize=4096)
+def _normalized(text: str) -> str:
+    return normalize_suggestion(text)
+
+
+@lru_cache(maxsize=4096)
+def _is_duplicate(a: str, b: str, threshold: float) -> bool:
+    return similarity(a, b) >= threshold
+
+
+@lru_cache(maxsize=4096)
+def _ngrams(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(indices hachés, tf logarithmique) des n-grammes de caractères d'un texte"""
+    padded = f" {_normalized(text)} "
+    counts: Dict[int, int] = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            index = zlib.crc32(padded[i:i + n].encode("utf-8")) & (HASH_DIM - 1)
+            counts[index] = counts.get(index, 0) + 1
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    return indices, tf
+
+
+def tfidf_similarities(query: Sequence[str], documents: Sequence[str]) -> np.ndarray:
+    """
+    Cosinus TF-IDF (n-grammes de caractères) entre la requête et chaque document
+
+    Args:
+        query: Parties de la requête (lignes du contexte, objectif), chacune mise
+            en cache : seule la partie qui change d'un tour à l'autre est recalculée
+        documents: Textes des candidats
+    """
+    vectors = [_ngrams(text) for text in documents] + [_ngrams(part) for part in query]
+    # Ligne de chaque n-gramme (toutes les parties de la requête sur la dernière ligne)
+    rows = np.repeat(
+        np.minimum(np.arange(len(vectors)), len(documents)),
+        [len(indices) for indices, _ in vectors]
+    )
+    # Colonnes limitées aux n-grammes présents (quelques centaines sur HASH_DIM)
+    indices = np.concatenate([indices for indices, _ in vectors])
+    present = np.zeros(HASH_DIM, dtype=bool)
+    present[indices] = True
+    columns = (np.cumsum(present) - 1)[indices]
+    size = int(present.sum())
+    matrix = np.bincount(
+        rows * size + columns,
+        weights=np.concatenate([tf for _, tf in vectors]),
+        minlength=(len(documents) + 1) * size
+    ).reshape(len(documents) + 1, size)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(documents) + 1) / (1 + df)) + 1
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    matrix /= norms[:, None]
+    return matrix[:-1] @ matrix[-1]
+
+
+@dataclass
+class LocalRanking:
+    """Classement local : 3 événements et confiance"""
+    events: List[Dict[str, str]]
+    confidence: float
+    scores: List[Tuple[str, float]] = field(default_factory=list)
+
+
+class LocalEventRanker:
+    """Classement des suggestions et des événements par défaut sans LLM"""
+
+    def __init__(self, default_events: Optional[List[Dict[str, Any]]] = None, duplicate_threshold: float = 0.5):
+        """
+        Args:
+            default_events: Événements par défaut candidats (DEFAULT_EVENTS si None)
+            duplicate_threshold: Similarité au-delà de laquelle un événement par défaut
+                doublonne une suggestion (la suggestion est gardée)
+        """
+        if default_events is None:
+            from ..audience_events import DEFAULT_EVENTS
+            default_events = DEFAULT_EVENTS
+        self.default_events = default_events
+        self.duplicate_threshold = duplicate_threshold
+        self._default_keys = [normalize_suggestion(e['event']) for e in default_events]
+        # Étapes déjà signalées sans priors (un seul avertissement par étape)
+        self._missing_priors: Set[Tuple[str, str]] = set()
+
+    def _candidates(self, prepared: Optional[FilterResult]) -> Tuple[List[Dict[str, str]], np.ndarray, List[str]]:
+        """(événements, bonus de popularité, textes comparés au contexte)"""
+        events, popularity, texts = [], [], []
+        clusters = prepared.clusters if prepared is not None else []
+        max_count = max((c.count for c in clusters), default=1)
+        for cluster in clusters:
+            events.append({'event': cluster.representative, 'description': DEFAULT_DESCRIPTION})
+            popularity.append(AUDIENCE_BONUS + 0.15 * math.log1p(cluster.count) / math.log1p(max_count))
+            texts.append(cluster.representative)
+        for event, key in zip(self.default_events, self._default_keys):
+            if any(_is_duplicate(key, c.normalized, self.duplicate_threshold) for c in clusters):
+                continue
+            events.append({'event': event['event'], 'description': event['description']})
+            popularity.append(0.05 * event.get('weight', 1) / 3)
+            texts.append(f"{event['event']} {event['description']}")
+        return events, np.array(popularity), texts
+
+    def stage_priors(self, script_id: str, stage_id: str) -> Dict[str, float]:
+        """
+        Priors d'une étape : racine (texte normalisé) -> bonus ajouté au score
+
+        Args:
+            script_id: Script en cours
+            stage_id: Étape du script
+
+        Returns:
+            Champ "audience_priors" de l'étape ({} s'il manque, avec un avertissement)
+        """
+        if not script_id or not stage_id:
+            return {}
+        from ..scripts.script_loader import get_registry
+        try:
+            priors = get_registry().get_stage(script_id, stage_id).get('audience_priors')
+        except (OSError, ValueError, KeyError):
+            priors = None
+        if priors is None:
+            if (script_id, stage_id) not in self._missing_priors:
+                self._missing_priors.add((script_id, stage_id))
+                print(f"⚠️ Pas de 'audience_priors' pour l'étape {stage_id} du script {script_id} : classement sans priors")
+            return {}
+        return priors
+
+    def _priors(self, texts: List[str], script_id: str, stage_id: str) -> np.ndarray:
+        priors = self.stage_priors(script_id, stage_id)
+        return np.array([sum(bonus for word, bonus in priors.items() if word in _normalized(t)) for t in texts])
+
+    def rank(
+        self,
+        prepared: Optional[FilterResult],
+        conversation_context: str,
+        current_objective: str = "",
+        stage_id: str = "",
+        script_id: str = ""
+    ) -> LocalRanking:
+        """
+        Classer les candidats et retenir les 3 meilleurs
+
+        Args:
+            prepared: Suggestions pré-filtrées (None = événements par défaut seuls)
+            conversation_context: Contexte de la conversation
+            current_objective: Objectif actuel de Jeanne
+            stage_id: Étape du script (priors)
+            script_id: Script en cours (où lire les priors de l'étape)
+
+        Returns:
+            LocalRanking (confiance entre 0 et 1)
+        """
+        events, popularity, texts = self._candidates(prepared)
+        scores = (
+            tfidf_similarities([*conversation_context.splitlines(), current_objective], texts)
+            + self._priors(texts, script_id, stage_id)
+            + popularity
+        )
+        order = np.argsort(-scores, kind="stable")
+        top = scores[order[:3]]
+        if len(order) <= 3 or top.mean() <= 0:
+            confidence = 1.0 if len(order) <= 3 else 0.0
+        else:
+            confidence = float((top.mean() - scores[order[3]]) / top.mean())
+        return LocalRanking(
+            events=[events[i] for i in order[:3]],
+            confidence=confidence,
+            scores=[(events[i]['event'], float(scores[i])) for i in order]
+        )
+
+    @staticmethod
+    def is_confident(ranking: LocalRanking, threshold: float = MODERATOR_LOCAL_CONFIDENCE) -> bool:
+        return ranking.confidence >= threshold
+
+
+def _same_event(a: str, b: str) -> bool:
+    return similarity(normalize_suggestion(a), normalize_suggestion(b)) >= 0.5
+
+
+def compare_with_llm(moderator: Any, rounds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Accord entre la sélection locale et celle du LLM
+
+    Args:
+        moderator: ModeratorAgent (sa sélection LLM sert de référence)
+        rounds: Tours {'suggestions', 'conversation_context', 'current_objective', 'script_id', 'stage_id'}
+
+    Returns:
+        Taux d'accord (au moins le premier choix, recouvrement moyen des 3 choix),
+        séparément pour les tours où le classement local est confiant ou non
+    """
+    ranker = moderator.local_ranker
+    buckets: Dict[str, List[Tuple[bool, float]]] = {"confident": [], "uncertain": []}
+    for round_ in rounds:
+        prepared = moderator.suggestion_filter.prepare(round_['suggestions'])
+        local = ranker.rank(
+            prepared, round_['conversation_context'], round_.get('current_objective', ""),
+            round_.get('stage_id', ""), round_.get('script_id', "")
+        )
+        reference = moderator.filter_and_select(
+            round_['suggestions'], round_['conversation_context'], round_.get('current_objective', ""),
+            script_id=round_.get('script_id', ""), stage_id=round_.get('stage_id', ""), selection_mode="llm"
+        )
+        local_names = [e['event'] for e in local.events]
+        reference_names = [e['event'] for e in reference]
+        top1 = any(_same_event(local_names[0], name) for name in reference_names)
+        overlap = sum(any(_same_event(name, other) for other in reference_names) for name in local_names) / 3
+        buckets["confident" if ranker.is_confident(local) else "uncertain"].append((top1, overlap))
+
+    def summarize(results: List[Tuple[bool, float]]) -> Dict[str, Any]:
+        return {
+            "rounds": len(results),
+            "top1_agreement": sum(r[0] for r in results) / len(results) if results else 0.0,
+            "mean_overlap": sum(r[1] for r in results) / len(results) if results else 0.0,
+        }
+
+    return {
+        "all": summarize(buckets["confident"] + buckets["uncertain"]),
+        "confident": summarize(buckets["confident"]),
+        "uncertain": summarize(buckets["uncertain"]),
+    }
+
+
+def _simulated_rounds() -> List[Dict[str, Any]]:
+    """Un tour par étape de chaque script, avec les suggestions simulées de l'interface"""
+    from ..audience_interface import AudienceInterface
+    from ..scripts.script_loader import get_registry
+
+    suggestions = AudienceInterface(mode="simulated")._get_simulated_suggestions()
+    rounds = []
+    registry = get_registry()
+    for script_id in registry.discover():
+        script = registry.get(script_id)
+        for stage in script['stages']:
+            rounds.append({
+                'suggestions': suggestions,
+                'conversation_context': f"Script: {script['title']}\nÉtape: {stage['stage_id']}",
+                'current_objective': " ".join(stage.get('victim_objectives', [])),
+                'script_id': script_id,
+                'stage_id': stage['stage_id'],
+            })
+    return rounds
+
+
+if __name__ == "__main__":
+    import time
+    from .moderator import ModeratorAgent
+
+    moderator = ModeratorAgent()
+    rounds = _simulated_rounds()
+    # Le modérateur classe les suggestions déjà pré-filtrées : deux coûts distincts,
+    # mesurés après un premier tour (import de numpy, chargement des scripts)
+    warmup = rounds[0]
+    moderator.local_ranker.rank(
+        moderator.suggestion_filter.prepare(warmup['suggestions']),
+        warmup['conversation_context'], warmup['current_objective'], warmup['stage_id'], warmup['script_id']
+    )
+    start = time.perf_counter()
+    prepared = [moderator.suggestion_filter.prepare(round_['suggestions']) for round_ in rounds]
+    prepare_ms = (time.perf_counter() - start) * 1000 / len(rounds)
+    start = time.perf_counter()
+    for round_, filtered in zip(rounds, prepared):
+        moderator.local_ranker.rank(
+            filtered, round_['conversation_context'], round_['current_objective'], round_['stage_id'], round_['script_id']
+        )
+    rank_ms = (time.perf_counter() - start) * 1000 / len(rounds)
+    print(f"Pré-filtrage : {prepare_ms:.3f} ms par tour, classement local : {rank_ms:.3f} ms par tour")
+    for name, stats in compare_with_llm(moderator, rounds).items():
+        print(
+            f"{name:>10} : {stats['rounds']} tours, premier choix retenu par le LLM "
+            f"{stats['top1_agreement']:.0%}, recouvrement moyen {stats['mean_overlap']:.0%}"
+        )
@@ -0,0 +1,189 @@
+"""
+Mémoire conversationnelle à budget de tokens pour les agents
+
+Les derniers échanges sont gardés mot pour mot ; quand le budget (résumé
+compris) est dépassé, les plus anciens sont résumés en arrière-plan (hors du
+chemin critique de la réponse) dans un résumé glissant.
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Résumeur : (résumé actuel, messages à intégrer) -> nouveau résumé
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+# Coût fixe approximatif d'une ligne "role: contenu" dans le prompt
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation locale et rapide du nombre de tokens (~4 caractères par token)
+
+    Coût constant : suffisant pour vérifier un budget sans appeler de tokenizer.
+    """
+    return (len(text) + 3) // 4
+
+
+def _first_sentence(text: str, max_chars: int = 120) -> str:
+    """Première phrase d'un texte, tronquée"""
+    text = " ".join(text.split())
+    for end in ".!?":
+        pos = text.find(end)
+        if 0 < pos < max_chars:
+            return text[:pos + 1]
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def local_summarizer(summary: str, messages: List[Dict[str, str]], max_chars: int = 1200) -> str:
+    """Résumé extractif sans LLM : première phrase de chaque message, tronqué à max_chars"""
+    lines = [summary] if summary else []
+    lines += [f"{msg['role']}: {_first_sentence(msg['content'])}" for msg in messages]
+    text = "\n".join(lines)
+    return text if len(text) <= max_chars else "…" + text[-max_chars:]
+
+
+class RollingMemory:
+    """Historique à budget de tokens avec résumé glissant des anciens échanges"""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        keep_last: int = 4,
+        summarizer: Optional[Summarizer] = None,
+        background: bool = True
+    ):
+        """
+        Args:
+            token_budget: Budget de tokens de l'historique, résumé compris (None = pas de limite)
+            keep_last: Nombre d'échanges (scammeur + victime) toujours gardés mot pour mot
+            summarizer: Fonction de résumé (local_summarizer par défaut)
+            background: Résumer dans un thread dédié plutôt que pendant l'appel
+        """
+        self.token_budget = token_budget
+        self.keep_last = keep_last
+        self.summarizer = summarizer or local_summarizer
+        self.background = background
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._generation = 0
+        # Incrémenté dès que le début de l'historique change (résumé, messages
+        # retirés) : tant qu'il est stable, l'historique ne fait que s'allonger
+        self.prefix_version = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Vider la mémoire (les résumés en cours sont ignorés)"""
+        with self._lock:
+            self._messages: Deque[Tuple[Dict[str, str], int]] = deque()
+            self._verbatim_tokens = 0
+            self._pending: List[Dict[str, str]] = []
+            self.summary = ""
+            self.folded_messages = 0
+            self._generation += 1
+            self.prefix_version += 1
+
+    @property
+    def tokens(self) -> int:
+        """Tokens estimés de l'historique tel qu'il sera envoyé au LLM"""
+        with self._lock:
+            return self._verbatim_tokens + estimate_tokens(self.summary) + sum(
+                estimate_tokens(m['content']) + MESSAGE_OVERHEAD_TOKENS for m in self._pending
+            )
+
+    def add(self, role: str, content: str) -> None:
+        """Ajouter un message ; déclenche un résumé si le budget est dépassé"""
+        message = {"role": role, "content": content}
+        cost = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        folded = []
+        with self._lock:
+            self._messages.append((message, cost))
+            self._verbatim_tokens += cost
+            if self.token_budget is not None:
+                # Le résumé est envoyé avec les messages : il compte dans le budget.
+                # On garde toujours les keep_last derniers échanges (2 messages chacun)
+                budget = self.token_budget - estimate_tokens(self.summary)
+                while self._verbatim_tokens > budget and len(self._messages) > 2 * self.keep_last:
+                    old, old_cost = self._messages.popleft()
+                    self._verbatim_tokens -= old_cost
+                    folded.append(old)
+            self._pending.extend(folded)
+            if folded:
+                self.prefix_version += 1
+        if folded:
+            self._schedule_fold()
+
+    def _schedule_fold(self) -> None:
+        if not self.background:
+            self._fold(self._generation)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self._executor.submit(self._fold, self._generation)
+
+    def _fold(self, generation: int) -> None:
+        """Intègre les messages en attente dans le résumé (thread d'arrière-plan)"""
+        with self._lock:
+            if generation != self._generation or not self._pending:
+                return
+            pending, summary = list(self._pending), self.summary
+        try:
+            new_summary = self.summarizer(summary, pending)
+        except Exception as e:
+            print(f"⚠️ Résumé de mémoire impossible ({e}), résumé local utilisé")
+            new_summary = local_summarizer(summary, pending)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.summary = new_summary
+            self.prefix_version += 1
+            self.folded_messages += len(pending)
+            del self._pending[:len(pending)]
+
+    def wait(self) -> None:
+        """Attendre la fin des résumés en cours (tests, fin de session)"""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def __len__(self) -> int:
+        """Nombre de messages gardés mot pour mot"""
+        return len(self._messages)
+    
+    def summary_text(self) -> str:
+        """Résumé des anciens échanges (version extractive si le résumé est en cours)"""
+        with self._lock:
+            pending, summary = list(self._pending), self.summary
+        if pending:
+            # Résumé pas encore prêt : version extractive immédiate des messages en attente
+            summary = local_summarizer(summary, pending)
+        return summary
+    
+    def messages_since(self, start: int) -> List[Dict[str, str]]:
+        """Messages gardés mot pour mot à partir de l'index start"""
+        with self._lock:
+            return [m for m, _ in islice(self._messages, start, None)]
+    
+    def format(self) -> str:
+        """Historique à injecter dans le prompt : résumé puis derniers messages"""
+        summary = self.summary_text()
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}\n")
+        parts.extend(f"{m['role']}: {m['content']}" for m in self.messages_since(0))
+        return "\n".join(parts)
+    
+    def get_stats(self) -> dict:
+        """Statistiques de la mémoire"""
+        with self._lock:
+            verbatim = len(self._messages)
+            pending = len(self._pending)
+        return {
+            "token_budget": self.token_budget,
+            "estimated_tokens": self.tokens,
+            "verbatim_messages": verbatim,
+            "folded_messages": self.folded_messages,
+            "pending_fold": pending,
+        }
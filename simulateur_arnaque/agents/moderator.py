@@ -8,9 +8,47 @@ Cet agent LLM est responsable de:
 - Évaluer la pertinence des événements perturbateurs
 """
 
-from typing import List, Dict, Optional
-from langchain_google_vertexai import ChatVertexAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Any, Generator, Iterator, List, Dict, Optional, Tuple
+from ..llm.factory import create_chat_model, model_label
+from ..llm.rate_limiter import PRIORITY_MODERATOR, PRIORITY_FALLBACK, rate_limited
+from ..llm.hedging import hedged
+from ..llm.circuit_breaker import get_breaker
+from ..llm.instrumentation import CallRecord, new_session_id, track_call
+from ..llm.response_cache import CassetteMissError, cached
+from .canned_responses import pick_default_events
+from .suggestion_filter import FilterResult, SuggestionCluster, SuggestionFilter, normalize_suggestion, similarity
+from .decision_cache import get_decision_cache
+from ..config.llm_config import (
+    MODERATOR_SELECTION_MODE,
+    MODERATOR_SHARD_FAN_OUT,
+    MODERATOR_SHARD_SIZE,
+    MODERATOR_SHARD_TOP_K,
+)
+
+# Configuration par défaut du modèle du modérateur
+MODERATOR_MODEL = "gemini-1.5-flash"
+MODERATOR_LOCATION = "us-central1"
+MODERATOR_TEMPERATURE = 0.7
+
+SELECTION_MODES = ("llm", "local", "auto")
+
+# Ligne des suggestions éliminées dans la réponse de sélection
+_REJECTED_LINE = re.compile(r"^\s*REJET[ÉE]ES?\s*:\s*(.*)$", re.IGNORECASE | re.MULTILINE)
+
+# Appel LLM demandé par une étape de modération : (modèle, messages, type d'appel)
+_Request = Tuple[Any, list, str]
+# Étapes de modération, sans entrée/sortie : le générateur produit des lots d'appels,
+# reçoit leurs réponses (None si l'appel a échoué) et retourne son résultat.
+# _run_steps et _arun_steps font les appels, bloquants ou asynchrones.
+_Steps = Generator[List[_Request], List[Optional[str]], Any]
 
 
 class ModeratorAgent:
@@ -18,7 +56,16 @@ class ModeratorAgent:
     Agent responsable de modérer et sélectionner les événements d'audience
     """
     
-    def __init__(self, project_id: str = None, location: str = "us-central1", model: str = "gemini-1.5-flash"):
+    def __init__(
+        self,
+        project_id: str = None,
+        location: str = MODERATOR_LOCATION,
+        model: str = MODERATOR_MODEL,
+        selection_mode: str = MODERATOR_SELECTION_MODE,
+        shard_size: int = MODERATOR_SHARD_SIZE,
+        fan_out: int = MODERATOR_SHARD_FAN_OUT,
+        shard_top_k: int = MODERATOR_SHARD_TOP_K
+    ):
         """
         Initialise l'agent modérateur
         
@@ -26,14 +73,51 @@ class ModeratorAgent:
             project_id: Google Cloud Project ID
             location: Region Google Cloud
             model: Modèle LLM à utiliser
+            selection_mode: "llm", "local" (classement local, sans appel) ou "auto" (LLM si confiance faible)
+            shard_size: Suggestions distinctes par lot du tournoi (0 = un seul appel, budget de tokens)
+            fan_out: Lots du tournoi modérés en parallèle
+            shard_top_k: Suggestions retenues par lot pour le tour suivant
         """
-        from ..config.llm_config import GOOGLE_PROJECT_ID
-        self.llm = ChatVertexAI(
-            project=project_id or GOOGLE_PROJECT_ID,
-            location=location,
-            model_name=model,
-            temperature=0.7
+        if selection_mode not in SELECTION_MODES:
+            raise ValueError(f"Mode de sélection inconnu: {selection_mode} (attendu: {', '.join(SELECTION_MODES)})")
+        self.model_name = model_label(model)
+        self.llm = cached(
+            rate_limited(
+                create_chat_model(
+                    temperature=MODERATOR_TEMPERATURE,
+                    model=model,
+                    project=project_id,
+                    location=location
+                ),
+                PRIORITY_MODERATOR
+            ),
+            self.model_name,
+            MODERATOR_TEMPERATURE
         )
+        # Génération de secours : passe après les réponses de la victime et la sélection
+        self.fallback_llm = self.llm.with_priority(PRIORITY_FALLBACK)
+        # Sélection : doublement des appels lents et nouvelles tentatives
+        self.selection_llm = hedged(self.llm, "moderator")
+        # Backend dégradé : tirage local dans DEFAULT_EVENTS sans appel LLM
+        self.breaker = get_breaker("moderator")
+        self._recent_fallback_events = deque(maxlen=6)
+        # Pré-filtrage local : liste de blocage et regroupement des quasi-doublons
+        self.suggestion_filter = SuggestionFilter()
+        # Décisions et verdicts mémorisés, partagés entre sessions
+        self.decisions = get_decision_cache("decisions")
+        self.verdicts = get_decision_cache("verdicts")
+        # Classement local des événements (créé au premier usage)
+        self.selection_mode = selection_mode
+        self._local_ranker = None
+        self.local_stats = {"local": 0, "escalated": 0}
+        # Modération par tournoi : lots modérés en parallèle, puis une finale
+        self.shard_size = shard_size
+        self.fan_out = max(1, fan_out)
+        self.shard_top_k = max(1, shard_top_k)
+        self.tournament_stats = {"tournaments": 0, "rounds": 0, "shards": 0, "failed_shards": 0}
+        
+        # Mesures des appels LLM
+        self.session_id = new_session_id()
         
         self.system_prompt = """Tu es un modérateur d'événements pour un simulateur d'arnaque téléphonique éducatif.
 
@@ -75,59 +159,63 @@ Ta mission: Analyser les suggestions, filtrer les inappropriées, et sélectionn
 3. Permettent de gagner du temps sans terminer la conversation
 """
     
-    def filter_and_select(
-        self, 
-        suggestions: List[str], 
+    def _build_selection_messages(
+        self,
+        prepared: FilterResult,
         conversation_context: str,
-        current_objective: str = ""
-    ) -> List[Dict[str, str]]:
+        current_objective: str,
+        top_k: Optional[int] = None
+    ) -> list:
         """
-        Filtre les suggestions de l'audience et sélectionne les 3 meilleures
+        Construit les messages du prompt de filtrage/sélection
         
         Args:
-            suggestions: Liste des suggestions de l'audience
+            prepared: Suggestions pré-filtrées à soumettre
             conversation_context: Résumé du contexte actuel de la conversation
             current_objective: Objectif actuel de Mme Dubois
-            
-        Returns:
-            Liste de 3 dictionnaires contenant 'event' et 'description'
+            top_k: Suggestions à retenir pour un lot du tournoi (None = sélection finale des 3 événements)
         """
-        if not suggestions:
-            return self._get_default_events()
+        from langchain_core.messages import HumanMessage, SystemMessage
+        
+        count = top_k or 3
+        response_format = "\n".join(
+            f"{i}. [Nom de l'événement] - Description de l'impact (max 1 phrase)" for i in range(1, count + 1)
+        )
+        if top_k is None:
+            closing = "Si moins de 3 suggestions sont appropriées, propose des événements pertinents que tu crées toi-même."
+        else:
+            closing = f"Ne retiens que des suggestions de la liste, quitte à en retenir moins de {count}."
         
-        # Construire le prompt avec le contexte
         user_prompt = f"""CONTEXTE DE LA CONVERSATION:
 {conversation_context}
 
 OBJECTIF ACTUEL DE JEANNE:
 {current_objective}
 
-SUGGESTIONS DE L'AUDIENCE ({len(suggestions)}):
-{self._format_suggestions(suggestions)}
+SUGGESTIONS DE L'AUDIENCE ({len(prepared.clusters)} idées distinctes sur {prepared.received} propositions, (×N) = proposée par N spectateurs):
+{self._format_suggestions(prepared.suggestions, [c.count for c in prepared.clusters])}
 
 Ta tâche:
 1. Élimine toutes les suggestions inappropriées selon les règles
 2. Évalue la cohérence de chaque suggestion avec le contexte
-3. Sélectionne les 3 MEILLEURES suggestions
+3. Sélectionne les {count} MEILLEURES suggestions (à pertinence égale, les plus proposées)
 4. Pour chaque suggestion retenue, fournis une description courte (1 phrase) de l'impact
 
 Format de réponse (IMPORTANT - Respecte exactement ce format):
-1. [Nom de l'événement] - Description de l'impact (max 1 phrase)
-2. [Nom de l'événement] - Description de l'impact (max 1 phrase)
-3. [Nom de l'événement] - Description de l'impact (max 1 phrase)
+{response_format}
+REJETÉES: suggestion éliminée; autre suggestion éliminée (ou REJETÉES: aucune)
 
-Si moins de 3 suggestions sont appropriées, propose des événements pertinents que tu crées toi-même.
+{closing}
 """
         
-        messages = [
+        return [
             SystemMessage(content=self.system_prompt),
             HumanMessage(content=user_prompt)
         ]
-        
-        response = self.llm.invoke(messages)
-        
-        # Parser la réponse
-        selected_events = self._parse_response(response.content)
+    
+    def _finalize_selection(self, response: str) -> List[Dict[str, str]]:
+        """Parse la réponse de sélection et complète jusqu'à 3 événements"""
+        selected_events = self._parse_response(response)
         
         # Assurer qu'on a bien 3 événements
         if len(selected_events) < 3:
@@ -137,9 +225,399 @@ Si moins de 3 suggestions sont appropriées, propose des événements pertinents
         
         return selected_events[:3]
     
-    def _format_suggestions(self, suggestions: List[str]) -> str:
-        """Formate les suggestions pour le prompt"""
-        return "\n".join([f"- {s}" for s in suggestions])
+    def filter_and_select(
+        self, 
+        suggestions: List[str], 
+        conversation_context: str,
+        current_objective: str = "",
+        script_id: str = "",
+        stage_id: str = "",
+        selection_mode: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Filtre les suggestions de l'audience et sélectionne les 3 meilleures
+        
+        Args:
+            suggestions: Liste des suggestions de l'audience
+            conversation_context: Résumé du contexte actuel de la conversation
+            current_objective: Objectif actuel de Mme Dubois
+            script_id: Script en cours (clé des décisions mémorisées, priors du classement local)
+            stage_id: Étape en cours (clé des décisions mémorisées, priors du classement local)
+            selection_mode: Remplace le mode de sélection de l'agent pour cet appel
+            
+        Returns:
+            Liste de 3 dictionnaires contenant 'event' et 'description'
+        """
+        return self._run_steps(self._selection_steps(
+            suggestions, conversation_context, current_objective, script_id, stage_id, selection_mode
+        ))
+    
+    async def afilter_and_select(
+        self,
+        suggestions: List[str],
+        conversation_context: str,
+        current_objective: str = "",
+        script_id: str = "",
+        stage_id: str = "",
+        selection_mode: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Version asynchrone de filter_and_select (appel LLM non bloquant)
+        
+        Args:
+            suggestions: Liste des suggestions de l'audience
+            conversation_context: Résumé du contexte actuel de la conversation
+            current_objective: Objectif actuel de Mme Dubois
+            script_id: Script en cours (clé des décisions mémorisées, priors du classement local)
+            stage_id: Étape en cours (clé des décisions mémorisées, priors du classement local)
+            selection_mode: Remplace le mode de sélection de l'agent pour cet appel
+            
+        Returns:
+            Liste de 3 dictionnaires contenant 'event' et 'description'
+        """
+        return await self._arun_steps(self._selection_steps(
+            suggestions, conversation_context, current_objective, script_id, stage_id, selection_mode
+        ))
+    
+    def _selection_steps(
+        self,
+        suggestions: List[str],
+        conversation_context: str,
+        current_objective: str,
+        script_id: str,
+        stage_id: str,
+        selection_mode: Optional[str]
+    ) -> _Steps:
+        """Étapes de filter_and_select, communes aux versions synchrone et asynchrone"""
+        if not suggestions:
+            return self._get_default_events()
+        
+        prepared = self.suggestion_filter.prepare(suggestions, limit=not self.shard_size)
+        events = self._local_selection(prepared, conversation_context, current_objective, script_id, stage_id, selection_mode)
+        if events is not None:
+            return events
+        context = self._context_key(conversation_context, script_id, stage_id)
+        events, pending = self._plan_selection(prepared, context)
+        if events is not None:
+            return events
+        if self._needs_tournament(pending):
+            pending = yield from self._tournament_steps(pending, conversation_context, current_objective, context)
+        if not pending.clusters:
+            # Tout a été rejeté localement : événements contextuels
+            return (yield from self._fallback_steps(conversation_context, script_id, stage_id))
+        
+        messages = self._build_selection_messages(pending, conversation_context, current_objective)
+        content, = yield [(self.selection_llm, messages, "select")]
+        if content is None:
+            return self._degraded_events()
+        return self._remember_selection(prepared, pending, content, context)
+    
+    def _run_steps(self, steps: _Steps) -> Any:
+        """
+        Exécuter des étapes de modération avec des appels bloquants
+        
+        Les appels d'un même lot (lots du tournoi) sont faits en parallèle,
+        fan_out au maximum.
+        """
+        pool = None
+        try:
+            requests = next(steps)
+            while True:
+                if len(requests) == 1:
+                    contents = [self._guarded_invoke(*requests[0])]
+                else:
+                    if pool is None:
+                        pool = ThreadPoolExecutor(max_workers=self.fan_out, thread_name_prefix="moderator-shard")
+                    contents = list(pool.map(lambda request: self._guarded_invoke(*request), requests))
+                requests = steps.send(contents)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    
+    async def _arun_steps(self, steps: _Steps) -> Any:
+        """Version asynchrone de _run_steps (fan_out appels en cours au maximum)"""
+        semaphore = asyncio.Semaphore(self.fan_out)
+        
+        async def invoke(request: _Request) -> Optional[str]:
+            async with semaphore:
+                return await self._aguarded_invoke(*request)
+        
+        try:
+            requests = next(steps)
+            while True:
+                contents = await asyncio.gather(*(invoke(request) for request in requests))
+                requests = steps.send(list(contents))
+        except StopIteration as stop:
+            return stop.value
+    
+    @property
+    def local_ranker(self) -> Any:
+        """LocalEventRanker (numpy n'est chargé qu'au premier usage)"""
+        if self._local_ranker is None:
+            from .event_ranker import LocalEventRanker
+            self._local_ranker = LocalEventRanker()
+        return self._local_ranker
+    
+    def _local_selection(
+        self,
+        prepared: Optional[FilterResult],
+        conversation_context: str,
+        current_objective: str,
+        script_id: str,
+        stage_id: str,
+        selection_mode: Optional[str] = None
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        Sélection sans appel LLM, selon le mode
+        
+        Returns:
+            3 événements classés localement, ou None s'il faut demander au LLM
+            (mode "llm", ou mode "auto" avec une confiance trop faible)
+        """
+        mode = selection_mode or self.selection_mode
+        if mode == "llm":
+            return None
+        ranking = self.local_ranker.rank(prepared, conversation_context, current_objective, stage_id, script_id)
+        if mode == "auto" and not self.local_ranker.is_confident(ranking):
+            self.local_stats["escalated"] += 1
+            return None
+        self.local_stats["local"] += 1
+        return ranking.events
+    
+    @staticmethod
+    def _context_key(conversation_context: str, script_id: str, stage_id: str) -> tuple:
+        """Contexte d'une décision : script et étape, sinon le contexte complet"""
+        return (script_id, stage_id) if script_id or stage_id else (conversation_context,)
+    
+    @staticmethod
+    def _selection_key(prepared: FilterResult, context: tuple) -> tuple:
+        return ("select",) + context + (frozenset(c.normalized for c in prepared.clusters),)
+    
+    def _plan_selection(self, prepared: FilterResult, context: tuple) -> Tuple[Optional[List[Dict[str, str]]], FilterResult]:
+        """
+        Réutiliser les décisions et verdicts mémorisés
+        
+        Args:
+            prepared: Suggestions pré-filtrées
+            context: Clé du contexte (script, étape)
+        
+        Returns:
+            (événements mémorisés ou None, suggestions restant à soumettre au LLM)
+        """
+        events = self.decisions.get(self._selection_key(prepared, context))
+        if events is not None:
+            return events, prepared
+        
+        accepted, pending = [], []
+        for cluster in prepared.clusters:
+            verdict = self.verdicts.get(context + (cluster.normalized,))
+            if verdict is False:
+                continue  # Déjà rejetée dans ce contexte
+            pending.append(cluster)
+            if verdict:
+                accepted.append(verdict)
+        if len(accepted) >= 3:
+            # Assez de suggestions déjà retenues (les plus proposées d'abord)
+            return accepted[:3], prepared
+        return None, replace(prepared, clusters=pending)
+    
+    def _remember_selection(
+        self,
+        prepared: FilterResult,
+        pending: FilterResult,
+        content: str,
+        context: tuple
+    ) -> List[Dict[str, str]]:
+        """Finaliser la sélection et mémoriser la décision et les verdicts"""
+        events = self._finalize_selection(content)
+        self.decisions.put(self._selection_key(prepared, context), events)
+        self._remember_verdicts(pending.clusters, content, context)
+        return events
+    
+    def _remember_verdicts(self, clusters: List[SuggestionCluster], content: str, context: tuple) -> List[SuggestionCluster]:
+        """
+        Mémoriser le verdict de chaque suggestion désignée par la réponse
+        
+        Returns:
+            Suggestions retenues, dans l'ordre de la réponse
+        """
+        retained = []
+        for event in self._parse_response(content):
+            cluster = self._match_cluster(event['event'], clusters)
+            if cluster:
+                self.verdicts.put(context + (cluster.normalized,), event)
+                if cluster not in retained:
+                    retained.append(cluster)
+        for match in _REJECTED_LINE.finditer(content):
+            for name in match.group(1).split(";"):
+                cluster = self._match_cluster(name, clusters)
+                if cluster:
+                    self.verdicts.put(context + (cluster.normalized,), False)
+        return retained
+    
+    def _needs_tournament(self, pending: FilterResult) -> bool:
+        return 0 < self.shard_size < len(pending.clusters)
+    
+    def _shards(self, pending: FilterResult) -> List[FilterResult]:
+        """Lots d'au plus shard_size suggestions (répartition alternée : chaque lot a des suggestions très proposées)"""
+        count = math.ceil(len(pending.clusters) / self.shard_size)
+        shards = []
+        for i in range(count):
+            clusters = pending.clusters[i::count]
+            shards.append(replace(pending, clusters=clusters, received=sum(c.count for c in clusters), dropped=0))
+        return shards
+    
+    def _reduce_round(
+        self,
+        pending: FilterResult,
+        shards: List[FilterResult],
+        contents: List[Optional[str]],
+        context: tuple
+    ) -> FilterResult:
+        """
+        Gagnants d'un tour du tournoi
+        
+        Args:
+            pending: Suggestions du tour
+            shards: Lots du tour
+            contents: Réponse de chaque lot (None si l'appel a échoué)
+            context: Clé du contexte (script, étape)
+        
+        Returns:
+            Suggestions retenues par les lots, les plus proposées d'abord
+        """
+        winners = []
+        for shard, content in zip(shards, contents):
+            if content is None:
+                # Lot sans réponse : ses suggestions les plus proposées passent
+                self.tournament_stats["failed_shards"] += 1
+                winners.extend(shard.clusters[:self.shard_top_k])
+            else:
+                winners.extend(self._remember_verdicts(shard.clusters, content, context)[:self.shard_top_k])
+        self.tournament_stats["rounds"] += 1
+        self.tournament_stats["shards"] += len(shards)
+        winners.sort(key=lambda c: -c.count)
+        return replace(pending, clusters=winners)
+    
+    def _tournament_steps(
+        self,
+        pending: FilterResult,
+        conversation_context: str,
+        current_objective: str,
+        context: tuple
+    ) -> _Steps:
+        """
+        Modération par tournoi : lots modérés en parallèle (fan_out), top-k de
+        chaque lot, jusqu'à ce que les gagnants tiennent dans une seule finale
+        
+        Returns:
+            Suggestions qualifiées pour la sélection finale
+        """
+        self.tournament_stats["tournaments"] += 1
+        while self._needs_tournament(pending):
+            shards = self._shards(pending)
+            contents = yield [
+                (
+                    self.selection_llm,
+                    self._build_selection_messages(shard, conversation_context, current_objective, self.shard_top_k),
+                    "shard"
+                )
+                for shard in shards
+            ]
+            winners = self._reduce_round(pending, shards, contents, context)
+            if len(winners.clusters) >= len(pending.clusters):
+                # Aucun progrès (top-k trop grand pour la taille des lots)
+                return replace(winners, clusters=winners.clusters[:self.shard_size])
+            pending = winners
+        return pending
+    
+    @staticmethod
+    def _match_cluster(name: str, clusters: List[SuggestionCluster], threshold: float = 0.5) -> Optional[SuggestionCluster]:
+        """Suggestion désignée par un nom de la réponse (reformulé ou non)"""
+        normalized = normalize_suggestion(name.strip().strip("[]"))
+        if not normalized or normalized == "aucune":
+            return None
+        best = max(clusters, key=lambda c: similarity(normalized, c.normalized), default=None)
+        if best is None or similarity(normalized, best.normalized) < threshold:
+            return None
+        return best
+    
+    @contextmanager
+    def _guarded(self, messages: list, operation: str) -> Iterator[CallRecord]:
+        """
+        Appel LLM protégé par le disjoncteur (et mesuré)
+        
+        Une erreur de l'appel est enregistrée par le disjoncteur puis ignorée :
+        call.response reste alors à None.
+        """
+        start = time.monotonic()
+        try:
+            with track_call("moderator", self.model_name, operation, self.session_id, messages) as call:
+                yield call
+        except CassetteMissError:
+            # Rejeu strict : une réponse manquante doit faire échouer la session
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            print(f"❌ Error in ModeratorAgent: {e}")
+            return
+        self.breaker.record_success(time.monotonic() - start)
+    
+    def _guarded_invoke(self, llm: Any, messages: list, operation: str) -> Optional[str]:
+        """
+        Appel LLM protégé par le disjoncteur (et mesuré)
+        
+        Args:
+            llm: Modèle à appeler
+            messages: Prompt
+            operation: Type d'appel pour les mesures ("select", "shard", "generate")
+        
+        Returns:
+            Texte de la réponse, ou None si le disjoncteur est ouvert ou l'appel en échec
+        """
+        if not self.breaker.allow():
+            return None
+        with self._guarded(messages, operation) as call:
+            call.response = llm.invoke(messages)
+        return call.response.content if call.response is not None else None
+    
+    async def _aguarded_invoke(self, llm: Any, messages: list, operation: str) -> Optional[str]:
+        """Version asynchrone de _guarded_invoke"""
+        if not self.breaker.allow():
+            return None
+        with self._guarded(messages, operation) as call:
+            call.response = await llm.ainvoke(messages)
+        return call.response.content if call.response is not None else None
+    
+    def _degraded_events(self) -> List[Dict[str, str]]:
+        """3 événements tirés dans DEFAULT_EVENTS (pondérés, en évitant les derniers proposés)"""
+        events = pick_default_events(3, exclude=self._recent_fallback_events)
+        self._recent_fallback_events.extend(e['event'] for e in events)
+        return events
+    
+    def get_prefilter_stats(self) -> Dict[str, int]:
+        """Compteurs du pré-filtrage local (reçues, bloquées, groupes, envoyées, écartées)"""
+        return self.suggestion_filter.get_stats()
+    
+    def get_local_selection_stats(self) -> Dict[str, Any]:
+        """Sélections faites localement et renvois au LLM (confiance faible)"""
+        return {"mode": self.selection_mode, **self.local_stats}
+    
+    def get_tournament_stats(self) -> Dict[str, Any]:
+        """Tournois, tours et lots modérés (lots en échec compris)"""
+        return {"shard_size": self.shard_size, "fan_out": self.fan_out, **self.tournament_stats}
+    
+    def get_decision_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Succès et échecs des décisions et verdicts mémorisés"""
+        return {"decisions": self.decisions.get_stats(), "verdicts": self.verdicts.get_stats()}
+    
+    def _format_suggestions(self, suggestions: List[str], counts: Optional[List[int]] = None) -> str:
+        """Formate les suggestions pour le prompt (avec le nombre de spectateurs si > 1)"""
+        counts = counts or [1] * len(suggestions)
+        return "\n".join([f"- {s} (×{n})" if n > 1 else f"- {s}" for s, n in zip(suggestions, counts)])
     
     def _parse_response(self, response: str) -> List[Dict[str, str]]:
         """
@@ -194,16 +672,10 @@ Si moins de 3 suggestions sont appropriées, propose des événements pertinents
             }
         ]
     
-    def generate_fallback_events(self, conversation_context: str) -> List[Dict[str, str]]:
-        """
-        Génère des événements contextuels quand l'audience ne propose rien
+    def _build_fallback_messages(self, conversation_context: str) -> list:
+        """Construit les messages du prompt de génération d'événements"""
+        from langchain_core.messages import HumanMessage, SystemMessage
         
-        Args:
-            conversation_context: Contexte de la conversation
-            
-        Returns:
-            3 événements générés par le LLM
-        """
         prompt = f"""CONTEXTE:
 {conversation_context}
 
@@ -216,15 +688,69 @@ Format de réponse:
 3. [Nom de l'événement] - Description de l'impact
 """
         
-        messages = [
+        return [
             SystemMessage(content=self.system_prompt),
             HumanMessage(content=prompt)
         ]
+    
+    def _finalize_fallback(self, response: str) -> List[Dict[str, str]]:
+        """Parse les événements générés (événements par défaut si rien d'exploitable)"""
+        events = self._parse_response(response)
+        return events[:3] if events else self._get_default_events()
+    
+    def generate_fallback_events(
+        self,
+        conversation_context: str,
+        script_id: str = "",
+        stage_id: str = ""
+    ) -> List[Dict[str, str]]:
+        """
+        Génère des événements contextuels quand l'audience ne propose rien
         
-        response = self.llm.invoke(messages)
-        events = self._parse_response(response.content)
+        Args:
+            conversation_context: Contexte de la conversation
+            script_id: Script en cours (clé des décisions mémorisées, priors du classement local)
+            stage_id: Étape en cours (clé des décisions mémorisées, priors du classement local)
+            
+        Returns:
+            3 événements générés par le LLM
+        """
+        return self._run_steps(self._fallback_steps(conversation_context, script_id, stage_id))
+    
+    async def agenerate_fallback_events(
+        self,
+        conversation_context: str,
+        script_id: str = "",
+        stage_id: str = ""
+    ) -> List[Dict[str, str]]:
+        """
+        Version asynchrone de generate_fallback_events
         
-        return events[:3] if events else self._get_default_events()
+        Args:
+            conversation_context: Contexte de la conversation
+            script_id: Script en cours (clé des décisions mémorisées, priors du classement local)
+            stage_id: Étape en cours (clé des décisions mémorisées, priors du classement local)
+            
+        Returns:
+            3 événements générés par le LLM
+        """
+        return await self._arun_steps(self._fallback_steps(conversation_context, script_id, stage_id))
+    
+    def _fallback_steps(self, conversation_context: str, script_id: str, stage_id: str) -> _Steps:
+        """Étapes de generate_fallback_events, communes aux versions synchrone et asynchrone"""
+        events = self._local_selection(None, conversation_context, "", script_id, stage_id)
+        if events is not None:
+            return events
+        key = ("generate",) + self._context_key(conversation_context, script_id, stage_id)
+        events = self.decisions.get(key)
+        if events is not None:
+            return events
+        content, = yield [(self.fallback_llm, self._build_fallback_messages(conversation_context), "generate")]
+        if content is None:
+            return self._degraded_events()
+        events = self._finalize_fallback(content)
+        self.decisions.put(key, events)
+        return events
 
 
 def create_moderator_agent(api_key: str, model: str = "gpt-4-turbo-preview") -> ModeratorAgent:
@@ -0,0 +1,137 @@
+"""
+Assemblage incrémental du prompt de la victime
+
+Disposition des messages envoyés au LLM :
+    [système fixe] [résumé] [historique scammeur/Jeanne ...] [message du tour + consignes]
+
+Le préfixe (système + résumé + historique) ne change pas d'un tour à l'autre :
+il est seulement prolongé par les nouveaux échanges, ce qui le rend
+réutilisable par le cache de contexte du fournisseur. Les messages déjà
+convertis sont gardés et seuls les nouveaux sont ajoutés ; le préfixe n'est
+reconstruit que lorsque la mémoire résume ou retire d'anciens messages.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from .memory import RollingMemory, estimate_tokens
+
+
+class PromptAssembler:
+    """Prompt à préfixe stable construit au-dessus d'une RollingMemory"""
+
+    def __init__(self, system_prompt: str, memory: RollingMemory, victim_role: str = "Jeanne"):
+        """
+        Args:
+            system_prompt: Prompt système fixe (identique à chaque tour)
+            memory: Mémoire de la conversation
+            victim_role: Rôle des messages de la victime dans la mémoire
+        """
+        self.memory = memory
+        self.victim_role = victim_role
+        self._system = SystemMessage(content=system_prompt)
+        self._system_tokens = estimate_tokens(system_prompt)
+        self.reset_stats()
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        """Oublier le préfixe : il sera reconstruit au prochain tour"""
+        self._version: Optional[int] = None
+        self._prefix: List[Any] = [self._system]
+        self._prefix_tokens = self._system_tokens
+        self._converted = 0
+        self._last_prefix_len = 0
+        self._last_prefix_tokens = 0
+
+    def reset_stats(self) -> None:
+        """Remettre à zéro les statistiques de cache"""
+        self.requests = 0
+        self.prefix_hits = 0
+        self.prompt_tokens = 0
+        self.reused_tokens = 0
+        self.provider_cached_tokens = 0
+
+    def _sync_prefix(self) -> bool:
+        """
+        Mettre le préfixe à jour avec la mémoire
+
+        Returns:
+            True si le préfixe précédent a été prolongé, False s'il a été reconstruit
+        """
+        version = self.memory.prefix_version
+        extended = version == self._version
+        if not extended:
+            self._prefix = [self._system]
+            self._prefix_tokens = self._system_tokens
+            self._converted = 0
+            summary = self.memory.summary_text()
+            if summary:
+                self._append(HumanMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+            self._version = version
+
+        for message in self.memory.messages_since(self._converted):
+            if message['role'] == self.victim_role:
+                self._append(AIMessage(content=message['content']))
+            else:
+                self._append(HumanMessage(content=message['content']))
+            self._converted += 1
+        return extended
+
+    def _append(self, message: Any) -> None:
+        self._prefix.append(message)
+        self._prefix_tokens += estimate_tokens(message.content)
+
+    def build(self, scammer_input: str, instructions: str) -> List[Any]:
+        """
+        Construire les messages du tour
+
+        Args:
+            scammer_input: Ce que l'arnaqueur vient de dire
+            instructions: Consignes variables du tour (placées à la fin)
+
+        Returns:
+            Liste de messages pour llm.invoke / ainvoke / stream
+        """
+        extended = self._sync_prefix()
+        turn = HumanMessage(content=f"{scammer_input}\n\n{instructions}")
+
+        # Part du prompt identique au tour précédent (préfixe du fournisseur)
+        if extended and self._last_prefix_len:
+            reused = self._last_prefix_tokens
+        else:
+            reused = self._system_tokens if self.requests else 0
+        self.requests += 1
+        self.prefix_hits += bool(extended and self._last_prefix_len)
+        self.prompt_tokens += self._prefix_tokens + estimate_tokens(turn.content)
+        self.reused_tokens += reused
+        self._last_prefix_len = len(self._prefix)
+        self._last_prefix_tokens = self._prefix_tokens
+
+        return self._prefix + [turn]
+
+    def record_usage(self, response: Any) -> None:
+        """Ajouter les tokens servis depuis le cache, quand le fournisseur les rapporte"""
+        usage = getattr(response, "usage_metadata", None) or {}
+        cached = (usage.get("input_token_details") or {}).get("cache_read")
+        if cached is None:
+            metadata = (getattr(response, "response_metadata", None) or {}).get("usage_metadata") or {}
+            cached = metadata.get("cached_content_token_count")
+        if cached:
+            self.provider_cached_tokens += int(cached)
+
+    def reset(self) -> None:
+        """Nouvelle conversation"""
+        self._invalidate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de réutilisation du préfixe"""
+        return {
+            "requests": self.requests,
+            "prefix_hits": self.prefix_hits,
+            "prefix_hit_rate": self.prefix_hits / max(self.requests - 1, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "reused_tokens": self.reused_tokens,
+            "reused_token_rate": self.reused_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            "provider_cached_tokens": self.provider_cached_tokens,
+        }
@@ -0,0 +1,326 @@
+"""
+Pré-filtrage local des suggestions de l'audience avant le modérateur
+
+Avec une grande audience, filter_and_select recevait des milliers de lignes
+quasi identiques ("le chien aboie", "Le chien se met à aboyer comme un fou").
+SuggestionFilter les traite sans appel LLM :
+1. normalisation (minuscules, sans accents ni ponctuation) ;
+2. rejet des suggestions bloquées par les règles du prompt du modérateur
+   (violence, vulgarité, sexe, catastrophes, police, fin brutale, fantaisie,
+   technologie) avec une seule regex compilée ;
+3. regroupement des quasi-doublons : racines françaises légères, signature
+   MinHash et bandes LSH, similarité de Jaccard estimée >= seuil ;
+4. un représentant par groupe, pondéré par la taille du groupe, dans la limite
+   d'un budget de tokens : le prompt garde la même taille quelle que soit
+   l'audience.
+"""
+
+import operator
+import random
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from ..config.llm_config import (
+    MODERATOR_DEDUP_THRESHOLD,
+    MODERATOR_MAX_SUGGESTIONS,
+    MODERATOR_SUGGESTION_TOKENS,
+)
+
+# Règles de rejet du prompt du modérateur : nom -> motifs (texte normalisé, sans accents)
+BLOCKLIST_RULES = {
+    "violence": [
+        r"tue[rs]?", r"tuee?s?", r"meurtre\w*", r"assassin\w*", r"egorg\w*", r"massacr\w*",
+        r"tortur\w*", r"arme[s]?", r"fusil\w*", r"pistolet\w*", r"revolver\w*", r"couteau\w*",
+        r"poignard\w*", r"bombe\w*", r"explos\w*", r"grenade\w*", r"sang", r"sanglant\w*",
+        r"tabass\w*", r"etrangl\w*",
+    ],
+    "vulgarite": [
+        r"merde\w*", r"putain\w*", r"pute\w*", r"connard\w*", r"connasse\w*", r"con", r"cons",
+        r"salope\w*", r"salaud\w*", r"encule\w*", r"batard\w*", r"bordel", r"foutre", r"chier",
+        r"nique\w*", r"niquer",
+    ],
+    "sexuel": [
+        r"sexe?s?", r"sexuel\w*", r"sexy", r"porno\w*", r"erotique\w*", r"viol", r"viols",
+        r"violee?s?", r"nue?s?", r"a poil", r"strip ?tease\w*", r"orgasm\w*",
+    ],
+    "catastrophe": [
+        r"seisme\w*", r"tremblement de terre", r"tsunami\w*", r"ouragan\w*", r"tornade\w*",
+        r"inondation\w*", r"incendie\w*", r"avalanche\w*", r"eruption\w*", r"accident grave",
+        r"carambolage\w*",
+    ],
+    "autorites": [
+        r"polices?", r"policiere?s?", r"gendarmes?", r"gendarmerie", r"flics?", r"commissariats?",
+        r"swat", r"gign", r"raid", r"armee", r"militaires?", r"interpol",
+    ],
+    "fin_brutale": [
+        r"raccroch\w*", r"meur[st]", r"mourir", r"morte?s?", r"deced\w*", r"deces",
+        r"crise cardiaque", r"infarctus", r"coma", r"s evanoui\w*",
+    ],
+    "fantaisie": [
+        r"extra ?terrestre\w*", r"aliens?", r"ovni\w*", r"martien\w*", r"dragon\w*",
+        r"zombie\w*", r"licorne\w*", r"vampire\w*", r"fantome\w*", r"sorcier\w*",
+        r"magie", r"magiques?", r"baguette magique",
+        r"dinosaure\w*", r"teleport\w*", r"super ?heros?", r"voyage dans le temps",
+    ],
+    "technologie": [
+        r"hack\w*", r"pirater", r"piratee?s?", r"piratage\w*", r"pirates? informatiques?",
+        r"virus informatique", r"cyber\w*", r"ransomware\w*", r"malware\w*",
+    ],
+}
+
+# Expressions courantes retirées avant la liste de blocage ("mort de rire", "prise de sang")
+ALLOWED_EXPRESSIONS = [
+    r"(?:mort|morte|morts|mortes|meurt|meurs|mourir) de (?:rire|faim|soif|fatigue|peur|froid|chaud|envie|ennui)",
+    r"nature morte", r"temps mort", r"poids mort", r"angle mort", r"feuilles? mortes?",
+    r"prise de sang", r"sang froid", r"pieds? nus?", r"bras nus", r"tete nue",
+    r"film de pirates?", r"bateau pirate", r"arme fatale",
+]
+_ALLOWED = re.compile(rf"\b(?:{'|'.join(ALLOWED_EXPRESSIONS)})\b")
+
+# Une seule regex, un groupe nommé par règle (le groupe trouvé donne la raison du rejet)
+_BLOCKLIST = re.compile(
+    "|".join(
+        rf"(?P<{name}>\b(?:{'|'.join(patterns)})\b)"
+        for name, patterns in BLOCKLIST_RULES.items()
+    )
+)
+
+# Mots vides et verbes "de liaison" ignorés pour la similarité ("se met à aboyer")
+_STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette comme dans de des du elle en est et il ils je la le les leur
+lui ma mais me met mettre mon ne ni nous on ou par pas pour qu que qui sa se ses son sur ta
+te tes ton tout toute tres tu un une va vient vos votre vous y fait faire soudain soudainement
+alors encore puis coup tout d l s n j c m t qu jeanne
+""".split())
+
+# Suffixes retirés par la racinisation légère (du plus long au plus court)
+_SUFFIXES = (
+    "issements", "issement", "ements", "ement", "ations", "ation", "euses", "euse",
+    "ments", "ment", "eront", "erait", "aient", "ees", "ent", "ant", "eux",
+    "ait", "ee", "es", "er", "ez", "e", "s", "x",
+)
+
+NUM_PERMUTATIONS = 32
+BANDS = 16  # 16 bandes de 2 lignes : candidats dès une similarité d'environ 0,25
+BUCKET_CANDIDATES = 8  # Membres précédents d'un seau comparés à chaque suggestion
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def normalize_suggestion(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces simples"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def blocked_rule(normalized: str) -> Optional[str]:
+    """
+    Règle de rejet déclenchée par une suggestion normalisée
+
+    Returns:
+        Nom de la règle ("violence", "vulgarite"...) ou None si acceptable
+    """
+    match = _BLOCKLIST.search(_ALLOWED.sub(" ", normalized))
+    return match.lastgroup if match else None
+
+
+@lru_cache(maxsize=8192)
+def stem(word: str) -> str:
+    """Racine française légère (suffixes courants, alternance y/i des verbes en -yer)"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word.replace("y", "i")
+
+
+@lru_cache(maxsize=8192)
+def shingles(normalized: str) -> FrozenSet[str]:
+    """Racines des mots significatifs d'une suggestion normalisée"""
+    words = [w for w in normalized.split() if w not in _STOPWORDS]
+    return frozenset(stem(w) for w in words) or frozenset([normalized])
+
+
+def similarity(a: str, b: str) -> float:
+    """Similarité de Jaccard exacte entre deux suggestions normalisées"""
+    first, second = shingles(a), shingles(b)
+    return len(first & second) / len(first | second)
+
+
+def minhash(features: FrozenSet[str]) -> Tuple[int, ...]:
+    """Signature MinHash (NUM_PERMUTATIONS valeurs)"""
+    hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Similarité de Jaccard estimée à partir de deux signatures"""
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+@dataclass
+class SuggestionCluster:
+    """Groupe de suggestions quasi identiques"""
+    representative: str
+    count: int
+    variants: int
+    normalized: str = ""
+
+
+@dataclass
+class FilterResult:
+    """Résultat du pré-filtrage d'un lot de suggestions"""
+    clusters: List[SuggestionCluster]
+    received: int
+    blocked: Dict[str, int]
+    dropped: int
+
+    @property
+    def suggestions(self) -> List[str]:
+        return [c.representative for c in self.clusters]
+
+
+class SuggestionFilter:
+    """Normalisation, liste de blocage et regroupement des quasi-doublons"""
+
+    def __init__(
+        self,
+        threshold: float = MODERATOR_DEDUP_THRESHOLD,
+        token_budget: int = MODERATOR_SUGGESTION_TOKENS,
+        max_suggestions: int = MODERATOR_MAX_SUGGESTIONS,
+        max_chars: int = 120
+    ):
+        """
+        Args:
+            threshold: Similarité de Jaccard à partir de laquelle deux suggestions sont regroupées
+            token_budget: Tokens maximum des suggestions envoyées au modérateur
+            max_suggestions: Représentants maximum envoyés au modérateur
+            max_chars: Longueur maximum d'un représentant (tronqué au-delà)
+        """
+        self.threshold = threshold
+        self.token_budget = token_budget
+        self.max_suggestions = max_suggestions
+        self.max_chars = max_chars
+        self.stats = {"received": 0, "blocked": 0, "clusters": 0, "sent": 0, "dropped": 0}
+
+    def _cluster(self, texts: List[Tuple[str, str, int]]) -> List[List[int]]:
+        """
+        Regrouper les suggestions distinctes (union-find sur les candidats LSH)
+
+        Args:
+            texts: (normalisée, originale, occurrences) par suggestion distincte
+        """
+        parent = list(range(len(texts)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        signatures = [minhash(shingles(normalized)) for normalized, _, _ in texts]
+        rows = NUM_PERMUTATIONS // BANDS
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        for i, signature in enumerate(signatures):
+            for band in range(BANDS):
+                buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), []).append(i)
+
+        # Chaque suggestion est comparée aux membres précédents du seau (pas seulement
+        # au premier) : un quasi-doublon d'un membre ultérieur est aussi regroupé. Dans
+        # un seau géant, au premier et aux BUCKET_CANDIDATES précédents seulement.
+        compared = set()
+        for members in buckets.values():
+            for position in range(1, len(members)):
+                other = members[position]
+                window = members[max(1, position - BUCKET_CANDIDATES):position]
+                for earlier in [members[0]] + window:
+                    if (earlier, other) in compared:
+                        continue
+                    compared.add((earlier, other))
+                    root_a, root_b = find(earlier), find(other)
+                    if root_a != root_b and estimated_similarity(signatures[earlier], signatures[other]) >= self.threshold:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def _fit_budget(self, clusters: List[SuggestionCluster]) -> List[SuggestionCluster]:
+        """Groupes les plus proposés qui tiennent dans le budget de tokens"""
+        kept, tokens = [], 0
+        for cluster in clusters[:self.max_suggestions]:
+            cost = (len(cluster.representative) + 12 + 3) // 4  # "- ... (×N)" compris
+            if kept and tokens + cost > self.token_budget:
+                break
+            kept.append(cluster)
+            tokens += cost
+        return kept
+
+    def prepare(self, suggestions: List[str], limit: bool = True) -> FilterResult:
+        """
+        Filtrer et regrouper les suggestions de l'audience
+
+        Args:
+            suggestions: Suggestions brutes
+            limit: Appliquer le budget de tokens (False : tous les groupes,
+                pour la modération par tournoi)
+
+        Returns:
+            FilterResult dont les groupes sont triés par taille décroissante
+            et tiennent dans le budget de tokens
+        """
+        blocked: Dict[str, int] = {}
+        distinct: Dict[str, List] = {}  # normalisée -> [originale, occurrences]
+        for suggestion in suggestions:
+            normalized = normalize_suggestion(suggestion)
+            if not normalized:
+                continue
+            rule = blocked_rule(normalized)
+            if rule:
+                blocked[rule] = blocked.get(rule, 0) + 1
+                continue
+            entry = distinct.setdefault(normalized, [suggestion.strip(), 0])
+            entry[1] += 1
+
+        texts = [(normalized, original, count) for normalized, (original, count) in distinct.items()]
+        clusters = []
+        for members in self._cluster(texts):
+            # Représentant : la variante la plus proposée (la première en cas d'égalité)
+            best = max(members, key=lambda i: (texts[i][2], -i))
+            clusters.append(SuggestionCluster(
+                representative=texts[best][1][:self.max_chars],
+                count=sum(texts[i][2] for i in members),
+                variants=len(members),
+                normalized=texts[best][0]
+            ))
+        clusters.sort(key=lambda c: -c.count)
+
+        kept = self._fit_budget(clusters) if limit else clusters
+        result = FilterResult(
+            clusters=kept,
+            received=len(suggestions),
+            blocked=blocked,
+            dropped=len(clusters) - len(kept)
+        )
+        self.stats["received"] += result.received
+        self.stats["blocked"] += sum(blocked.values())
+        self.stats["clusters"] += len(clusters)
+        self.stats["sent"] += len(kept)
+        self.stats["dropped"] += result.dropped
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -2,30 +2,169 @@
 VictimAgent - Agent Jeanne Dubois avec mémoire et réponses intelligentes
 """
 
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
 from .base_agent import BaseAgent
-from .victim_prompt import get_victim_prompt
-from ..config.llm_config import VICTIM_TEMPERATURE
+from ..llm.rate_limiter import PRIORITY_VICTIM, PRIORITY_BACKGROUND
+from ..llm.hedging import hedged
+from ..llm.instrumentation import CallRecord
+from ..llm.circuit_breaker import get_breaker
+from ..llm.response_cache import CASSETTE_MODES, CassetteMissError
+from .canned_responses import CannedResponder
+from .memory import RollingMemory
+from .prompt_assembler import PromptAssembler
+from .victim_prompt import VICTIM_SYSTEM_PROMPT, VICTIM_MAX_SENTENCES, get_turn_instructions
+from ..config.llm_config import (
+    VICTIM_TEMPERATURE,
+    VICTIM_MEMORY_MODE,
+    VICTIM_MEMORY_TOKEN_BUDGET,
+    VICTIM_MEMORY_KEEP_LAST,
+    VICTIM_MEMORY_SUMMARIZER,
+    VICTIM_BATCHING,
+    LLM_CACHE_MODE
+)
+
+# Fin de phrase : ponctuation (éventuellement suivie de guillemets) puis un blanc.
+# "M.", "Mr.", "Mme.", "Dr." ne terminent pas une phrase.
+_SENTENCE_END = re.compile(r'(?<!\bM)(?<!\bMr)(?<!\bMme)(?<!\bDr)[.!?…]+["»)\]]*(?=\s)')
+
+
+def truncate_to_sentences(text: str, max_sentences: int) -> Tuple[str, bool]:
+    """
+    Couper un texte après max_sentences phrases complètes
+    
+    Returns:
+        (texte conservé, True si la limite est atteinte)
+    """
+    for count, match in enumerate(_SENTENCE_END.finditer(text), 1):
+        if count == max_sentences:
+            return text[:match.end()], True
+    return text, False
 
 
 class VictimAgent(BaseAgent):
     """Agent représentant Mme Jeanne Dubois"""
     
-    def __init__(self):
-        """Initialiser l'agent victime"""
-        super().__init__(name="Jeanne Dubois", temperature=VICTIM_TEMPERATURE)
+    metrics_label = "victim"
+    
+    def __init__(self, memory_mode: str = VICTIM_MEMORY_MODE, script: Optional[Dict[str, Any]] = None):
+        """
+        Initialiser l'agent victime
         
-        # Mémoire conversationnelle (simple liste de messages)
+        Args:
+            memory_mode: "full" (tout l'historique dans le prompt) ou "rolling"
+                (budget de tokens, anciens échanges résumés en arrière-plan)
+            script: Script courant (répliques de secours selon l'étape)
+        """
+        super().__init__(
+            name="Jeanne Dubois",
+            temperature=VICTIM_TEMPERATURE,
+            priority=PRIORITY_VICTIM,
+            batching=VICTIM_BATCHING
+        )
+        # Réponses non streamées : doublement des appels lents et nouvelles tentatives
+        self.respond_llm = hedged(self.llm, "victim")
+        # Backend dégradé : répliques locales sans attendre l'expiration des appels
+        self.breaker = get_breaker("victim")
+        self.canned = CannedResponder(script)
+        
+        # Journal complet de la conversation
         self.chat_history = []
         
+        # Mémoire envoyée au LLM (bornée en mode "rolling")
+        self.memory_mode = memory_mode
+        rolling = memory_mode == "rolling"
+        self.memory = RollingMemory(
+            token_budget=VICTIM_MEMORY_TOKEN_BUDGET if rolling else None,
+            keep_last=VICTIM_MEMORY_KEEP_LAST,
+            summarizer=self._summarize_with_llm if VICTIM_MEMORY_SUMMARIZER == "llm" else None,
+            # Cassette : résumés synchrones pour que les prompts soient identiques au rejeu
+            background=LLM_CACHE_MODE not in CASSETTE_MODES
+        )
+        
+        # Prompt à préfixe stable (système fixe + historique prolongé à chaque tour)
+        self.prompt = PromptAssembler(VICTIM_SYSTEM_PROMPT, self.memory)
+        
         # Objectif courant
         self.current_objective = "Listen politely and be confused"
         self.audience_constraint = ""
         
-    def _format_history(self) -> str:
-        """Formater l'historique de conversation"""
-        if not self.chat_history:
-            return ""
-        return "\n".join([f"{msg['role']}: {msg['content']}" for msg in self.chat_history])
+    def _summarize_with_llm(self, summary: str, messages: list) -> str:
+        """Résumer les anciens échanges avec le LLM (appelé hors du chemin critique)"""
+        lines = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        prompt = (
+            "Summarize this phone conversation between a scammer and Jeanne Dubois in at most "
+            "5 short sentences. Keep what the scammer asked for, what Jeanne refused or invented, "
+            "and any names or numbers mentioned.\n\n"
+            f"Previous summary:\n{summary or '(none)'}\n\n"
+            f"New messages:\n{lines}\n\nSummary:"
+        )
+        # Résumé en arrière-plan : passe après les réponses en attente
+        with self._track("summarize", prompt) as call:
+            call.response = self.llm.with_priority(PRIORITY_BACKGROUND).invoke(prompt)
+        return call.response.content.strip()
+    
+    def _set_objectives(self, objective: str = None, audience_constraint: str = ""):
+        """Mettre à jour l'objectif et la contrainte du public si fournis"""
+        if objective:
+            self.current_objective = objective
+        if audience_constraint:
+            self.audience_constraint = audience_constraint
+    
+    def _build_prompt(self, scammer_input: str) -> list:
+        """Construire les messages du tour (préfixe stable, consignes du tour à la fin)"""
+        instructions = get_turn_instructions(self.current_objective, self.audience_constraint)
+        return self.prompt.build(scammer_input, instructions)
+    
+    def _remember(self, scammer_input: str, response: str):
+        """Sauvegarder un échange dans le journal et la mémoire"""
+        self.chat_history.append({"role": "Scammer", "content": scammer_input})
+        self.chat_history.append({"role": "Jeanne", "content": response})
+        self.memory.add("Scammer", scammer_input)
+        self.memory.add("Jeanne", response)
+    
+    def _fallback(self, scammer_input: str) -> str:
+        """Réplique locale de secours (disjoncteur ouvert ou appel en échec)"""
+        response = self.canned.respond(self.current_objective)
+        self._remember(scammer_input, response)
+        return response
+    
+    @contextmanager
+    def _guarded(self, operation: str, prompt: Any) -> Iterator[CallRecord]:
+        """
+        Appel LLM protégé par le disjoncteur (et mesuré)
+        
+        Une erreur de l'appel est enregistrée par le disjoncteur puis ignorée :
+        call.response reste alors à None.
+        """
+        start = time.monotonic()
+        try:
+            with self._track(operation, prompt) as call:
+                yield call
+        except CassetteMissError:
+            # Rejeu strict : une réponse manquante doit faire échouer la session
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            print(f"❌ Error in VictimAgent: {e}")
+            return
+        self.breaker.record_success(time.monotonic() - start)
+    
+    def _finish(self, scammer_input: str, message: Any) -> str:
+        """Enregistrer la réponse du LLM (réplique de secours si l'appel a échoué)"""
+        if message is None:
+            return self._fallback(scammer_input)
+        self.prompt.record_usage(message)
+        response = message.content
+        
+        # Sauvegarder dans l'historique
+        self._remember(scammer_input, response)
+        
+        return response.strip()
     
     def respond(self, scammer_input: str, objective: str = None, audience_constraint: str = "") -> str:
         """
@@ -39,38 +178,118 @@ class VictimAgent(BaseAgent):
         Returns:
             str: Réponse de Jeanne
         """
-        # Mettre à jour les objectifs si fournis
-        if objective:
-            self.current_objective = objective
-        if audience_constraint:
-            self.audience_constraint = audience_constraint
+        self._set_objectives(objective, audience_constraint)
+        if not self.breaker.allow():
+            return self._fallback(scammer_input)
         
+        prompt = self._build_prompt(scammer_input)
+        # Générer la réponse avec le LLM
+        with self._guarded("respond", prompt) as call:
+            call.response = self.respond_llm.invoke(prompt)
+        return self._finish(scammer_input, call.response)
+
+    async def arespond(self, scammer_input: str, objective: str = None, audience_constraint: str = "") -> str:
+        """
+        Version asynchrone de respond (appel LLM non bloquant)
+
+        Args:
+            scammer_input: Ce que l'arnaqueur a dit
+            objective: Objectif tactique courant
+            audience_constraint: Contrainte du public (optionnel)
+
+        Returns:
+            str: Réponse de Jeanne
+        """
+        self._set_objectives(objective, audience_constraint)
+        if not self.breaker.allow():
+            return self._fallback(scammer_input)
+
+        prompt = self._build_prompt(scammer_input)
+        with self._guarded("respond", prompt) as call:
+            call.response = await self.respond_llm.ainvoke(prompt)
+        return self._finish(scammer_input, call.response)
+
+    def respond_stream(
+        self,
+        scammer_input: str,
+        objective: str = None,
+        audience_constraint: str = "",
+        max_sentences: int = VICTIM_MAX_SENTENCES
+    ) -> Iterator[str]:
+        """
+        Générer une réponse de Jeanne morceau par morceau
+        
+        La génération est interrompue dès que max_sentences phrases sont
+        complètes (consigne "2-4 sentences" du prompt) : les tokens suivants
+        ne sont ni attendus ni affichés.
+        
+        Args:
+            scammer_input: Ce que l'arnaqueur a dit
+            objective: Objectif tactique courant
+            audience_constraint: Contrainte du public (optionnel)
+            max_sentences: Nombre de phrases au-delà duquel on coupe
+        
+        Yields:
+            str: Morceaux de la réponse, dans l'ordre
+        """
+        self._set_objectives(objective, audience_constraint)
+        if not self.breaker.allow():
+            yield self._fallback(scammer_input)
+            return
+        
+        text = ""
+        failed = False
+        start = time.monotonic()
         try:
-            # Construire le prompt complet
-            history_text = self._format_history()
-            full_prompt = get_victim_prompt(self.current_objective, self.audience_constraint)
-            
-            if history_text:
-                full_prompt += f"\n\nChat History:\n{history_text}"
-            
-            full_prompt += f"\n\nScammer: {scammer_input}\n\nJeanne:"
-            
-            # Générer la réponse avec le LLM
-            response = self.llm.invoke(full_prompt).content
-            
-            # Sauvegarder dans l'historique
-            self.chat_history.append({"role": "Scammer", "content": scammer_input})
-            self.chat_history.append({"role": "Jeanne", "content": response})
-            
-            return response.strip()
+            prompt = self._build_prompt(scammer_input)
+            with self._track("stream", prompt) as call:
+                stream = self.llm.stream(prompt)
+                chunk = None
+                try:
+                    for chunk in stream:
+                        content = chunk.content if isinstance(chunk.content, str) else ""
+                        if not content:
+                            continue
+                        kept, limit_reached = truncate_to_sentences(text + content, max_sentences)
+                        delta, text = kept[len(text):], kept
+                        if delta:
+                            yield delta
+                        if limit_reached:
+                            break
+                finally:
+                    # Fermer le flux coupe la requête en cours côté LLM
+                    close = getattr(stream, "close", None)
+                    if close:
+                        close()
+                    if chunk is not None:
+                        self.prompt.record_usage(chunk)
+                    call.response, call.text = chunk, text
+        
+        except CassetteMissError:
+            failed = True
+            self.breaker.release()
+            raise
         
         except Exception as e:
+            failed = True
+            self.breaker.record_failure()
             print(f"❌ Error in VictimAgent: {e}")
-            return "Oh dear... I'm sorry, I got confused. Could you repeat that please?"
+            if not text:
+                text = self.canned.respond(self.current_objective)
+                yield text
+        
+        finally:
+            if not failed:
+                self.breaker.record_success(time.monotonic() - start)
+            # Même interrompue, la partie déjà affichée fait partie de la conversation
+            if text.strip():
+                self._remember(scammer_input, text.strip())
     
     def reset_memory(self):
         """Réinitialiser la mémoire (nouvelle conversation)"""
         self.chat_history = []
+        self.memory.reset()
+        self.prompt.reset()
         self.current_objective = "Listen politely and be confused"
         self.audience_constraint = ""
     
@@ -81,7 +300,12 @@ class VictimAgent(BaseAgent):
             "temperature": self.temperature,
             "current_objective": self.current_objective,
             "audience_constraint": self.audience_constraint,
-            "memory_length": len(self.chat_history)
+            "memory_length": len(self.chat_history),
+            "memory_mode": self.memory_mode,
+            "memory": self.memory.get_stats(),
+            "prompt_cache": self.prompt.get_stats(),
+            "circuit": self.breaker.get_stats(),
+            "canned_responses": self.canned.served
         }
     
     def process(self, input_text: str) -> str:
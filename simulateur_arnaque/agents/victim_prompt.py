@@ -6,7 +6,7 @@ Jeanne will respond in FRENCH as she is a French woman.
 This hybrid approach maximizes both LLM performance and authenticity.
 """
 
-VICTIM_BASE_PROMPT = """You are playing Mme Jeanne Dubois, a 78-year-old French woman.
+_VICTIM_PERSONA = """You are playing Mme Jeanne Dubois, a 78-year-old French woman.
 
 PERSONALITY TRAITS:
 - Elderly and slightly confused
@@ -32,13 +32,30 @@ CRITICAL RULES FOR RESISTANCE:
 3. If asked for dangerous information, STALL or CREATE DISTRACTIONS
 4. You can use sound effects if needed: [SOUND: DOG_BARKING], [SOUND: DOORBELL], etc.
 5. Be slow to follow technical instructions (can't find buttons, keyboard issues, etc.)
-6. Never sound like a robot - be authentically confused but earnest
+6. Never sound like a robot - be authentically confused but earnest"""
+
+_VICTIM_RESPONSE_RULE = "RESPOND IN FRENCH. Keep responses 2-4 sentences maximum. Be natural and authentic."
+
+# Prompt historique (objectif et contrainte au milieu), gardé pour get_victim_prompt
+VICTIM_BASE_PROMPT = _VICTIM_PERSONA + """
 
 CURRENT OBJECTIVE: {objective}
 
 AUDIENCE CONTEXT: {audience_constraint}
 
-RESPOND IN FRENCH. Keep responses 2-4 sentences maximum. Be natural and authentic."""
+""" + _VICTIM_RESPONSE_RULE
+
+# Prompt système fixe (identique à chaque tour, donc réutilisable par le cache
+# de contexte du fournisseur) : l'objectif et la contrainte du tour sont
+# ajoutés à la fin du dernier message, voir get_turn_instructions
+VICTIM_SYSTEM_PROMPT = _VICTIM_PERSONA + """
+
+Each scammer message ends with STAGE DIRECTIONS (your current objective and the audience context) for this turn only. Follow them, but never read them aloud.
+
+""" + _VICTIM_RESPONSE_RULE
+
+# Limite haute de la consigne "2-4 sentences" : le streaming s'arrête au-delà
+VICTIM_MAX_SENTENCES = 4
 
 
 def get_victim_prompt(objective: str = "Listen politely and be confused", 
@@ -63,6 +80,24 @@ def get_victim_prompt(objective: str = "Listen politely and be confused",
     )
 
 
+def get_turn_instructions(objective: str = "Listen politely and be confused",
+                          audience_constraint: str = "") -> str:
+    """
+    Construire les consignes variables du tour (placées en fin de prompt)
+    
+    Args:
+        objective: L'objectif courant de Jeanne
+        audience_constraint: Contrainte temporaire du public (optionnel)
+    
+    Returns:
+        str: Bloc de consignes à ajouter après le message du scammeur
+    """
+    instructions = f"STAGE DIRECTIONS:\nCURRENT OBJECTIVE: {objective}"
+    if audience_constraint:
+        instructions += f"\nAUDIENCE CONSTRAINT: {audience_constraint}"
+    return instructions
+
+
 # Exemples d'objectifs pour tester
 SAMPLE_OBJECTIVES = {
     "initial": "Feign belief in the virus story but ask silly questions about it",
@@ -5,9 +5,24 @@ Coordonne l'interaction entre l'interface audience et l'agent modérateur
 pour créer des événements perturbateurs cohérents
 """
 
-from typing import List, Dict, Optional
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, List, Dict, Iterator, Optional, Tuple
 from .agents.moderator import ModeratorAgent
 from .audience_interface import AudienceInterface
+from .config.llm_config import AUDIENCE_PREFETCH_TURNS
+
+
+class _Prefetch:
+    """Modération lancée en avance pour le prochain tour d'audience"""
+    
+    def __init__(self, script_id: str, stage_id: str, suggestions: List[str], future: Future):
+        self.script_id = script_id
+        self.stage_id = stage_id
+        self.suggestions = suggestions
+        self.future = future
 
 
 class AudienceEventManager:
@@ -19,7 +34,8 @@ class AudienceEventManager:
         self,
         moderator: ModeratorAgent,
         interface: AudienceInterface,
-        vote_frequency: int = 5
+        vote_frequency: int = 5,
+        prefetch_turns: int = AUDIENCE_PREFETCH_TURNS
     ):
         """
         Initialise le gestionnaire d'événements audience
@@ -28,13 +44,20 @@ class AudienceEventManager:
             moderator: Agent modérateur pour filtrer les suggestions
             interface: Interface pour interagir avec l'audience
             vote_frequency: Fréquence d'activation (tous les X tours)
+            prefetch_turns: Tours d'avance de la modération en arrière-plan (0 = désactivé)
         """
         self.moderator = moderator
         self.interface = interface
         self.vote_frequency = vote_frequency
+        self.prefetch_turns = prefetch_turns
         self.turn_counter = 0
         self.current_constraint: Optional[str] = None
         self.last_event: Optional[Dict[str, str]] = None
+        
+        # Modération en avance (un seul thread : une seule préparation à la fois)
+        self._prefetched: Optional[_Prefetch] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.prefetch_stats = {"started": 0, "used": 0, "stale": 0, "failed": 0, "waited_ms": 0.0}
     
     def should_trigger_audience(self) -> bool:
         """
@@ -46,12 +69,174 @@ class AudienceEventManager:
         self.turn_counter += 1
         return self.turn_counter % self.vote_frequency == 0
     
+    def should_prefetch(self) -> bool:
+        """
+        Détermine s'il faut lancer la modération du prochain tour d'audience
+        
+        À appeler après should_trigger_audience (même tour).
+        
+        Returns:
+            True si le vote a lieu dans prefetch_turns tours
+        """
+        if self.prefetch_turns <= 0:
+            return False
+        return (self.turn_counter + self.prefetch_turns) % self.vote_frequency == 0
+    
+    def prefetch(
+        self,
+        conversation_context: str,
+        current_objective: str = "",
+        collect_mode: str = "simulated",
+        script_id: str = "",
+        stage_id: str = ""
+    ) -> bool:
+        """
+        Collecte les suggestions et lance leur modération en arrière-plan
+        
+        Le tour d'audience suivant réutilise les options prêtes si le script et
+        l'étape n'ont pas changé entre-temps ; sinon (ou si la modération a
+        échoué) il modère à nouveau les mêmes suggestions.
+        
+        Args:
+            conversation_context: Contexte actuel de la conversation
+            current_objective: Objectif actuel de Mme Dubois
+            collect_mode: Mode de collecte des suggestions
+            script_id: Script en cours
+            stage_id: Étape en cours (re-vérifiée au tour du vote)
+            
+        Returns:
+            True si la modération a été lancée
+        """
+        if collect_mode == "console":
+            # Saisie interactive : les suggestions sont demandées au tour du vote
+            return False
+        self._discard_prefetch()
+        suggestions = self._collect_suggestions(collect_mode)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audience-prefetch")
+        future = self._executor.submit(
+            self._moderate, suggestions, conversation_context, current_objective, script_id, stage_id
+        )
+        self._prefetched = _Prefetch(script_id, stage_id, suggestions, future)
+        self.prefetch_stats["started"] += 1
+        return True
+    
+    def _discard_prefetch(self) -> None:
+        if self._prefetched is not None:
+            self._prefetched.future.cancel()
+            self._prefetched = None
+    
+    def _take_prefetched(self, script_id: str, stage_id: str) -> Tuple[Optional[Future], Optional[List[str]]]:
+        """
+        Préparation en avance pour ce tour
+        
+        Returns:
+            (modération lancée en avance si elle est toujours pertinente,
+            suggestions déjà collectées ou None s'il faut les collecter)
+        """
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None:
+            return None, None
+        if (prefetched.script_id, prefetched.stage_id) != (script_id, stage_id):
+            # L'étape a changé : les options ne correspondent plus à la conversation,
+            # les suggestions de l'audience restent valables
+            prefetched.future.cancel()
+            self.prefetch_stats["stale"] += 1
+            return None, prefetched.suggestions
+        self.prefetch_stats["used"] += 1
+        return prefetched.future, prefetched.suggestions
+    
+    @contextmanager
+    def _waiting_prefetch(self) -> Iterator[None]:
+        """
+        Attente de la modération lancée en avance (mesurée)
+        
+        Une erreur de la modération est comptée puis ignorée : le tour modère
+        alors à nouveau ses suggestions.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.prefetch_stats["failed"] += 1
+            print(f"⚠️ Modération en avance impossible ({e}) : modération immédiate")
+        finally:
+            self.prefetch_stats["waited_ms"] += (time.monotonic() - start) * 1000
+    
+    def _moderation(
+        self,
+        suggestions: List[str],
+        conversation_context: str,
+        current_objective: str,
+        script_id: str,
+        stage_id: str
+    ) -> Tuple[Tuple[Callable, Callable], Dict[str, Any]]:
+        """
+        Étape 2: appel du modérateur qui filtre et sélectionne 3 options
+        
+        Returns:
+            ((méthode synchrone, méthode asynchrone), arguments)
+        """
+        if suggestions:
+            return (self.moderator.filter_and_select, self.moderator.afilter_and_select), {
+                'suggestions': suggestions,
+                'conversation_context': conversation_context,
+                'current_objective': current_objective,
+                'script_id': script_id,
+                'stage_id': stage_id,
+            }
+        # Si pas de suggestions, générer des événements contextuels
+        return (self.moderator.generate_fallback_events, self.moderator.agenerate_fallback_events), {
+            'conversation_context': conversation_context,
+            'script_id': script_id,
+            'stage_id': stage_id,
+        }
+    
+    def _moderate(self, *args: Any) -> List[Dict[str, str]]:
+        """Étape 2: Le modérateur filtre et sélectionne 3 options (voir _moderation)"""
+        (moderate, _), kwargs = self._moderation(*args)
+        return moderate(**kwargs)
+    
+    async def _amoderate(self, *args: Any) -> List[Dict[str, str]]:
+        """Version asynchrone de _moderate"""
+        (_, amoderate), kwargs = self._moderation(*args)
+        return await amoderate(**kwargs)
+    
+    @staticmethod
+    async def _off_loop(io_mode: str, function: Callable, /, *args: Any, **kwargs: Any) -> Any:
+        """Saisie console (input()) déportée dans un thread, sinon appel direct"""
+        if io_mode == "console":
+            return await asyncio.to_thread(function, *args, **kwargs)
+        return function(*args, **kwargs)
+    
+    def _announce_round(self) -> None:
+        """Affiche l'annonce d'un tour d'audience"""
+        print("\n" + "🎬"*30)
+        print("PAUSE AUDIENCE - Événement perturbateur!")
+        print("🎬"*30 + "\n")
+    
+    def _collect_suggestions(self, collect_mode: str) -> List[str]:
+        """Étape 1: Collecter les suggestions"""
+        if collect_mode == "none":
+            return []
+        self.interface.mode = collect_mode
+        return self.interface.collect_suggestions(max_suggestions=10)
+    
+    def _apply_winning_event(self, winning_event: Dict[str, str]) -> Optional[str]:
+        """Étape 4: Convertir en contrainte pour l'agent victime"""
+        self.current_constraint = self.interface.get_event_constraint(winning_event)
+        self.last_event = winning_event
+        
+        return self.current_constraint
+    
     def process_audience_round(
         self,
         conversation_context: str,
         current_objective: str = "",
         collect_mode: str = "console",
-        vote_mode: str = "simulated"
+        vote_mode: str = "simulated",
+        script_id: str = "",
+        stage_id: str = ""
     ) -> Optional[str]:
         """
         Gère un tour complet d'interaction avec l'audience
@@ -61,32 +246,28 @@ class AudienceEventManager:
             current_objective: Objectif actuel de Mme Dubois
             collect_mode: Mode de collecte des suggestions
             vote_mode: Mode de vote
+            script_id: Script en cours (décisions mémorisées du modérateur)
+            stage_id: Étape en cours (décisions mémorisées du modérateur)
             
         Returns:
             Contrainte à injecter dans le prompt de la victime, ou None
         """
-        print("\n" + "🎬"*30)
-        print("PAUSE AUDIENCE - Événement perturbateur!")
-        print("🎬"*30 + "\n")
-        
-        # Étape 1: Collecter les suggestions
-        if collect_mode != "none":
-            self.interface.mode = collect_mode
-            suggestions = self.interface.collect_suggestions(max_suggestions=10)
-        else:
-            suggestions = []
+        self._announce_round()
         
-        # Étape 2: Le modérateur filtre et sélectionne 3 options
-        if suggestions:
-            selected_events = self.moderator.filter_and_select(
-                suggestions=suggestions,
-                conversation_context=conversation_context,
-                current_objective=current_objective
-            )
-        else:
-            # Si pas de suggestions, générer des événements contextuels
-            selected_events = self.moderator.generate_fallback_events(
-                conversation_context=conversation_context
+        prefetched, suggestions = self._take_prefetched(script_id, stage_id)
+        selected_events = None
+        if prefetched is not None:
+            # Étapes 1 et 2 déjà faites en arrière-plan
+            with self._waiting_prefetch():
+                selected_events = prefetched.result()
+        if selected_events is None:
+            # Étape 1: Collecter les suggestions (sauf si déjà collectées en avance)
+            if suggestions is None:
+                suggestions = self._collect_suggestions(collect_mode)
+            
+            # Étape 2: Le modérateur filtre et sélectionne 3 options
+            selected_events = self._moderate(
+                suggestions, conversation_context, current_objective, script_id, stage_id
             )
         
         # Étape 3: Vote de l'audience
@@ -95,11 +276,57 @@ class AudienceEventManager:
             mode=vote_mode
         )
         
-        # Étape 4: Convertir en contrainte pour l'agent victime
-        self.current_constraint = self.interface.get_event_constraint(winning_event)
-        self.last_event = winning_event
+        return self._apply_winning_event(winning_event)
+    
+    async def aprocess_audience_round(
+        self,
+        conversation_context: str,
+        current_objective: str = "",
+        collect_mode: str = "console",
+        vote_mode: str = "simulated",
+        script_id: str = "",
+        stage_id: str = ""
+    ) -> Optional[str]:
+        """
+        Version asynchrone de process_audience_round
         
-        return self.current_constraint
+        Les appels au modérateur ne bloquent pas la boucle d'événements ; les
+        saisies console (input()) sont déportées dans un thread.
+        
+        Args:
+            conversation_context: Contexte actuel de la conversation
+            current_objective: Objectif actuel de Mme Dubois
+            collect_mode: Mode de collecte des suggestions
+            vote_mode: Mode de vote
+            script_id: Script en cours (décisions mémorisées du modérateur)
+            stage_id: Étape en cours (décisions mémorisées du modérateur)
+            
+        Returns:
+            Contrainte à injecter dans le prompt de la victime, ou None
+        """
+        self._announce_round()
+        
+        prefetched, suggestions = self._take_prefetched(script_id, stage_id)
+        selected_events = None
+        if prefetched is not None:
+            with self._waiting_prefetch():
+                selected_events = await asyncio.wrap_future(prefetched)
+        if selected_events is None:
+            # Étape 1: Collecter les suggestions (sauf si déjà collectées en avance)
+            if suggestions is None:
+                suggestions = await self._off_loop(collect_mode, self._collect_suggestions, collect_mode)
+            
+            # Étape 2: Le modérateur filtre et sélectionne 3 options
+            selected_events = await self._amoderate(
+                suggestions, conversation_context, current_objective, script_id, stage_id
+            )
+        
+        # Étape 3: Vote de l'audience
+        winning_event = await self._off_loop(
+            vote_mode, self.interface.conduct_vote, events=selected_events, mode=vote_mode
+        )
+        
+        return self._apply_winning_event(winning_event)
     
     def get_current_constraint(self) -> Optional[str]:
         """
@@ -127,7 +354,12 @@ class AudienceEventManager:
             'total_turns': self.turn_counter,
             'total_suggestions': len(self.interface.suggestion_history),
             'total_events': len(self.interface.event_history),
-            'last_event': self.last_event
+            'last_event': self.last_event,
+            'prefilter': self.moderator.get_prefilter_stats(),
+            'moderator_cache': self.moderator.get_decision_cache_stats(),
+            'local_selection': self.moderator.get_local_selection_stats(),
+            'tournament': self.moderator.get_tournament_stats(),
+            'prefetch': dict(self.prefetch_stats)
         }
     
     def reset(self) -> None:
@@ -137,6 +369,16 @@ class AudienceEventManager:
         self.turn_counter = 0
         self.current_constraint = None
         self.last_event = None
+        self._discard_prefetch()
+    
+    def close(self) -> None:
+        """
+        Arrête le thread de modération en avance
+        """
+        self._discard_prefetch()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
 
 def create_audience_manager(
@@ -171,45 +413,56 @@ def create_audience_manager(
 
 
 # Exemples d'événements prédéfinis pour inspiration
+# 'weight' : fréquence relative dans les tirages de secours (agents.canned_responses)
 DEFAULT_EVENTS = [
     {
         'event': "Poupoune (le chien) aboie frénétiquement",
-        'description': "Le chien veut sortir ou réagit à quelqu'un dehors"
+        'description': "Le chien veut sortir ou réagit à quelqu'un dehors",
+        'weight': 3
     },
     {
         'event': "La sonnette de la porte retentit",
-        'description': "Facteur, livreur, ou voisin à la porte"
+        'description': "Facteur, livreur, ou voisin à la porte",
+        'weight': 3
     },
     {
         'event': "Jeanne a une quinte de toux",
-        'description': "Elle doit s'excuser et prendre un verre d'eau"
+        'description': "Elle doit s'excuser et prendre un verre d'eau",
+        'weight': 2
     },
     {
         'event': "Le téléphone portable sonne",
-        'description': "Un autre appel arrive, probablement sa famille"
+        'description': "Un autre appel arrive, probablement sa famille",
+        'weight': 2
     },
     {
         'event': "La casserole sur le feu déborde",
-        'description': "Jeanne doit aller éteindre le feu d'urgence"
+        'description': "Jeanne doit aller éteindre le feu d'urgence",
+        'weight': 2
     },
     {
         'event': "L'émission favorite de Jeanne commence",
-        'description': "Les Feux de l'Amour, elle est distraite"
+        'description': "Les Feux de l'Amour, elle est distraite",
+        'weight': 1
     },
     {
         'event': "Jeanne doit prendre ses médicaments",
-        'description': "C'est l'heure de sa médication quotidienne"
+        'description': "C'est l'heure de sa médication quotidienne",
+        'weight': 2
     },
     {
         'event': "Le chat renverse un vase",
-        'description': "Grand bruit et Jeanne doit nettoyer"
+        'description': "Grand bruit et Jeanne doit nettoyer",
+        'weight': 1
     },
     {
         'event': "La voisine frappe à la fenêtre",
-        'description': "Elle veut emprunter quelque chose"
+        'description': "Elle veut emprunter quelque chose",
+        'weight': 1
     },
     {
         'event': "Jeanne ne trouve plus ses lunettes",
-        'description': "Elle ne peut plus lire ce que demande l'arnaqueur"
+        'description': "Elle ne peut plus lire ce que demande l'arnaqueur",
+        'weight': 3
     }
 ]
@@ -14,6 +14,65 @@ GOOGLE_LOCATION = os.getenv("GOOGLE_LOCATION", "us-central1")
 GOOGLE_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "google-credentials.json")
 GOOGLE_MODEL = os.getenv("GOOGLE_MODEL", "gemini-2.0-flash-001")
 
+# ===== Backend LLM =====
+# "vertex" (Gemini via Vertex AI) ou "fake" (backend local déterministe, sans réseau)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "vertex").lower()
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", 0))
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed")  # "fixed", "lognormal" ou "heavy_tail"
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", 300))  # Délai avant le premier token (médiane)
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 60))  # 0 = génération instantanée
+
+# Limitation de débit partagée par tous les agents (0 = pas de limite)
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # Appels LLM simultanés
+LLM_QUOTA_RETRIES = int(os.getenv("LLM_QUOTA_RETRIES", 3))  # Nouvelles tentatives après une erreur de quota
+
+# Doublement des appels lents (réponse de la victime, sélection du modérateur)
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))  # Percentile des latences récentes avant doublement
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", 300))  # Jamais de doublement avant ce délai
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", 3))  # Tentatives en cas d'erreur transitoire (5xx, réseau)
+LLM_RETRY_BASE_DELAY_MS = float(os.getenv("LLM_RETRY_BASE_DELAY_MS", 200))  # Base du backoff exponentiel avec gigue
+
+# Disjoncteur par agent : réponses locales de secours quand le backend est dégradé
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", 3))  # Échecs consécutifs avant ouverture
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", 30))  # Délai avant l'appel de test
+LLM_LATENCY_SLO_MS = float(os.getenv("LLM_LATENCY_SLO_MS", 15000))  # Appel plus lent = échec (0 = pas de SLO)
+
+# Mesures des appels LLM (latence, tokens, coût)
+LLM_METRICS_PORT = int(os.getenv("LLM_METRICS_PORT", 0))  # Endpoint Prometheus local /metrics (0 = désactivé)
+LLM_METRICS_JSONL = os.getenv("LLM_METRICS_JSONL", "")  # Fichier JSONL, un appel par ligne ("" = désactivé)
+
+# Cache des réponses LLM : "off", "cache" (mémoire + disque), "record", "replay" ou "strict" (cassette)
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 256))  # Réponses gardées en mémoire
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")  # Niveau disque du mode "cache" ("" = mémoire seule)
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "cassettes/session.jsonl")  # Cassette des modes record/replay/strict
+
+# Micro-batching des réponses de la victime entre sessions concurrentes
+VICTIM_BATCHING = os.getenv("VICTIM_BATCHING", "false").lower() == "true"
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", 8))  # Requêtes maximum par batch
+LLM_BATCH_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", 20))  # Fenêtre de collecte (ms)
+
+# Pré-filtrage local des suggestions de l'audience avant le modérateur
+MODERATOR_DEDUP_THRESHOLD = float(os.getenv("MODERATOR_DEDUP_THRESHOLD", 0.5))  # Similarité de regroupement des quasi-doublons
+MODERATOR_SUGGESTION_TOKENS = int(os.getenv("MODERATOR_SUGGESTION_TOKENS", 400))  # Budget de tokens des suggestions envoyées
+MODERATOR_MAX_SUGGESTIONS = int(os.getenv("MODERATOR_MAX_SUGGESTIONS", 30))  # Suggestions distinctes envoyées au maximum
+
+# Mémoïsation des décisions du modérateur (partagée entre sessions)
+MODERATOR_CACHE_SIZE = int(os.getenv("MODERATOR_CACHE_SIZE", 512))  # Décisions et verdicts gardés (0 = désactivé)
+MODERATOR_CACHE_TTL_SECONDS = float(os.getenv("MODERATOR_CACHE_TTL_SECONDS", 3600))  # Durée de vie (0 = illimitée)
+
+# Sélection des événements : "llm", "local" (classement local, sans appel) ou "auto" (LLM si confiance faible)
+MODERATOR_SELECTION_MODE = os.getenv("MODERATOR_SELECTION_MODE", "llm").lower()
+MODERATOR_LOCAL_CONFIDENCE = float(os.getenv("MODERATOR_LOCAL_CONFIDENCE", 0.15))  # Confiance minimum du classement local
+
+# Modération par tournoi (map-reduce) des très grands ensembles de suggestions
+MODERATOR_SHARD_SIZE = int(os.getenv("MODERATOR_SHARD_SIZE", 0))  # Suggestions par lot (0 = un seul appel, budget de tokens)
+MODERATOR_SHARD_FAN_OUT = int(os.getenv("MODERATOR_SHARD_FAN_OUT", 4))  # Lots modérés en parallèle
+MODERATOR_SHARD_TOP_K = int(os.getenv("MODERATOR_SHARD_TOP_K", 3))  # Suggestions retenues par lot
+
 # ===== Configuration OpenAI (deprecated, gardé pour compatibilité) =====
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
@@ -23,14 +82,26 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
 VICTIM_TEMPERATURE = float(os.getenv("VICTIM_TEMPERATURE", 0.8))  # Haute = plus créatif/imprévisible
 DIRECTOR_TEMPERATURE = float(os.getenv("DIRECTOR_TEMPERATURE", 0.3))  # Basse = plus logique/déterministe
 
+# Mémoire de la victime : "full" (tout l'historique) ou "rolling" (budget de tokens + résumé)
+VICTIM_MEMORY_MODE = os.getenv("VICTIM_MEMORY_MODE", "full")
+VICTIM_MEMORY_TOKEN_BUDGET = int(os.getenv("VICTIM_MEMORY_TOKEN_BUDGET", 1500))  # Tokens max de l'historique (résumé compris)
+VICTIM_MEMORY_KEEP_LAST = int(os.getenv("VICTIM_MEMORY_KEEP_LAST", 4))  # Échanges toujours gardés mot pour mot
+VICTIM_MEMORY_SUMMARIZER = os.getenv("VICTIM_MEMORY_SUMMARIZER", "local")  # "llm" ou "local" (extractif, sans appel)
+VICTIM_STREAMING = os.getenv("VICTIM_STREAMING", "true").lower() == "true"  # Afficher la réponse au fil de la génération
+
 # ===== Paramètres de l'Application =====
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # ===== Paramètres du Simulateur =====
 AUDIENCE_VOTE_FREQUENCY = int(os.getenv("AUDIENCE_VOTE_FREQUENCY", 5))  # Vote tous les X tours
+AUDIENCE_PREFETCH_TURNS = int(os.getenv("AUDIENCE_PREFETCH_TURNS", 1))  # Modération lancée X tours avant le vote (0 = au tour du vote)
 MAX_CONVERSATION_TURNS = int(os.getenv("MAX_CONVERSATION_TURNS", 50))
+DIRECTOR_RISK_DECAY = float(os.getenv("DIRECTOR_RISK_DECAY", 1.0))  # 1.0 = le risque ne redescend jamais
+DIRECTOR_RISK_WINDOW = int(os.getenv("DIRECTOR_RISK_WINDOW", 0)) or None  # Fenêtre en messages (0 = toute la session)
 ENABLE_AUDIO_EFFECTS = os.getenv("ENABLE_AUDIO_EFFECTS", "true").lower() == "true"
+SCRIPT_HOT_RELOAD = os.getenv("SCRIPT_HOT_RELOAD", "true").lower() == "true"  # Recharger les scripts modifiés en cours de session
+SCRIPT_RELOAD_INTERVAL = float(os.getenv("SCRIPT_RELOAD_INTERVAL", 1.0))  # Intervalle de vérification (secondes)
 
 # ===== Chemins =====
 AUDIO_DIRECTORY = os.getenv("AUDIO_DIRECTORY", "simulateur_arnaque/audio")
@@ -0,0 +1,17 @@
+"""
+LLM Package - Accès aux modèles de chat
+
+Modules:
+- factory: Pool de modèles partagés selon le backend configuré (LLM_BACKEND)
+- fake_backend: Backend local déterministe à latence configurable
+- rate_limiter: Limiteur de débit partagé avec file de priorité
+- hedging: Doublement des appels lents et nouvelles tentatives avec backoff
+- circuit_breaker: Disjoncteur par agent (réponses locales quand le backend est dégradé)
+- instrumentation: Mesures des appels LLM (latence, tokens, coût) exportées localement
+- response_cache: Cache des réponses et cassettes d'enregistrement / rejeu
+- batching: Micro-batching des réponses de la victime entre sessions
+"""
+
+from .factory import create_chat_model, get_pool_stats, clear_pool
+
+__all__ = ["create_chat_model", "get_pool_stats", "clear_pool"]
@@ -0,0 +1,252 @@
+"""
+Micro-batching des appels de la victime entre sessions concurrentes
+
+Quand plusieurs sessions tournent, chaque VictimAgent.respond envoyait sa
+propre requête. MicroBatcher regroupe les prompts arrivés dans une courte
+fenêtre (LLM_BATCH_MAX_WAIT_MS, 10 à 30 ms) ou jusqu'à LLM_BATCH_MAX_SIZE,
+les envoie en un seul llm.batch (un seul passage dans la file du limiteur de
+débit) et rend chaque réponse à son appelant.
+
+Le batch tient une place de concurrence par requête envoyée en parallèle
+(voir RateLimitedChatModel.batch) : LLM_MAX_CONCURRENCY reste respecté et le
+débit reste borné par la concurrence autorisée. Avec le backend local
+(16 sessions, 2 appels simultanés, 200 ms par appel), le débit est d'environ
+10 req/s avec ou sans batching. Le gain est le nombre de passages dans la file
+(un par batch), utile avec un fournisseur dont le batch est un seul appel ;
+chaque requête attend au plus max_wait de plus. get_stats() donne la taille
+moyenne des batches, l'attente en file, la latence de bout en bout et le débit.
+
+Benchmark avec le backend local :
+    python -m simulateur_arnaque.llm.batching
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..config.llm_config import LLM_BATCH_MAX_SIZE, LLM_BATCH_MAX_WAIT_MS
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(percentile / 100 * len(ordered)))]
+
+
+class _Pending:
+    """Requête en attente de son batch"""
+
+    __slots__ = ("input", "future", "enqueued")
+
+    def __init__(self, input: Any):
+        self.input = input
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class MicroBatcher:
+    """Regroupe les requêtes d'une courte fenêtre en un seul appel batch"""
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = LLM_BATCH_MAX_SIZE,
+        max_wait: float = LLM_BATCH_MAX_WAIT_MS / 1000,
+        max_in_flight: int = 4
+    ):
+        """
+        Args:
+            model: Modèle exposant batch (en général soumis au limiteur)
+            max_batch_size: Requêtes maximum par batch
+            max_wait: Attente maximum de la plus ancienne requête avant envoi (secondes)
+            max_in_flight: Batches envoyés en parallèle
+        """
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue: List[_Pending] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-batch")
+        self._stats_lock = threading.Lock()
+        self._sizes: Counter = Counter()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._batch_seconds = 0.0
+        self._first_enqueued: Optional[float] = None
+        self._last_done = 0.0
+        self.errors = 0
+
+    def submit(self, input: Any) -> Future:
+        """Ajouter une requête au prochain batch"""
+        pending = _Pending(input)
+        with self._condition:
+            self._queue.append(pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return pending.future
+
+    def _run(self) -> None:
+        """Boucle de collecte : envoie un batch plein ou dont la fenêtre est écoulée"""
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                deadline = self._queue[0].enqueued + self.max_wait
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[_Pending]) -> None:
+        start = time.monotonic()
+        try:
+            results = self.model.batch([p.input for p in batch], return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(batch)
+        done = time.monotonic()
+
+        failed = 0
+        for pending, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                failed += 1
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+
+        with self._stats_lock:
+            self._sizes[len(batch)] += 1
+            self._batch_seconds += done - start
+            self.errors += failed
+            for pending in batch:
+                self._waits.append(start - pending.enqueued)
+                self._latencies.append(done - pending.enqueued)
+            first = min(p.enqueued for p in batch)
+            self._first_enqueued = first if self._first_enqueued is None else min(self._first_enqueued, first)
+            self._last_done = max(self._last_done, done)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compromis débit / latence du batching"""
+        with self._stats_lock:
+            batches = sum(self._sizes.values())
+            requests = sum(size * count for size, count in self._sizes.items())
+            waits, latencies = list(self._waits), list(self._latencies)
+            active = self._last_done - self._first_enqueued if self._first_enqueued is not None else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": requests,
+                "batches": batches,
+                "calls_saved": requests - batches,
+                "avg_batch_size": requests / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self._sizes.items())),
+                "avg_wait_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "avg_batch_call_ms": self._batch_seconds / batches * 1000 if batches else 0.0,
+                "p50_ms": _percentile(latencies, 50) * 1000,
+                "p95_ms": _percentile(latencies, 95) * 1000,
+                "requests_per_second": requests / active if active > 0 else 0.0,
+                "errors": self.errors,
+            }
+
+
+class BatchedChatModel:
+    """Modèle dont invoke / ainvoke passent par un MicroBatcher partagé"""
+
+    def __init__(self, model: Any, batcher: MicroBatcher):
+        """
+        Args:
+            model: Modèle sous-jacent (stream, with_priority... lui sont délégués)
+            batcher: Batcher partagé entre sessions
+        """
+        self.model = model
+        self.batcher = batcher
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def with_priority(self, priority: int) -> Any:
+        """Autre priorité (résumés...) : appels directs, sans batching"""
+        return self.model.with_priority(priority)
+
+    def invoke(self, input: Any, *args, **kwargs) -> Any:
+        if args or kwargs:
+            # Options propres à l'appel (config, stop...) : appel direct, sans batching
+            return self.model.invoke(input, *args, **kwargs)
+        return self.batcher.submit(input).result()
+
+    async def ainvoke(self, input: Any, *args, **kwargs) -> Any:
+        if args or kwargs:
+            return await self.model.ainvoke(input, *args, **kwargs)
+        return await asyncio.wrap_future(self.batcher.submit(input))
+
+
+_batchers: Dict[Tuple[int, Any], Tuple[str, MicroBatcher]] = {}
+_batchers_lock = threading.Lock()
+
+
+def batched(model: Any, label: str) -> BatchedChatModel:
+    """
+    Faire passer invoke / ainvoke par le batcher partagé du même client
+
+    Toutes les sessions utilisant le même client (voir llm.factory) et la même
+    priorité partagent un batcher.
+
+    Args:
+        model: Modèle soumis au limiteur (RateLimitedChatModel)
+        label: Nom du batcher dans les statistiques ("victim")
+    """
+    key = (id(getattr(model, "model", model)), getattr(model, "priority", None))
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = (label, MicroBatcher(model))
+        return BatchedChatModel(model, _batchers[key][1])
+
+
+def get_batching_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistiques de tous les batchers"""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return {label: batcher.get_stats() for label, batcher in batchers}
+
+
+def _benchmark(sessions: int = 16, turns: int = 4, concurrency: int = 2) -> None:
+    """Comparer débit et latence selon la taille et la fenêtre des batches"""
+    from .fake_backend import FakeChatModel
+    from .rate_limiter import RateLimiter, RateLimitedChatModel
+
+    print(f"{sessions} sessions x {turns} tours, {concurrency} appels LLM simultanés au plus")
+    print(f"{'batch':>5} {'fenêtre':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'taille moy.':>11}")
+    for size, wait_ms in ((1, 0), (4, 10), (8, 20), (16, 30)):
+        model = RateLimitedChatModel(
+            FakeChatModel(latency_ms=200, tokens_per_second=0), RateLimiter(max_concurrency=concurrency)
+        )
+        batcher = MicroBatcher(model, max_batch_size=size, max_wait=wait_ms / 1000)
+
+        def session(i: int) -> None:
+            for turn in range(turns):
+                batcher.submit(f"Session {i}, tour {turn} : donnez-moi votre code").result()
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = batcher.get_stats()
+        print(
+            f"{size:>5} {wait_ms:>6} ms {stats['requests_per_second']:>8.1f} "
+            f"{stats['p50_ms']:>8.0f} {stats['p95_ms']:>8.0f} {stats['avg_batch_size']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    _benchmark()
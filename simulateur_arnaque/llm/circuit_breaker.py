@@ -0,0 +1,134 @@
+"""
+Disjoncteur (circuit breaker) autour des appels LLM d'un agent
+
+Quand le backend est dégradé, chaque tour attendait l'expiration des appels.
+Le disjoncteur compte les échecs consécutifs (erreurs ou appels plus lents que
+le SLO) :
+- fermé : les appels passent normalement ;
+- ouvert (après `failure_threshold` échecs) : les appels sont refusés et
+  l'agent sert immédiatement une réponse locale de secours ;
+- semi-ouvert (après `reset_timeout` secondes) : un seul appel de test passe ;
+  s'il réussit le disjoncteur se referme, sinon il se rouvre.
+
+Les disjoncteurs sont partagés par nom ("victim", "moderator") dans tout le
+processus : une panne du backend concerne toutes les sessions.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from ..config.llm_config import LLM_CIRCUIT_FAILURES, LLM_CIRCUIT_RESET_SECONDS, LLM_LATENCY_SLO_MS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Disjoncteur à trois états (fermé, ouvert, semi-ouvert)"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = LLM_CIRCUIT_FAILURES,
+        reset_timeout: float = LLM_CIRCUIT_RESET_SECONDS,
+        slo_seconds: float = LLM_LATENCY_SLO_MS / 1000
+    ):
+        """
+        Args:
+            name: Nom de l'agent protégé
+            failure_threshold: Échecs consécutifs avant ouverture
+            reset_timeout: Secondes d'ouverture avant l'appel de test
+            slo_seconds: Latence au-delà de laquelle un appel réussi compte comme échec (0 = pas de SLO)
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.slo_seconds = slo_seconds
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {"calls": 0, "failures": 0, "slo_violations": 0, "rejected": 0, "opened": 0}
+
+    def allow(self) -> bool:
+        """
+        Un appel LLM peut-il partir ?
+
+        Returns:
+            False si le disjoncteur est ouvert (servir la réponse de secours)
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probe_in_flight):
+                self._probe_in_flight = self.state == HALF_OPEN
+                self.stats["calls"] += 1
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self, seconds: float) -> None:
+        """Appel terminé (un appel trop lent compte comme un échec)"""
+        if self.slo_seconds and seconds > self.slo_seconds:
+            with self._lock:
+                self.stats["slo_violations"] += 1
+            self._fail()
+            return
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Appel en erreur"""
+        with self._lock:
+            self.stats["failures"] += 1
+        self._fail()
+
+    def release(self) -> None:
+        """Appel abandonné sans verdict sur le backend (réponse absente de la cassette) : libère l'appel de test"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _fail(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Refermer le disjoncteur"""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.consecutive_failures, **self.stats}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Disjoncteur partagé d'un agent ("victim", "moderator"...)"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """État de tous les disjoncteurs"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.get_stats() for breaker in breakers}
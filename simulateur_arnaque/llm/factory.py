@@ -0,0 +1,148 @@
+"""
+Création des modèles de chat selon le backend configuré (LLM_BACKEND)
+
+- "vertex" : ChatVertexAI (Gemini), credentials du service account si présents
+- "fake" : FakeChatModel local et déterministe (voir fake_backend)
+
+Les dépendances Google ne sont importées que pour le backend "vertex".
+
+Les clients sont partagés dans tout le processus : un seul client (et donc un
+seul pool de connexions HTTP) par combinaison backend/modèle/projet/région/
+température, réutilisé par tous les agents et toutes les sessions. Le fichier
+de credentials n'est lu qu'une fois.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from ..config.llm_config import (
+    LLM_BACKEND,
+    GOOGLE_PROJECT_ID,
+    GOOGLE_LOCATION,
+    GOOGLE_MODEL,
+    GOOGLE_CREDENTIALS,
+    FAKE_LLM_SEED,
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_LATENCY_MS,
+    FAKE_LLM_TOKENS_PER_SECOND
+)
+
+BACKENDS = ("vertex", "fake")
+
+PoolKey = Tuple[str, str, str, str, float]
+
+# Pool des clients partagés
+_pool: Dict[PoolKey, Any] = {}
+_pool_lock = threading.Lock()
+_pool_stats = {"created": 0, "reused": 0}
+
+
+@lru_cache(maxsize=None)
+def _load_credentials(credentials_file: str):
+    """Charger les credentials explicitement avec le bon scope (None si absents, lus une seule fois)"""
+    if not os.path.exists(credentials_file):
+        return None
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(
+        credentials_file,
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+
+
+def _build_chat_model(backend: str, model: str, project: str, location: str, temperature: float) -> Any:
+    """Créer un nouveau client (sans passer par le pool)"""
+    if backend == "fake":
+        from .fake_backend import FakeChatModel
+        return FakeChatModel(
+            seed=FAKE_LLM_SEED,
+            latency=FAKE_LLM_LATENCY,
+            latency_ms=FAKE_LLM_LATENCY_MS,
+            tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+            temperature=temperature
+        )
+
+    if backend == "vertex":
+        from langchain_google_vertexai import ChatVertexAI
+        return ChatVertexAI(
+            project=project,
+            location=location,
+            model_name=model,
+            temperature=temperature,
+            credentials=_load_credentials(GOOGLE_CREDENTIALS)
+        )
+
+    raise ValueError(f"Backend LLM inconnu: {backend} (attendu: {', '.join(BACKENDS)})")
+
+
+def create_chat_model(
+    temperature: float = 0.5,
+    model: Optional[str] = None,
+    project: Optional[str] = None,
+    location: Optional[str] = None,
+    backend: Optional[str] = None,
+    shared: bool = True
+) -> Any:
+    """
+    Obtenir un modèle de chat pour un agent
+
+    Args:
+        temperature: Température du LLM
+        model: Nom du modèle (GOOGLE_MODEL par défaut)
+        project: Projet Google Cloud (GOOGLE_PROJECT_ID par défaut)
+        location: Région Google Cloud (GOOGLE_LOCATION par défaut)
+        backend: "vertex" ou "fake" (LLM_BACKEND par défaut)
+        shared: Réutiliser le client du pool (False = client dédié)
+
+    Returns:
+        Modèle exposant invoke / ainvoke / stream / batch
+    """
+    key = (
+        (backend or LLM_BACKEND).lower(),
+        model or GOOGLE_MODEL,
+        project or GOOGLE_PROJECT_ID,
+        location or GOOGLE_LOCATION,
+        float(temperature)
+    )
+    if not shared:
+        return _build_chat_model(*key)
+
+    with _pool_lock:
+        client = _pool.get(key)
+        if client is not None:
+            _pool_stats["reused"] += 1
+            return client
+        # Création sous le verrou : deux sessions simultanées ne créent pas deux clients
+        client = _build_chat_model(*key)
+        _pool[key] = client
+        _pool_stats["created"] += 1
+        return client
+
+
+def model_label(model: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """Nom du modèle effectivement appelé (pour les mesures)"""
+    backend = (backend or LLM_BACKEND).lower()
+    return (model or GOOGLE_MODEL) if backend == "vertex" else backend
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Statistiques du pool de clients"""
+    with _pool_lock:
+        requests = _pool_stats["created"] + _pool_stats["reused"]
+        return {
+            "size": len(_pool),
+            "created": _pool_stats["created"],
+            "reused": _pool_stats["reused"],
+            "reuse_rate": _pool_stats["reused"] / requests if requests else 0.0,
+            "clients": [f"{b}:{m}@{l} (t={t})" for b, m, _, l, t in _pool],
+            "credentials_loads": _load_credentials.cache_info().misses,
+        }
+
+
+def clear_pool() -> None:
+    """Vider le pool et oublier les credentials (tests, rotation des clés)"""
+    with _pool_lock:
+        _pool.clear()
+        _pool_stats.update(created=0, reused=0)
+    _load_credentials.cache_clear()
@@ -0,0 +1,293 @@
+"""
+Backend LLM local et déterministe (sans réseau ni credentials)
+
+FakeChatModel imite l'interface utilisée par les agents (invoke, ainvoke,
+stream, astream, batch) et répond selon le rôle détecté dans le prompt :
+- victime : 2-3 phrases de Jeanne en français, selon les mots-clés du scammeur
+- modérateur : 3 lignes "1. [événement] - description"
+- résumé : quelques phrases courtes
+
+Pour une même graine, un même prompt donne toujours la même réponse. La
+latence (délai avant le premier token + débit de génération) suit un profil
+configurable pour mesurer débit et latences extrêmes de façon reproductible.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+LATENCY_PROFILES = ("fixed", "lognormal", "heavy_tail")
+
+
+class LatencyProfile:
+    """Distribution du délai avant le premier token"""
+
+    def __init__(
+        self,
+        kind: str = "fixed",
+        median_ms: float = 300,
+        sigma: float = 0.5,
+        tail_alpha: float = 1.5,
+        max_factor: float = 50.0
+    ):
+        """
+        Args:
+            kind: "fixed", "lognormal" ou "heavy_tail" (Pareto)
+            median_ms: Délai médian (fixed : délai exact, heavy_tail : délai minimum)
+            sigma: Dispersion du profil lognormal
+            tail_alpha: Exposant de Pareto (plus petit = queue plus lourde)
+            max_factor: Borne du facteur de Pareto (évite les attentes infinies)
+        """
+        if kind not in LATENCY_PROFILES:
+            raise ValueError(f"Profil de latence inconnu: {kind} (attendu: {', '.join(LATENCY_PROFILES)})")
+        self.kind = kind
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tail_alpha = tail_alpha
+        self.max_factor = max_factor
+
+    def sample(self, rng: random.Random) -> float:
+        """Tirer un délai en secondes"""
+        if self.median_ms <= 0:
+            return 0.0
+        if self.kind == "lognormal":
+            delay = self.median_ms * math.exp(self.sigma * rng.gauss(0.0, 1.0))
+        elif self.kind == "heavy_tail":
+            delay = self.median_ms * min(rng.paretovariate(self.tail_alpha), self.max_factor)
+        else:
+            delay = self.median_ms
+        return delay / 1000.0
+
+
+# ===== Réponses de la victime =====
+_VICTIM_OPENERS = [
+    "Oh là là...", "Hmm, attendez.", "Oh mon Dieu.", "Excusez-moi, je n'entends pas très bien.",
+    "Ah bon ?", "Pardon, mon petit monsieur.", "Oh, vous savez, à mon âge..."
+]
+_VICTIM_LINES = {
+    "sensitive": [
+        "Mon code... c'est peut-être 1234 ? Ou alors la date de naissance de Scooty, je ne sais plus.",
+        "Ma carte est dans mon sac, mais je ne trouve plus mon sac.",
+        "Mon mot de passe, c'était tournesol... ou hirondelle ? Mon petit-fils l'a écrit quelque part.",
+        "Je ne donne jamais ces choses-là au téléphone, ma fille me l'a bien répété.",
+    ],
+    "tech": [
+        "Je ne trouve pas ce bouton, il y a beaucoup trop de touches sur ce clavier.",
+        "L'écran est tout noir, c'est normal ? Ah non, c'est mes lunettes.",
+        "Télécharger quoi ? Je ne sais même pas où est la souris.",
+        "Mon ordinateur fait un drôle de bruit, vous l'entendez aussi ?",
+    ],
+    "urgent": [
+        "Un virus ? Mais je me suis lavé les mains ce matin !",
+        "Ça a l'air grave, mais mon fils dit qu'il ne faut jamais se précipiter.",
+        "Bloqué ? Mon compte ? Oh, vous me faites peur.",
+    ],
+    "default": [
+        "Vous êtes bien aimable d'appeler une vieille dame.",
+        "Je suis en train de préparer une soupe, vous savez.",
+        "Mon mari s'occupait de tout ça, le pauvre, paix à son âme.",
+        "Vous pouvez répéter plus lentement, s'il vous plaît ?",
+    ],
+}
+_VICTIM_KEYWORDS = {
+    "sensitive": ("carte", "code", "mot de passe", "password", "iban", "compte", "pin", "virement"),
+    "tech": ("ordinateur", "clavier", "logiciel", "télécharg", "anydesk", "teamviewer", "écran", "cliqu", "touche"),
+    "urgent": ("virus", "urgent", "danger", "bloqu", "pirat", "fraude"),
+}
+_VICTIM_CLOSERS = [
+    "[SOUND: DOG_BARKING] Scooty, chut !", "Attendez, on sonne à la porte.",
+    "Vous pouvez patienter une petite minute ?", "Fluffy, descends de là !", ""
+]
+
+# ===== Réponses du modérateur =====
+_MODERATOR_EVENTS = [
+    ("Le chien aboie à la porte", "Jeanne doit aller le calmer"),
+    ("La sonnette retentit", "Le facteur apporte un colis"),
+    ("La casserole déborde", "Jeanne court éteindre le feu"),
+    ("Le téléphone fixe sonne", "Sa fille appelle sur l'autre ligne"),
+    ("Jeanne doit prendre ses médicaments", "Elle cherche sa boîte à pilules"),
+    ("Le chat renverse un vase", "Grand bruit et Jeanne doit ramasser"),
+]
+_MODERATOR_DESCRIPTIONS = [
+    "Jeanne est distraite et fait patienter l'arnaqueur",
+    "L'arnaqueur perd le fil de son discours",
+    "Jeanne gagne quelques précieuses minutes",
+]
+
+
+def _message_text(message: Any) -> Tuple[str, str]:
+    """(type, contenu) d'un message langchain, d'un tuple ou d'une chaîne"""
+    if isinstance(message, str):
+        return "human", message
+    if isinstance(message, tuple):
+        return message[0], str(message[1])
+    return getattr(message, "type", "human"), str(getattr(message, "content", ""))
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class FakeChatModel:
+    """Modèle de chat local, déterministe et à latence configurable"""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: str = "fixed",
+        latency_ms: float = 300,
+        tokens_per_second: float = 60,
+        temperature: float = 0.0,
+        role: Optional[str] = None,
+        **latency_options
+    ):
+        """
+        Args:
+            seed: Graine (mêmes réponses et latences pour une même graine)
+            latency: Profil de latence ("fixed", "lognormal", "heavy_tail")
+            latency_ms: Délai médian avant le premier token
+            tokens_per_second: Débit de génération émulé (0 = instantané)
+            temperature: Ignorée, gardée pour l'interface des agents
+            role: Forcer le rôle ("victim", "moderator", "summary"), sinon détecté
+            **latency_options: sigma, tail_alpha, max_factor (voir LatencyProfile)
+        """
+        self.seed = seed
+        self.temperature = temperature
+        self.role = role
+        self.tokens_per_second = tokens_per_second
+        self.latency = LatencyProfile(latency, latency_ms, **latency_options)
+        self._latency_rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    # ===== Génération du texte =====
+
+    def _split_input(self, input: Any) -> Tuple[str, str]:
+        """(texte système, dernier message utilisateur)"""
+        messages = [input] if isinstance(input, str) else list(input)
+        system, last = "", ""
+        for message in messages:
+            kind, content = _message_text(message)
+            if kind == "system":
+                system += content
+            elif kind in ("human", "user"):
+                last = content
+        return system, last
+
+    def _detect_role(self, system: str, last: str) -> str:
+        if self.role:
+            return self.role
+        if "modérateur" in system.lower():
+            return "moderator"
+        if last.lstrip().startswith("Summarize"):
+            return "summary"
+        return "victim"
+
+    def generate_text(self, input: Any) -> str:
+        """Réponse déterministe pour un prompt (sans latence)"""
+        system, last = self._split_input(input)
+        digest = hashlib.sha256(f"{self.seed}\0{system}\0{last}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        role = self._detect_role(system, last)
+        if role == "moderator":
+            return self._moderator_text(last, rng)
+        if role == "summary":
+            return "Le scammeur insiste pour obtenir des informations. Jeanne reste confuse et gagne du temps."
+        return self._victim_text(last, rng)
+
+    def _victim_text(self, prompt: str, rng: random.Random) -> str:
+        # Le dernier message contient la réplique du scammeur (avant les consignes du tour) ;
+        # dans un prompt en une seule chaîne, elle suit le dernier "Scammer:"
+        scammer = prompt.rsplit("Scammer:", 1)[-1].split("STAGE DIRECTIONS:")[0].lower()
+        pool = "default"
+        for category, keywords in _VICTIM_KEYWORDS.items():
+            if any(keyword in scammer for keyword in keywords):
+                pool = category
+                break
+        sentences = [rng.choice(_VICTIM_OPENERS), rng.choice(_VICTIM_LINES[pool]), rng.choice(_VICTIM_CLOSERS)]
+        return " ".join(s for s in sentences if s)
+
+    def _moderator_text(self, prompt: str, rng: random.Random) -> str:
+        # Nom court de chaque suggestion ("- " est le séparateur du format de réponse,
+        # "(×N)" le nombre de spectateurs ayant proposé une idée proche)
+        suggestions = [
+            re.sub(r"\s*\(×\d+\)$", "", line[2:].split(" - ")[0].strip())
+            for line in prompt.splitlines() if line.startswith("- ")
+        ]
+        chosen = rng.sample(suggestions, min(3, len(suggestions)))
+        events = [(s, rng.choice(_MODERATOR_DESCRIPTIONS)) for s in chosen]
+        defaults = [e for e in _MODERATOR_EVENTS if e[0] not in chosen]
+        events += rng.sample(defaults, 3 - len(events))
+        lines = [f"{i}. [{event}] - {description}" for i, (event, description) in enumerate(events, 1)]
+        if "REJETÉES:" in prompt:
+            lines.append("REJETÉES: aucune")
+        return "\n".join(lines)
+
+    # ===== Latence =====
+
+    def _first_token_delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return self.latency.sample(self._latency_rng)
+
+    def _generation_time(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return _estimate_tokens(text) / self.tokens_per_second
+
+    def _chunks(self, text: str) -> List[str]:
+        """Découpage en morceaux d'un mot (espaces inclus)"""
+        words = text.split(" ")
+        return [word + " " for word in words[:-1]] + [words[-1]]
+
+    # ===== Interface des modèles de chat =====
+
+    def invoke(self, input: Any, config: Any = None, **kwargs) -> AIMessage:
+        """Réponse complète (attend la latence simulée)"""
+        text = self.generate_text(input)
+        time.sleep(self._first_token_delay() + self._generation_time(text))
+        return AIMessage(content=text)
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs) -> AIMessage:
+        """Réponse complète sans bloquer la boucle d'événements"""
+        text = self.generate_text(input)
+        await asyncio.sleep(self._first_token_delay() + self._generation_time(text))
+        return AIMessage(content=text)
+
+    def stream(self, input: Any, config: Any = None, **kwargs) -> Iterator[AIMessageChunk]:
+        """Réponse morceau par morceau au débit configuré"""
+        text = self.generate_text(input)
+        time.sleep(self._first_token_delay())
+        for chunk in self._chunks(text):
+            time.sleep(self._generation_time(chunk))
+            yield AIMessageChunk(content=chunk)
+
+    async def astream(self, input: Any, config: Any = None, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        """Version asynchrone de stream"""
+        text = self.generate_text(input)
+        await asyncio.sleep(self._first_token_delay())
+        for chunk in self._chunks(text):
+            await asyncio.sleep(self._generation_time(chunk))
+            yield AIMessageChunk(content=chunk)
+
+    def batch(self, inputs: List[Any], config: Any = None, **kwargs) -> List[AIMessage]:
+        """Plusieurs prompts en parallèle (comme le batch des modèles langchain, borné par config["max_concurrency"])"""
+        if not inputs:
+            return []
+        first = (config[0] if config else None) if isinstance(config, list) else config
+        max_concurrency = (first or {}).get("max_concurrency")
+        with ThreadPoolExecutor(max_workers=max_concurrency or len(inputs)) as executor:
+            return list(executor.map(self.invoke, inputs))
+
+    async def abatch(self, inputs: List[Any], config: Any = None, **kwargs) -> List[AIMessage]:
+        """Version asynchrone de batch"""
+        return list(await asyncio.gather(*(self.ainvoke(i) for i in inputs)))
@@ -0,0 +1,304 @@
+"""
+Requêtes doublées (hedging) et nouvelles tentatives pour réduire la latence extrême
+
+HedgedChatModel enveloppe un modèle de chat (en général déjà soumis au
+limiteur de débit) :
+- si le premier appel n'a pas répondu au bout d'un délai égal à un percentile
+  des latences récentes (p95 par défaut), un second appel identique est lancé ;
+  la première réponse gagne et l'autre appel est annulé (en synchrone, les
+  appels doublés passent par ainvoke sur une boucle d'événements dédiée pour
+  pouvoir être annulés ; un modèle sans ainvoke natif, exécuté dans un thread
+  par LangChain, va quand même au bout de son appel) ;
+- les erreurs transitoires (5xx, délais dépassés, connexion) sont rejouées avec
+  un backoff exponentiel à gigue complète.
+
+Les métriques par agent (get_hedging_stats) indiquent la fréquence des
+doublements et le p99 obtenu comparé au p99 du premier appel seul. Un premier
+appel annulé parce que le doublon a gagné compte pour le temps écoulé à
+l'annulation (borne inférieure de sa latence) : sans cela, les premiers appels
+les plus lents disparaîtraient des latences et le délai de doublement baisserait.
+p99_primary_ms, et donc le gain p99_improvement_ms, sont ainsi des bornes
+inférieures.
+"""
+
+import asyncio
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from ..config.llm_config import (
+    LLM_HEDGING,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY_MS,
+    LLM_RETRY_ATTEMPTS,
+    LLM_RETRY_BASE_DELAY_MS
+)
+
+# Latences observées avant d'utiliser le percentile (sinon délai initial)
+WARMUP_SAMPLES = 20
+INITIAL_HEDGE_DELAY = 2.0
+MAX_BACKOFF_SECONDS = 10.0
+
+_TRANSIENT_ERRORS = (
+    "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+    "ConnectionError", "TimeoutError", "ReadTimeout", "ConnectTimeout", "Aborted"
+)
+_TRANSIENT_MESSAGE = re.compile(r"\b50[0234]\b|unavailable|timed out", re.IGNORECASE)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Erreur passagère du fournisseur ou du réseau (rejouable)"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__name__ in _TRANSIENT_ERRORS:
+        return True
+    return bool(_TRANSIENT_MESSAGE.search(str(error)))
+
+
+def backoff_delay(attempt: int, base: float, cap: float = MAX_BACKOFF_SECONDS, rng: random.Random = random) -> float:
+    """Backoff exponentiel à gigue complète : uniforme entre 0 et min(cap, base * 2^attempt)"""
+    return rng.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+def _percentile(values, percentile: float) -> float:
+    """Percentile (rang le plus proche) d'une liste de valeurs"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class HedgeMetrics:
+    """Latences et compteurs d'un type d'appel (partagés par toutes les sessions)"""
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Nombre de latences récentes gardées
+        """
+        self._lock = threading.Lock()
+        self.primary: Deque[float] = deque(maxlen=window)
+        self.effective: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Premiers appels annulés (doublon gagnant) : latence comptée jusqu'à l'annulation
+        self.primary_cancelled = 0
+        self.retries = 0
+        self.errors = 0
+
+    def record_primary(self, seconds: float) -> None:
+        """Latence d'un premier appel (temps écoulé à l'annulation s'il a été abandonné)"""
+        with self._lock:
+            self.primary.append(seconds)
+
+    def record_effective(self, seconds: float) -> None:
+        """Latence vue par l'appelant"""
+        with self._lock:
+            self.effective.append(seconds)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def hedge_delay(self, percentile: float, min_delay: float) -> float:
+        """Délai avant de doubler l'appel"""
+        with self._lock:
+            samples = list(self.primary)
+        if len(samples) < WARMUP_SAMPLES:
+            return max(min_delay, INITIAL_HEDGE_DELAY)
+        return max(min_delay, _percentile(samples, percentile))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            primary, effective = list(self.primary), list(self.effective)
+            stats = {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "primary_cancelled": self.primary_cancelled,
+                "retries": self.retries,
+                "errors": self.errors,
+            }
+        p99_primary = _percentile(primary, 99) * 1000
+        p99_effective = _percentile(effective, 99) * 1000
+        stats.update(
+            p50_ms=round(_percentile(effective, 50) * 1000, 1),
+            p99_ms=round(p99_effective, 1),
+            p99_primary_ms=round(p99_primary, 1),
+            p99_improvement_ms=round(p99_primary - p99_effective, 1) if primary and effective else 0.0,
+        )
+        return stats
+
+
+_metrics: Dict[str, HedgeMetrics] = {}
+_metrics_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_metrics(label: str) -> HedgeMetrics:
+    """Métriques d'un type d'appel ("victim", "moderator"...)"""
+    with _metrics_lock:
+        if label not in _metrics:
+            _metrics[label] = HedgeMetrics()
+        return _metrics[label]
+
+
+def get_hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """Métriques de tous les types d'appels"""
+    with _metrics_lock:
+        labels = list(_metrics)
+    return {label: get_metrics(label).get_stats() for label in labels}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Boucle d'événements des appels doublés synchrones (thread dédié)"""
+    global _loop
+    with _metrics_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-hedge", daemon=True).start()
+        return _loop
+
+
+class HedgedChatModel:
+    """Modèle de chat avec doublement des appels lents et nouvelles tentatives"""
+
+    def __init__(
+        self,
+        model: Any,
+        label: str,
+        hedging: bool = LLM_HEDGING,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        min_delay: float = LLM_HEDGE_MIN_DELAY_MS / 1000,
+        attempts: int = LLM_RETRY_ATTEMPTS,
+        base_delay: float = LLM_RETRY_BASE_DELAY_MS / 1000
+    ):
+        """
+        Args:
+            model: Modèle sous-jacent
+            label: Type d'appel pour les métriques ("victim", "moderator"...)
+            hedging: Doubler les appels lents (sinon seulement les nouvelles tentatives)
+            percentile: Percentile des latences récentes servant de délai de doublement
+            min_delay: Délai minimum avant de doubler (secondes)
+            attempts: Tentatives maximum en cas d'erreur transitoire
+            base_delay: Base du backoff exponentiel (secondes)
+        """
+        self.model = model
+        self.label = label
+        self.hedging = hedging
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.metrics = get_metrics(label)
+
+    def __getattr__(self, name: str) -> Any:
+        # stream, batch, with_priority... sont ceux du modèle sous-jacent
+        return getattr(self.model, name)
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt + 1 >= self.attempts or not is_transient_error(error):
+            self.metrics.count("errors")
+            return False
+        self.metrics.count("retries")
+        return True
+
+    # ===== Appels synchrones =====
+
+    def invoke(self, input: Any, *args, **kwargs) -> Any:
+        """invoke avec doublement et nouvelles tentatives"""
+        attempt = 0
+        while True:
+            try:
+                return self._invoke_once(input, args, kwargs)
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                time.sleep(backoff_delay(attempt, self.base_delay))
+                attempt += 1
+
+    def _invoke_once(self, input: Any, args: tuple, kwargs: dict) -> Any:
+        if self.hedging:
+            # Appels doublés sur la boucle dédiée : l'appel perdant peut être annulé
+            return asyncio.run_coroutine_threadsafe(self._ainvoke_once(input, args, kwargs), _get_loop()).result()
+        self.metrics.count("calls")
+        start = time.monotonic()
+        response = self.model.invoke(input, *args, **kwargs)
+        self._record(start, primary_won=True, primary_pending=False)
+        return response
+
+    def _record(self, start: float, primary_won: bool, primary_pending: bool) -> None:
+        """
+        Mesures d'un appel terminé (même règle en synchrone et en asynchrone)
+
+        Args:
+            start: Début du premier appel
+            primary_won: La réponse est celle du premier appel
+            primary_pending: Le premier appel est encore en cours (il va être annulé)
+        """
+        elapsed = time.monotonic() - start
+        if not primary_won:
+            self.metrics.count("hedge_wins")
+        if primary_won or primary_pending:
+            # Premier appel annulé : sa latence est au moins le temps déjà écoulé
+            self.metrics.record_primary(elapsed)
+            if primary_pending:
+                self.metrics.count("primary_cancelled")
+        self.metrics.record_effective(elapsed)
+
+    # ===== Appels asynchrones =====
+
+    async def ainvoke(self, input: Any, *args, **kwargs) -> Any:
+        """ainvoke avec doublement et nouvelles tentatives"""
+        attempt = 0
+        while True:
+            try:
+                return await self._ainvoke_once(input, args, kwargs)
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.base_delay))
+                attempt += 1
+
+    async def _ainvoke_once(self, input: Any, args: tuple, kwargs: dict) -> Any:
+        self.metrics.count("calls")
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self.model.ainvoke(input, *args, **kwargs))
+        if not self.hedging:
+            response = await primary
+            self._record(start, primary_won=True, primary_pending=False)
+            return response
+
+        pending = {primary}
+        done, _ = await asyncio.wait(pending, timeout=self.metrics.hedge_delay(self.percentile, self.min_delay))
+        if not done:
+            self.metrics.count("hedges")
+            pending.add(asyncio.ensure_future(self.model.ainvoke(input, *args, **kwargs)))
+
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    # Premier arrivé : l'autre appel est annulé
+                    self._record(start, primary_won=task is primary, primary_pending=primary in pending)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def hedged(model: Any, label: str) -> HedgedChatModel:
+    """Envelopper un modèle avec la configuration globale (LLM_HEDGING, LLM_RETRY_*)"""
+    return HedgedChatModel(model, label)
@@ -0,0 +1,329 @@
+"""
+Instrumentation des appels LLM : latence, tokens et coût par agent
+
+Chaque appel des agents (victime, modérateur) passe par track_call, qui
+enregistre la durée réelle (file d'attente, doublement et nouvelles tentatives
+compris), les tokens du prompt et de la réponse, le modèle, l'agent et la
+session :
+- dans des histogrammes en mémoire (get_metrics().summary()) ;
+- sur un endpoint HTTP local au format texte Prometheus (LLM_METRICS_PORT) ;
+- dans un fichier JSONL, un appel par ligne (LLM_METRICS_JSONL).
+
+Quand le fournisseur ne rapporte pas l'usage (backend "fake"), les tokens sont
+estimés localement (environ 4 caractères par token).
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .rate_limiter import estimate_input_tokens
+from ..config.llm_config import LLM_METRICS_JSONL
+
+# Prix en dollars par million de tokens (prompt, réponse)
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash-001": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMPT_TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+COMPLETION_TOKEN_BUCKETS = (10, 25, 50, 100, 200, 400, 800)
+
+Labels = Tuple[str, str, str]  # (agent, modèle, opération)
+
+
+def new_session_id() -> str:
+    """Identifiant court d'une session de simulation"""
+    return uuid.uuid4().hex[:12]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Coût estimé d'un appel en dollars (0 pour un modèle inconnu)"""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class Histogram:
+    """Histogramme cumulatif à la Prometheus (bornes fixes)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # dernière case : +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimation d'un quantile (borne supérieure du bucket qui le contient)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(borne, nombre cumulé) pour l'export Prometheus"""
+        result, seen = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            result.append((f"{bound:g}", seen))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class _Series:
+    """Mesures d'une combinaison agent/modèle/opération"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram(PROMPT_TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(COMPLETION_TOKEN_BUCKETS)
+        self.errors = 0
+        self.cost = 0.0
+
+
+class LLMMetrics:
+    """Registre des mesures d'appels LLM (partagé par tout le processus)"""
+
+    def __init__(self, jsonl_path: Optional[str] = LLM_METRICS_JSONL):
+        """
+        Args:
+            jsonl_path: Fichier JSONL où écrire chaque appel (None ou "" = pas d'écriture)
+        """
+        self._lock = threading.Lock()
+        self._series: Dict[Labels, _Series] = {}
+        self.jsonl_path = jsonl_path or None
+        self._sink = None
+
+    def record(
+        self,
+        agent: str,
+        model: str,
+        operation: str,
+        session_id: str,
+        seconds: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+        estimated: bool,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Enregistrer un appel terminé (ou en erreur)"""
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            series = self._series.setdefault((agent, model, operation), _Series())
+            series.latency.observe(seconds)
+            if error:
+                series.errors += 1
+            else:
+                series.prompt_tokens.observe(prompt_tokens)
+                series.completion_tokens.observe(completion_tokens)
+                series.cost += cost
+        event = {
+            "ts": time.time(),
+            "session_id": session_id,
+            "agent": agent,
+            "model": model,
+            "operation": operation,
+            "latency_ms": round(seconds * 1000, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_estimated": estimated,
+            "cost_usd": round(cost, 8),
+            "error": error,
+        }
+        self._write(event)
+        return event
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        if not self.jsonl_path:
+            return
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            if self._sink is None:
+                os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+                self._sink = open(self.jsonl_path, "a", encoding="utf-8", buffering=1)
+            self._sink.write(line + "\n")
+
+    def summary(self, agent: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Résumé par agent (tous modèles et opérations confondus)
+
+        Args:
+            agent: Limiter à un agent (None = tous)
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (name, model, operation), series in self._series.items():
+                if agent is not None and name != agent:
+                    continue
+                entry = result.setdefault(name, {
+                    "calls": 0, "errors": 0, "latency_s": 0.0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                    "latency_p95_s": 0.0, "models": []
+                })
+                entry["calls"] += series.latency.count
+                entry["errors"] += series.errors
+                entry["latency_s"] += series.latency.total
+                entry["prompt_tokens"] += int(series.prompt_tokens.total)
+                entry["completion_tokens"] += int(series.completion_tokens.total)
+                entry["cost_usd"] += series.cost
+                entry["latency_p95_s"] = max(entry["latency_p95_s"], series.latency.quantile(0.95))
+                if model not in entry["models"]:
+                    entry["models"].append(model)
+        for entry in result.values():
+            entry["latency_mean_s"] = entry["latency_s"] / entry["calls"] if entry["calls"] else 0.0
+        return result
+
+    def render_prometheus(self) -> str:
+        """Export au format texte Prometheus"""
+        lines = []
+        with self._lock:
+            items = sorted(self._series.items())
+            for metric, attribute, help_text in (
+                ("llm_call_duration_seconds", "latency", "Durée des appels LLM"),
+                ("llm_prompt_tokens", "prompt_tokens", "Tokens du prompt par appel"),
+                ("llm_completion_tokens", "completion_tokens", "Tokens de la réponse par appel"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for (agent, model, operation), series in items:
+                    histogram = getattr(series, attribute)
+                    labels = f'agent="{agent}",model="{model}",operation="{operation}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.total:g}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+            for metric, help_text in (
+                ("llm_call_errors_total", "Appels LLM en erreur"),
+                ("llm_cost_usd_total", "Coût estimé des appels LLM (dollars)"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (agent, model, operation), series in items:
+                    value = series.errors if metric == "llm_call_errors_total" else series.cost
+                    lines.append(f'{metric}{{agent="{agent}",model="{model}",operation="{operation}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Oublier toutes les mesures (tests)"""
+        with self._lock:
+            self._series.clear()
+
+    def close(self) -> None:
+        """Fermer le fichier JSONL"""
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> LLMMetrics:
+    """Registre global des mesures"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics()
+        return _metrics
+
+
+class CallRecord:
+    """Appel en cours : l'appelant y dépose la réponse (ou le dernier morceau du flux)"""
+
+    def __init__(self, prompt: Any):
+        self.prompt = prompt
+        self.response: Any = None
+        self.text = ""
+
+
+def _usage(record: CallRecord) -> Tuple[int, int, bool]:
+    """(tokens du prompt, tokens de la réponse, estimés ?)"""
+    usage = getattr(record.response, "usage_metadata", None) or {}
+    if usage.get("input_tokens") is not None:
+        return int(usage["input_tokens"]), int(usage.get("output_tokens") or 0), False
+    text = record.text or str(getattr(record.response, "content", "") or "")
+    return estimate_input_tokens(record.prompt), estimate_input_tokens(text), True
+
+
+@contextmanager
+def track_call(agent: str, model: str, operation: str, session_id: str, prompt: Any) -> Iterator[CallRecord]:
+    """
+    Mesurer un appel LLM
+
+    Args:
+        agent: Nom de l'agent ("victim", "moderator")
+        model: Modèle appelé
+        operation: Type d'appel ("respond", "stream", "select"...)
+        session_id: Session de simulation
+        prompt: Prompt envoyé (estimation des tokens si l'usage n'est pas rapporté)
+
+    Yields:
+        CallRecord dont l'appelant renseigne response (et text pour un flux)
+    """
+    record = CallRecord(prompt)
+    start = time.monotonic()
+    error = None
+    try:
+        yield record
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        prompt_tokens, completion_tokens, estimated = _usage(record)
+        get_metrics().record(
+            agent, model, operation, session_id, time.monotonic() - start,
+            prompt_tokens, completion_tokens if not error else 0, estimated, error
+        )
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Any:
+    """
+    Servir /metrics (texte Prometheus) dans un thread d'arrière-plan
+
+    Args:
+        port: Port d'écoute (0 = port libre choisi par le système)
+        host: Adresse d'écoute (locale par défaut)
+
+    Returns:
+        Le serveur HTTP (server.server_address donne le port effectif)
+    """
+    # Import différé : http.server n'est utile que si l'endpoint est activé
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = get_metrics().render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Pas de log à chaque scrape dans la console du simulateur
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,465 @@
+"""
+Limitation de débit partagée pour tous les appels LLM
+
+Un seul RateLimiter par processus suit :
+- les requêtes par minute (RPM) et les tokens par minute (TPM), par seaux à jetons
+- le nombre d'appels simultanés (sémaphore borné)
+
+Les appels en attente forment une file à priorité : les réponses de la victime
+passent avant la sélection du modérateur, elle-même avant la génération
+d'événements de secours et les résumés de mémoire. Quand le quota manque, les
+appels patientent dans la file au lieu d'échouer ; une erreur de quota du
+fournisseur met le limiteur en pause puis l'appel est remis dans la file.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from ..config.llm_config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_CONCURRENCY,
+    LLM_QUOTA_RETRIES
+)
+
+# Priorités (plus petit = servi en premier)
+PRIORITY_VICTIM = 0
+PRIORITY_MODERATOR = 1
+PRIORITY_FALLBACK = 2
+PRIORITY_BACKGROUND = 3
+
+# Tokens de sortie réservés par appel avant de connaître la réponse
+EXPECTED_OUTPUT_TOKENS = 200
+
+# Attente maximale entre deux vérifications d'un appel asynchrone en file
+_ASYNC_POLL_SECONDS = 0.05
+
+
+class RateLimitTimeout(TimeoutError):
+    """L'appel n'a pas obtenu de quota dans le délai imparti"""
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Erreur de quota du fournisseur (429 / ResourceExhausted)"""
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "resource exhausted" in message
+
+
+def estimate_input_tokens(input: Any) -> int:
+    """Estimation locale des tokens d'un prompt (chaîne ou liste de messages)"""
+    if isinstance(input, str):
+        text = input
+    else:
+        text = "".join(
+            str(m[1]) if isinstance(m, tuple) else str(getattr(m, "content", m)) for m in input
+        )
+    return (len(text) + 3) // 4
+
+
+class _TokenBucket:
+    """Seau à jetons rempli en continu (capacity jetons par minute)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.available = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Secondes avant de pouvoir prélever amount (0 si disponible)"""
+        # Une demande plus grosse que le seau attend seulement qu'il soit plein
+        amount = min(amount, self.capacity)
+        missing = amount - self.available
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class Permit:
+    """Autorisation d'appel (à rendre avec RateLimiter.release)"""
+
+    __slots__ = ("tokens", "priority", "acquired_at")
+
+    def __init__(self, tokens: int, priority: int):
+        self.tokens = tokens
+        self.priority = priority
+        self.acquired_at = time.monotonic()
+
+
+class RateLimiter:
+    """Seaux RPM/TPM + sémaphore de concurrence + file à priorité"""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0
+    ):
+        """
+        Args:
+            requests_per_minute: Requêtes par minute (0 = illimité)
+            tokens_per_minute: Tokens par minute (0 = illimité)
+            max_concurrency: Appels simultanés maximum (0 = illimité)
+        """
+        self.requests = _TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"acquired": 0, "queued": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                       "quota_errors": 0, "timeouts": 0}
+        self._by_priority: Dict[int, int] = {}
+
+    # ===== File d'attente =====
+
+    def _wait_time(self, tokens: int, requests: int, now: float) -> float:
+        """0 si l'appel peut partir maintenant, sinon une attente indicative (sous verrou)"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            # Libéré par release() : le temps exact est inconnu
+            return _ASYNC_POLL_SECONDS
+        wait = 0.0
+        for bucket, amount in ((self.requests, requests), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        return wait
+
+    def _try_acquire(self, entry: tuple, tokens: int, requests: int, priority: int) -> Optional[float]:
+        """Prendre le quota si entry est en tête de file (sous verrou) ; sinon l'attente"""
+        now = time.monotonic()
+        if self._queue[0] is not entry:
+            return _ASYNC_POLL_SECONDS
+        wait = self._wait_time(tokens, requests, now)
+        if wait > 0:
+            return wait
+        heapq.heappop(self._queue)
+        if self.requests is not None:
+            self.requests.available -= requests
+        if self.tokens is not None:
+            self.tokens.available -= tokens
+        self.in_flight += 1
+        self._stats["acquired"] += 1
+        self._by_priority[priority] = self._by_priority.get(priority, 0) + 1
+        # Le suivant dans la file peut peut-être partir aussi
+        self._cond.notify_all()
+        return None
+
+    def _enqueue(self, priority: int) -> tuple:
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._queue, entry)
+        return entry
+
+    def _dequeue(self, entry: tuple) -> None:
+        """Retirer un appel abandonné (délai dépassé, annulation)"""
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+
+    def _record_wait(self, started: float) -> None:
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._stats["queued"] += 1
+        self._stats["wait_seconds"] += waited
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+    def acquire(
+        self,
+        tokens: int = 1,
+        priority: int = PRIORITY_MODERATOR,
+        timeout: Optional[float] = None,
+        requests: int = 1
+    ) -> Permit:
+        """
+        Attendre son tour et du quota (bloquant)
+
+        Args:
+            tokens: Tokens estimés de l'appel (prompt + sortie)
+            priority: Priorité de l'appel (PRIORITY_*)
+            timeout: Attente maximale en secondes (None = illimitée)
+            requests: Requêtes décomptées du RPM (un batch en compte plusieurs)
+
+        Raises:
+            RateLimitTimeout: Si le délai est dépassé
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            entry = self._enqueue(priority)
+            while True:
+                wait = self._try_acquire(entry, tokens, requests, priority)
+                if wait is None:
+                    self._record_wait(started)
+                    return Permit(tokens, priority)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._dequeue(entry)
+                        self._stats["timeouts"] += 1
+                        raise RateLimitTimeout(f"Pas de quota LLM après {timeout:g} s")
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    async def aacquire(
+        self,
+        tokens: int = 1,
+        priority: int = PRIORITY_MODERATOR,
+        timeout: Optional[float] = None,
+        requests: int = 1
+    ) -> Permit:
+        """Version asynchrone d'acquire (n'occupe pas de thread pendant l'attente)"""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            entry = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(entry, tokens, requests, priority)
+                    if wait is None:
+                        self._record_wait(started)
+                        return Permit(tokens, priority)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        with self._cond:
+                            self._stats["timeouts"] += 1
+                        raise RateLimitTimeout(f"Pas de quota LLM après {timeout:g} s")
+                    wait = min(wait, remaining)
+                await asyncio.sleep(min(wait, _ASYNC_POLL_SECONDS))
+        except BaseException:
+            with self._cond:
+                self._dequeue(entry)
+            raise
+
+    def try_acquire(
+        self,
+        tokens: int = 1,
+        priority: int = PRIORITY_MODERATOR,
+        requests: int = 1
+    ) -> Optional[Permit]:
+        """
+        acquire sans attente
+
+        Returns:
+            L'autorisation, ou None si l'appel ne pourrait pas partir immédiatement
+            (file non vide devant lui, concurrence ou quota épuisés, pause)
+        """
+        with self._cond:
+            entry = self._enqueue(priority)
+            if self._try_acquire(entry, tokens, requests, priority) is None:
+                return Permit(tokens, priority)
+            self._dequeue(entry)
+            return None
+
+    def release(self, permit: Permit, used_tokens: Optional[int] = None) -> None:
+        """
+        Rendre la place de concurrence et corriger la réservation de tokens
+
+        Args:
+            permit: Autorisation obtenue par acquire
+            used_tokens: Tokens réellement consommés (None = estimation gardée)
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens is not None and used_tokens is not None:
+                self.tokens.available += permit.tokens - used_tokens
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Suspendre les départs (le fournisseur a signalé un dépassement de quota)"""
+        with self._cond:
+            self._stats["quota_errors"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            if self.requests is not None:
+                self.requests.available = min(self.requests.available, 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du limiteur"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                in_flight=self.in_flight,
+                queue_length=len(self._queue),
+                by_priority=dict(self._by_priority),
+                requests_available=None if self.requests is None else round(self.requests.available, 1),
+                tokens_available=None if self.tokens is None else round(self.tokens.available),
+            )
+            return stats
+
+
+class RateLimitedChatModel:
+    """Modèle de chat dont chaque appel passe par le limiteur partagé"""
+
+    def __init__(
+        self,
+        model: Any,
+        limiter: RateLimiter,
+        priority: int = PRIORITY_MODERATOR,
+        quota_retries: int = LLM_QUOTA_RETRIES,
+        quota_pause: float = 5.0
+    ):
+        """
+        Args:
+            model: Modèle sous-jacent (ChatVertexAI, FakeChatModel...)
+            limiter: Limiteur partagé
+            priority: Priorité des appels de ce modèle
+            quota_retries: Nouvelles tentatives après une erreur de quota
+            quota_pause: Pause du limiteur après une erreur de quota (doublée à chaque échec)
+        """
+        self.model = model
+        self.limiter = limiter
+        self.priority = priority
+        self.quota_retries = quota_retries
+        self.quota_pause = quota_pause
+
+    def with_priority(self, priority: int) -> "RateLimitedChatModel":
+        """Même modèle et même limiteur, autre priorité"""
+        return RateLimitedChatModel(self.model, self.limiter, priority, self.quota_retries, self.quota_pause)
+
+    def __getattr__(self, name: str) -> Any:
+        # temperature, model_name... restent accessibles
+        return getattr(self.model, name)
+
+    def _reserve(self, input: Any) -> int:
+        return estimate_input_tokens(input) + EXPECTED_OUTPUT_TOKENS
+
+    @staticmethod
+    def _used_tokens(input: Any, response: Any) -> int:
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage.get("total_tokens"):
+            return int(usage["total_tokens"])
+        return estimate_input_tokens(input) + estimate_input_tokens(str(getattr(response, "content", "")))
+
+    def _on_quota_error(self, error: Exception, attempt: int) -> None:
+        if not is_quota_error(error) or attempt >= self.quota_retries:
+            raise error
+        self.limiter.pause(self.quota_pause * (2 ** attempt))
+
+    def invoke(self, input: Any, *args, **kwargs) -> Any:
+        """invoke du modèle, après attente du quota"""
+        for attempt in itertools.count():
+            permit = self.limiter.acquire(self._reserve(input), self.priority)
+            used = None
+            try:
+                response = self.model.invoke(input, *args, **kwargs)
+                used = self._used_tokens(input, response)
+                return response
+            except Exception as e:
+                self._on_quota_error(e, attempt)
+            finally:
+                self.limiter.release(permit, used)
+
+    async def ainvoke(self, input: Any, *args, **kwargs) -> Any:
+        """ainvoke du modèle, après attente (non bloquante) du quota"""
+        for attempt in itertools.count():
+            permit = await self.limiter.aacquire(self._reserve(input), self.priority)
+            used = None
+            try:
+                response = await self.model.ainvoke(input, *args, **kwargs)
+                used = self._used_tokens(input, response)
+                return response
+            except Exception as e:
+                self._on_quota_error(e, attempt)
+            finally:
+                self.limiter.release(permit, used)
+
+    def stream(self, input: Any, *args, **kwargs) -> Iterator[Any]:
+        """stream du modèle ; la place de concurrence est rendue à la fin du flux"""
+        for attempt in itertools.count():
+            permit = self.limiter.acquire(self._reserve(input), self.priority)
+            started = False
+            stream = None
+            try:
+                stream = self.model.stream(input, *args, **kwargs)
+                for chunk in stream:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Une erreur au milieu du flux n'est pas rejouée (texte déjà affiché)
+                if started:
+                    raise
+                self._on_quota_error(e, attempt)
+            finally:
+                # Fermé plus tôt par l'appelant : on coupe aussi le flux du fournisseur
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+                self.limiter.release(permit)
+
+    async def astream(self, input: Any, *args, **kwargs) -> AsyncIterator[Any]:
+        """astream du modèle ; la place de concurrence est rendue à la fin du flux"""
+        permit = await self.limiter.aacquire(self._reserve(input), self.priority)
+        try:
+            async for chunk in self.model.astream(input, *args, **kwargs):
+                yield chunk
+        finally:
+            self.limiter.release(permit)
+
+    def batch(self, inputs: List[Any], config: Any = None, **kwargs) -> List[Any]:
+        """
+        batch du modèle, une place de concurrence par requête en cours
+
+        Le quota (RPM/TPM) de tout le batch est réservé en un seul passage dans
+        la file ; le batch prend ensuite les places de concurrence libres (au
+        moins une) et le fournisseur ne reçoit jamais plus de requêtes
+        simultanées que de places tenues (max_concurrency du batch).
+        """
+        if not inputs:
+            return []
+        tokens = sum(self._reserve(i) for i in inputs)
+        permits = [self.limiter.acquire(tokens, self.priority, requests=len(inputs))]
+        try:
+            while len(permits) < len(inputs):
+                permit = self.limiter.try_acquire(0, self.priority, requests=0)
+                if permit is None:
+                    break
+                permits.append(permit)
+            return self.model.batch(inputs, _with_max_concurrency(config, len(permits)), **kwargs)
+        finally:
+            for permit in permits:
+                self.limiter.release(permit)
+
+
+def _with_max_concurrency(config: Any, max_concurrency: int) -> Any:
+    """Config de batch (dict, liste de dicts ou None) bornée à max_concurrency appels simultanés"""
+    if isinstance(config, list):
+        return [{**(c or {}), "max_concurrency": max_concurrency} for c in config]
+    return {**(config or {}), "max_concurrency": max_concurrency}
+
+
+# Limiteur global (partagé par tous les agents et toutes les sessions)
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Retourner le limiteur global (configuré par LLM_REQUESTS_PER_MINUTE, etc.)"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                max_concurrency=LLM_MAX_CONCURRENCY
+            )
+        return _limiter
+
+
+def rate_limited(model: Any, priority: int = PRIORITY_MODERATOR) -> RateLimitedChatModel:
+    """Envelopper un modèle pour que ses appels passent par le limiteur global"""
+    return RateLimitedChatModel(model, get_rate_limiter(), priority)
@@ -0,0 +1,365 @@
+"""
+Cache des réponses LLM et cassettes d'enregistrement / rejeu
+
+La clé d'une réponse est un hash de (modèle, température, messages). Modes
+(LLM_CACHE_MODE) :
+- "off" : pas de cache ;
+- "cache" : LRU en mémoire puis répertoire sur disque (LLM_CACHE_DIR), appel
+  réel en cas d'absence ;
+- "record" : appels réels, chaque réponse est écrite dans la cassette
+  (LLM_CASSETTE) ;
+- "replay" : réponses lues dans la cassette, appel réel si absente ;
+- "strict" : réponses lues dans la cassette, CassetteMissError si absente
+  (rejeu hors ligne garanti).
+
+Une session ScamSimulator enregistrée puis rejouée avec les mêmes répliques du
+scammeur ne fait aucun appel réseau et répond à la vitesse de la mémoire.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from ..config.llm_config import LLM_CACHE_MODE, LLM_CACHE_SIZE, LLM_CACHE_DIR, LLM_CASSETTE
+
+CACHE_MODES = ("off", "cache", "record", "replay", "strict")
+CASSETTE_MODES = ("record", "replay", "strict")
+
+Entry = Dict[str, Any]
+
+
+class CassetteMissError(LookupError):
+    """Réponse absente de la cassette en mode strict"""
+
+
+def _message_parts(message: Any) -> List[str]:
+    """(rôle, contenu) d'un message, quel que soit son format"""
+    if isinstance(message, tuple):
+        return [str(message[0]), str(message[1])]
+    content = getattr(message, "content", message)
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return [getattr(message, "type", type(message).__name__), content]
+
+
+def cache_key(model: str, temperature: float, input: Any) -> str:
+    """Hash de (modèle, température, messages)"""
+    messages = [["human", input]] if isinstance(input, str) else [_message_parts(m) for m in input]
+    payload = json.dumps(
+        {"model": model, "temperature": float(temperature), "messages": messages},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _preview(input: Any, max_chars: int = 80) -> str:
+    """Début du dernier message (lisibilité des cassettes)"""
+    last = input if isinstance(input, str) else (_message_parts(input[-1])[1] if input else "")
+    return last[:max_chars]
+
+
+class ResponseCache:
+    """Cache à deux niveaux : LRU en mémoire puis fichiers JSON sur disque"""
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, directory: Optional[str] = LLM_CACHE_DIR):
+        """
+        Args:
+            max_entries: Réponses gardées en mémoire
+            directory: Répertoire du niveau disque (None ou "" = mémoire seule)
+        """
+        self.max_entries = max_entries
+        self.directory = directory or None
+        self._memory: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, entry: Entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+        if self.directory:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self._remember(key, entry)
+                    self.stats["disk_hits"] += 1
+                return entry
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, entry: Entry) -> None:
+        with self._lock:
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+        if self.directory:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_json(path, entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": "cache", "entries": len(self._memory), **self.stats}
+
+
+class Cassette:
+    """
+    Réponses enregistrées d'une session, une par ligne (JSONL)
+    
+    Chaque réponse enregistrée est ajoutée à la fin du fichier : le coût d'un
+    enregistrement ne dépend pas de la taille de la cassette. Les cassettes
+    de l'ancien format (un seul objet JSON {"entries": ...}) restent lisibles.
+    """
+
+    def __init__(self, path: str, mode: str):
+        """
+        Args:
+            path: Fichier de la cassette
+            mode: "record", "replay" ou "strict"
+        """
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Entry] = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        if os.path.exists(path):
+            legacy = self._load(path)
+            if legacy and mode == "record":
+                # Conversion unique en JSONL avant d'y ajouter des lignes
+                _write_jsonl(path, self.entries)
+    
+    def _load(self, path: str) -> bool:
+        """Lire la cassette ; True si elle est à l'ancien format JSON"""
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "entries" in data:
+            self.entries = data["entries"]
+            return True
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Dernière ligne tronquée (session interrompue)
+            if isinstance(record, dict) and "key" in record:
+                self.entries[record["key"]] = record["entry"]
+        return False
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self.entries.get(key)
+            self.stats["hits" if entry is not None else "misses"] += 1
+        if entry is None and self.mode == "strict":
+            raise CassetteMissError(f"Réponse absente de la cassette {self.path} (clé {key[:12]})")
+        return entry
+
+    def put(self, key: str, entry: Entry) -> None:
+        line = json.dumps({"key": key, "entry": entry}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries[key] = entry
+            self.stats["stores"] += 1
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "path": self.path, "entries": len(self.entries), **self.stats}
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Écriture atomique (un lecteur ne voit jamais un fichier à moitié écrit)"""
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _write_jsonl(path: str, entries: Dict[str, Entry]) -> None:
+    """Réécrire une cassette au format JSONL (écriture atomique)"""
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for key, entry in entries.items():
+            f.write(json.dumps({"key": key, "entry": entry}, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+class CachedChatModel:
+    """Modèle de chat servi depuis un cache ou une cassette"""
+
+    def __init__(self, model: Any, model_name: str, temperature: float, store: Any, mode: str):
+        """
+        Args:
+            model: Modèle sous-jacent (appels réels)
+            model_name: Nom du modèle (fait partie de la clé)
+            temperature: Température (fait partie de la clé)
+            store: ResponseCache ou Cassette
+            mode: "cache", "record", "replay" ou "strict"
+        """
+        self.model = model
+        self.model_name = model_name
+        self.temperature = temperature
+        self.store = store
+        self.mode = mode
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def with_priority(self, priority: int) -> "CachedChatModel":
+        """Même cache, autre priorité dans le limiteur"""
+        return CachedChatModel(
+            self.model.with_priority(priority), self.model_name, self.temperature, self.store, self.mode
+        )
+
+    def _key(self, input: Any) -> str:
+        return cache_key(self.model_name, self.temperature, input)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.mode == "record":
+            return None
+        entry = self.store.get(key)
+        return entry["content"] if entry is not None else None
+
+    def _save(self, key: str, input: Any, content: Any) -> None:
+        if self.mode in ("cache", "record") and isinstance(content, str):
+            self.store.put(key, {"content": content, "prompt": _preview(input)})
+
+    @staticmethod
+    def _message(content: str) -> Any:
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=content, response_metadata={"cache_hit": True})
+
+    @staticmethod
+    def _chunk(content: str) -> Any:
+        from langchain_core.messages import AIMessageChunk
+        return AIMessageChunk(content=content, response_metadata={"cache_hit": True})
+
+    def invoke(self, input: Any, *args, **kwargs) -> Any:
+        key = self._key(input)
+        content = self._lookup(key)
+        if content is not None:
+            return self._message(content)
+        response = self.model.invoke(input, *args, **kwargs)
+        self._save(key, input, response.content)
+        return response
+
+    async def ainvoke(self, input: Any, *args, **kwargs) -> Any:
+        key = self._key(input)
+        content = self._lookup(key)
+        if content is not None:
+            return self._message(content)
+        response = await self.model.ainvoke(input, *args, **kwargs)
+        self._save(key, input, response.content)
+        return response
+
+    def stream(self, input: Any, *args, **kwargs) -> Iterator[Any]:
+        """Flux réel (enregistré) ou réponse du cache en un seul morceau"""
+        key = self._key(input)
+        content = self._lookup(key)
+        if content is not None:
+            yield self._chunk(content)
+            return
+        text, complete = "", False
+        stream = self.model.stream(input, *args, **kwargs)
+        try:
+            for chunk in stream:
+                text += chunk.content if isinstance(chunk.content, str) else ""
+                yield chunk
+            complete = True
+        except GeneratorExit:
+            # Flux interrompu par l'appelant : on garde ce qu'il a reçu
+            complete = True
+            raise
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            if complete and text:
+                self._save(key, input, text)
+
+    async def astream(self, input: Any, *args, **kwargs) -> AsyncIterator[Any]:
+        key = self._key(input)
+        content = self._lookup(key)
+        if content is not None:
+            yield self._chunk(content)
+            return
+        text = ""
+        async for chunk in self.model.astream(input, *args, **kwargs):
+            text += chunk.content if isinstance(chunk.content, str) else ""
+            yield chunk
+        self._save(key, input, text)
+
+    def batch(self, inputs: List[Any], *args, **kwargs) -> List[Any]:
+        """Réponses du cache, et un seul batch réel pour les absentes"""
+        keys = [self._key(input) for input in inputs]
+        results: List[Any] = []
+        missing = []
+        for i, key in enumerate(keys):
+            content = self._lookup(key)
+            results.append(self._message(content) if content is not None else None)
+            if content is None:
+                missing.append(i)
+        if missing:
+            responses = self.model.batch([inputs[i] for i in missing], *args, **kwargs)
+            for i, response in zip(missing, responses):
+                self._save(keys[i], inputs[i], response.content)
+                results[i] = response
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.store.get_stats()
+
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(mode: str = LLM_CACHE_MODE) -> Any:
+    """Cache ou cassette partagé par tous les agents du processus"""
+    with _stores_lock:
+        if mode not in _stores:
+            _stores[mode] = Cassette(LLM_CASSETTE, mode) if mode in CASSETTE_MODES else ResponseCache()
+        return _stores[mode]
+
+
+def cached(model: Any, model_name: str, temperature: float, mode: str = LLM_CACHE_MODE) -> Any:
+    """
+    Servir un modèle depuis le cache ou la cassette configurés
+
+    Returns:
+        Le modèle tel quel si le mode est "off"
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Mode de cache LLM inconnu: {mode} (attendu: {', '.join(CACHE_MODES)})")
+    if mode == "off":
+        return model
+    return CachedChatModel(model, model_name, temperature, get_store(mode), mode)
+
+
+def get_cache_stats() -> Optional[Dict[str, Any]]:
+    """Statistiques du cache ou de la cassette (None si désactivé)"""
+    with _stores_lock:
+        store = _stores.get(LLM_CACHE_MODE)
+    return store.get_stats() if store is not None else None
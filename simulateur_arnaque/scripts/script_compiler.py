@@ -0,0 +1,191 @@
+"""
+Module script_compiler : validation et précompilation des scripts d'arnaque.
+
+Chaque script JSON est validé une seule fois puis écrit sous forme d'artefact
+compact (pickle) contenant le script, le matcher des signaux et l'index des
+étapes déjà construits. Le registre charge l'artefact quand il est plus récent
+que le JSON source et se rabat sur le JSON sinon.
+
+Usage :
+    python -m simulateur_arnaque.scripts.script_compiler
+"""
+import json
+import os
+import pickle
+import sys
+from typing import Any, Dict, List, Optional
+
+from .signal_matcher import StageMatcher, register_stage_matcher
+
+# Dossier des artefacts, à côté des scripts JSON
+COMPILED_DIRECTORY_NAME = "__compiled__"
+COMPILED_EXTENSION = ".compiled"
+# À incrémenter quand le format de l'artefact ou de StageMatcher change
+ARTIFACT_VERSION = 1
+
+
+class ScriptValidationError(ValueError):
+    """Script d'arnaque invalide (les problèmes détectés sont listés dans errors)."""
+
+    def __init__(self, script_id: str, errors: List[str]):
+        self.script_id = script_id
+        self.errors = errors
+        super().__init__(f"Script '{script_id}' invalide : " + "; ".join(errors))
+
+
+def validate_script(script: Any, expected_id: Optional[str] = None) -> None:
+    """
+    Vérifie la structure d'un script d'arnaque
+
+    Args:
+        script: Script chargé depuis le JSON
+        expected_id: Identifiant attendu (nom du fichier), optionnel
+
+    Raises:
+        ScriptValidationError: Si le script ne respecte pas le schéma
+    """
+    errors = []
+    if not isinstance(script, dict):
+        raise ScriptValidationError(expected_id or "?", ["le script doit être un objet JSON"])
+    script_id = script.get('script_id')
+    if not isinstance(script_id, str) or not script_id:
+        errors.append("'script_id' manquant")
+    elif expected_id is not None and script_id != expected_id:
+        errors.append(f"'script_id' ({script_id}) différent du nom du fichier ({expected_id})")
+    if not isinstance(script.get('title'), str):
+        errors.append("'title' manquant")
+
+    stages = script.get('stages')
+    if not isinstance(stages, list) or not stages:
+        errors.append("'stages' doit être une liste non vide")
+        stages = []
+
+    seen = set()
+    for pos, stage in enumerate(stages):
+        label = f"stage {pos}"
+        if not isinstance(stage, dict):
+            errors.append(f"{label} : doit être un objet")
+            continue
+        stage_id = stage.get('stage_id')
+        if not isinstance(stage_id, str) or not stage_id:
+            errors.append(f"{label} : 'stage_id' manquant")
+        else:
+            label = f"stage '{stage_id}'"
+            if stage_id in seen:
+                errors.append(f"{label} : 'stage_id' en double")
+            seen.add(stage_id)
+        if not isinstance(stage.get('summary'), str):
+            errors.append(f"{label} : 'summary' manquant")
+        objectives = stage.get('victim_objectives')
+        if not isinstance(objectives, list) or not all(isinstance(o, str) for o in objectives):
+            errors.append(f"{label} : 'victim_objectives' doit être une liste de textes")
+        signals = stage.get('success_signals')
+        if not isinstance(signals, list) or not signals:
+            errors.append(f"{label} : 'success_signals' doit être une liste non vide")
+        elif not all(isinstance(s, str) and s.strip() for s in signals):
+            errors.append(f"{label} : 'success_signals' contient un signal vide")
+        priors = stage.get('audience_priors', {})
+        if not isinstance(priors, dict) or not all(
+            isinstance(word, str) and word and isinstance(bonus, (int, float)) for word, bonus in priors.items()
+        ):
+            errors.append(f"{label} : 'audience_priors' doit associer des racines à des bonus numériques")
+
+    if errors:
+        raise ScriptValidationError(script_id or expected_id or "?", errors)
+
+
+def compiled_path(json_path: str) -> str:
+    """Chemin de l'artefact compilé correspondant à un script JSON."""
+    directory, filename = os.path.split(json_path)
+    script_id = os.path.splitext(filename)[0]
+    return os.path.join(directory, COMPILED_DIRECTORY_NAME, script_id + COMPILED_EXTENSION)
+
+
+def compile_script(json_path: str) -> str:
+    """
+    Valide un script JSON et écrit son artefact précompilé
+
+    Returns:
+        Chemin de l'artefact écrit
+    """
+    script_id = os.path.splitext(os.path.basename(json_path))[0]
+    with open(json_path, "r", encoding="utf-8") as f:
+        script = json.load(f)
+    validate_script(script, expected_id=script_id)
+
+    artifact = {
+        'version': ARTIFACT_VERSION,
+        'script': script,
+        'matcher': StageMatcher(script),
+        'stages': {stage['stage_id']: stage for stage in script['stages']},
+    }
+    target = compiled_path(json_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Écriture atomique : un lecteur ne voit jamais d'artefact partiel
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+    return target
+
+
+def load_compiled(json_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Charge l'artefact d'un script s'il est à jour (plus récent que le JSON)
+
+    Returns:
+        Dictionnaire {'script', 'matcher', 'stages'} ou None (artefact absent,
+        périmé ou d'une autre version)
+    """
+    target = compiled_path(json_path)
+    try:
+        if os.stat(target).st_mtime_ns < os.stat(json_path).st_mtime_ns:
+            return None
+        with open(target, "rb") as f:
+            artifact = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get('version') != ARTIFACT_VERSION:
+        return None
+    register_stage_matcher(artifact['script'], artifact['matcher'])
+    return artifact
+
+
+def compile_directory(directory: str) -> Dict[str, str]:
+    """
+    Compile tous les scripts *.json d'un dossier
+
+    Returns:
+        Dictionnaire script_id -> "ok" ou message d'erreur
+    """
+    results = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        script_id = os.path.splitext(filename)[0]
+        try:
+            compile_script(os.path.join(directory, filename))
+            results[script_id] = "ok"
+        except (OSError, ValueError) as e:
+            results[script_id] = str(e)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande : compile le dossier des scripts."""
+    args = sys.argv[1:] if argv is None else argv
+    directory = args[0] if args else os.path.dirname(__file__)
+    results = compile_directory(directory)
+    failures = 0
+    for script_id, status in results.items():
+        if status == "ok":
+            print(f"✅ {script_id}")
+        else:
+            failures += 1
+            print(f"❌ {script_id} : {status}")
+    print(f"\n{len(results) - failures}/{len(results)} script(s) compilé(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,143 @@
 """
 Module de chargement de scripts d'arnaque.
+
+Les scripts JSON du dossier sont chargés une seule fois par le ScriptRegistry
+puis servis depuis la mémoire. Un fichier modifié (mtime/taille) est rechargé
+automatiquement au prochain accès. Quand un artefact précompilé plus récent
+que le JSON existe (voir script_compiler), il est utilisé à la place.
 """
+import glob
 import json
 import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .signal_matcher import get_stage_matcher
+from .script_compiler import load_compiled, validate_script
+
+SCRIPTS_DIRECTORY = os.path.dirname(__file__)
+
+
+@dataclass
+class _ScriptEntry:
+    """Script chargé en mémoire avec la signature du fichier source."""
+    path: str
+    mtime_ns: int
+    size: int
+    script: Dict[str, Any]
+    stages: Dict[str, Dict[str, Any]]
+
+
+class ScriptRegistry:
+    """Registre des scripts d'arnaque (cache mémoire invalidé par mtime/taille)."""
+
+    def __init__(self, directory: str = SCRIPTS_DIRECTORY):
+        """
+        Args:
+            directory: Dossier contenant les scripts *.json
+        """
+        self.directory = directory
+        self._entries: Dict[str, _ScriptEntry] = {}
+        # Nombre de chargements par script (quel que soit l'appelant qui a rechargé)
+        self._versions: Dict[str, int] = {}
+        # Le watcher de rechargement accède au registre depuis un autre thread
+        self._lock = threading.RLock()
+
+    def _path(self, script_id: str) -> str:
+        return os.path.join(self.directory, f"{script_id}.json")
+
+    def discover(self) -> List[str]:
+        """Retourne les identifiants de tous les scripts *.json du dossier."""
+        paths = glob.glob(os.path.join(self.directory, "*.json"))
+        return sorted(os.path.splitext(os.path.basename(p))[0] for p in paths)
+
+    def _load(self, script_id: str, path: str, stat: os.stat_result) -> _ScriptEntry:
+        artifact = load_compiled(path)
+        if artifact is not None:
+            script, stages = artifact['script'], artifact['stages']
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                script = json.load(f)
+            validate_script(script, expected_id=script_id)
+            # Compiler les signaux dès le chargement (réutilisé ensuite par le director)
+            get_stage_matcher(script)
+            stages = {stage['stage_id']: stage for stage in script['stages']}
+        entry = _ScriptEntry(
+            path=path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            script=script,
+            stages=stages
+        )
+        self._entries[script_id] = entry
+        self._versions[script_id] = self._versions.get(script_id, 0) + 1
+        return entry
+
+    def _entry(self, script_id: str) -> _ScriptEntry:
+        path = self._path(script_id)
+        with self._lock:
+            stat = os.stat(path)
+            entry = self._entries.get(script_id)
+            if entry is None or entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+                entry = self._load(script_id, path, stat)
+            return entry
+
+    def get(self, script_id: str) -> Dict[str, Any]:
+        """Retourne le script (rechargé seulement si le fichier a changé)."""
+        return self._entry(script_id).script
+
+    def get_versioned(self, script_id: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Retourne le script (rechargé si le fichier a changé) et sa version
+
+        Returns:
+            (version, script) : la version augmente à chaque rechargement,
+            qu'il soit déclenché par cet appel ou par un autre lecteur
+        """
+        with self._lock:
+            entry = self._entry(script_id)
+            return self._versions[script_id], entry.script
+
+    def get_stage(self, script_id: str, stage_id: str) -> Dict[str, Any]:
+        """Retourne une étape du script en O(1)."""
+        return self._entry(script_id).stages[stage_id]
+
+    def preload(self) -> List[str]:
+        """Charge tous les scripts du dossier et retourne les identifiants chargés."""
+        loaded = []
+        for script_id in self.discover():
+            try:
+                self.get(script_id)
+                loaded.append(script_id)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Script ignoré ({script_id}): {e}")
+        return loaded
+
+    def list_scripts(self) -> List[Tuple[str, str]]:
+        """Retourne la liste (script_id, titre) des scripts chargés."""
+        with self._lock:
+            entries = sorted(self._entries.items())
+        return [(script_id, entry.script.get('title', script_id)) for script_id, entry in entries]
+
+    def invalidate(self, script_id: Optional[str] = None) -> None:
+        """Oublie un script (ou tous) : il sera relu au prochain accès."""
+        with self._lock:
+            if script_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(script_id, None)
+
+
+# Instance globale
+registry = ScriptRegistry()
+
+
+def get_registry() -> ScriptRegistry:
+    """Retourner le registre global des scripts"""
+    return registry
+
 
 def load_script(script_id):
-    """Charge un script d'arnaque à partir d'un fichier JSON."""
-    base_dir = os.path.dirname(__file__)
-    script_path = os.path.join(base_dir, f"{script_id}.json")
-    with open(script_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Charge un script d'arnaque (servi depuis le registre en mémoire)."""
+    return registry.get(script_id)
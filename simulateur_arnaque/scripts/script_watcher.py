@@ -0,0 +1,118 @@
+"""
+Module script_watcher : rechargement à chaud des scripts d'arnaque.
+
+Un thread léger interroge périodiquement le registre (mtime/taille des
+fichiers). Quand un script suivi change, il est rechargé et compilé dans ce
+thread, puis transmis aux sessions abonnées qui l'appliquent entre deux tours.
+Le watcher compare la version du registre à la dernière version notifiée :
+un rechargement fait par un autre lecteur (nouvelle session, load_script)
+est donc lui aussi propagé.
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .script_loader import ScriptRegistry, get_registry
+
+ScriptCallback = Callable[[Dict[str, Any]], None]
+
+
+class ScriptWatcher:
+    """Surveillance par polling des scripts utilisés par les sessions en cours."""
+
+    def __init__(self, registry: Optional[ScriptRegistry] = None, interval: float = 1.0):
+        """
+        Args:
+            registry: Registre à surveiller (registre global par défaut)
+            interval: Intervalle de polling en secondes
+        """
+        self.registry = registry or get_registry()
+        self.interval = interval
+        self._subscribers: Dict[str, List[ScriptCallback]] = {}
+        # Dernière version notifiée (ou vue à l'abonnement) par script
+        self._versions: Dict[str, int] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, script_id: str, callback: ScriptCallback) -> None:
+        """Appelle callback(nouveau_script) à chaque modification du script."""
+        with self._lock:
+            self._subscribers.setdefault(script_id, []).append(callback)
+        if script_id not in self._versions:
+            try:
+                self._versions[script_id] = self.registry.get_versioned(script_id)[0]
+            except (OSError, ValueError, KeyError):
+                pass  # Première version valide vue au prochain polling
+        self.start()
+
+    def unsubscribe(self, script_id: str, callback: ScriptCallback) -> None:
+        """Retire un abonnement."""
+        with self._lock:
+            callbacks = self._subscribers.get(script_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._subscribers.pop(script_id, None)
+                self._versions.pop(script_id, None)
+
+    def poll(self) -> List[str]:
+        """
+        Vérifie une fois les scripts suivis et notifie les abonnés
+
+        Returns:
+            Identifiants des scripts rechargés
+        """
+        with self._lock:
+            watched = {script_id: list(callbacks) for script_id, callbacks in self._subscribers.items()}
+        reloaded = []
+        for script_id, callbacks in watched.items():
+            try:
+                version, script = self.registry.get_versioned(script_id)
+            except (OSError, ValueError, KeyError) as e:
+                # Fichier en cours d'édition ou invalide : on garde l'ancienne version
+                if self._errors.get(script_id) != str(e):
+                    self._errors[script_id] = str(e)
+                    print(f"⚠️ Rechargement du script {script_id} impossible : {e}")
+                continue
+            self._errors.pop(script_id, None)
+            seen = self._versions.setdefault(script_id, version)
+            if version == seen:
+                continue
+            self._versions[script_id] = version
+            reloaded.append(script_id)
+            for callback in callbacks:
+                callback(script)
+        return reloaded
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> None:
+        """Démarre le thread de polling (sans effet s'il tourne déjà)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="script-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête le thread de polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+# Instance globale (créée au premier abonnement)
+_watcher: Optional[ScriptWatcher] = None
+
+
+def get_watcher(interval: float = 1.0) -> ScriptWatcher:
+    """Retourner le watcher global des scripts"""
+    global _watcher
+    if _watcher is None:
+        _watcher = ScriptWatcher(interval=interval)
+    return _watcher
@@ -0,0 +1,143 @@
+"""
+Module signal_matcher : détection compilée des success_signals d'un script.
+
+Toutes les success_signals d'un script sont regroupées dans une seule regex
+(un groupe nommé par signal) compilée une fois par script. Un seul passage sur
+un texte suffit pour savoir quels signaux, et donc quelles étapes, sont touchés.
+"""
+import re
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Nombre de matchers gardés en mémoire (un par version de script)
+MATCHER_CACHE_SIZE = 64
+
+_matcher_cache: "OrderedDict[tuple, StageMatcher]" = OrderedDict()
+
+
+class StageMatcher:
+    """Matcher multi-motifs des success_signals d'un script, construit une seule fois."""
+
+    def __init__(self, script: Dict[str, Any]):
+        """
+        Compiler les signaux du script
+
+        Args:
+            script: Script d'arnaque (dict chargé depuis le JSON)
+        """
+        self.script_id: str = script.get('script_id', "")
+        self.stage_ids: List[str] = [stage['stage_id'] for stage in script['stages']]
+        self.stage_index: Dict[str, int] = {sid: pos for pos, sid in enumerate(self.stage_ids)}
+
+        # Signaux dédoublonnés (sans tenir compte de la casse) -> étapes concernées
+        self.signals: List[str] = []
+        self.signal_stages: List[FrozenSet[int]] = []
+        positions: Dict[str, int] = {}
+        stages_of: List[Set[int]] = []
+        for stage_pos, stage in enumerate(script['stages']):
+            for signal in stage['success_signals']:
+                key = signal.casefold()
+                if key not in positions:
+                    positions[key] = len(self.signals)
+                    self.signals.append(signal)
+                    stages_of.append(set())
+                stages_of[positions[key]].add(stage_pos)
+        self.signal_stages = [frozenset(s) for s in stages_of]
+
+        # Un signal peut en contenir un autre ("carte bancaire" contient "carte").
+        # La regex ne retient qu'une alternative par position : on précalcule
+        # donc les signaux impliqués par chaque signal trouvé.
+        self.implied_signals: List[FrozenSet[int]] = []
+        for signal in self.signals:
+            implied = {
+                j for j, other in enumerate(self.signals)
+                if re.search(rf"\b{re.escape(other)}\b", signal, re.IGNORECASE)
+            }
+            self.implied_signals.append(frozenset(implied))
+        self.implied_stages: List[FrozenSet[int]] = [
+            frozenset().union(*(self.signal_stages[j] for j in implied))
+            for implied in self.implied_signals
+        ]
+
+        self.pattern: Optional[re.Pattern] = self._compile()
+
+    def _compile(self) -> Optional[re.Pattern]:
+        """Construit la regex combinée (lookahead : les correspondances ne se chevauchent pas)."""
+        if not self.signals:
+            return None
+        # Les plus longs d'abord pour privilégier l'alternative la plus précise
+        order = sorted(range(len(self.signals)), key=lambda i: -len(self.signals[i]))
+        alternatives = "|".join(f"(?P<s{i}>{re.escape(self.signals[i])})" for i in order)
+        self._group_to_signal = {f"s{i}": i for i in range(len(self.signals))}
+        return re.compile(rf"\b(?=(?:{alternatives})\b)", re.IGNORECASE)
+
+    def signals_in(self, text: str) -> Set[int]:
+        """Retourne les indices des signaux présents dans le texte (un seul passage)."""
+        found: Set[int] = set()
+        if self.pattern is None or not text:
+            return found
+        for match in self.pattern.finditer(text):
+            found |= self.implied_signals[self._group_to_signal[match.lastgroup]]
+        return found
+
+    def stages_in(self, text: str) -> Set[int]:
+        """Retourne les positions des étapes dont au moins un signal apparaît dans le texte."""
+        found: Set[int] = set()
+        if self.pattern is None or not text:
+            return found
+        for match in self.pattern.finditer(text):
+            found |= self.implied_stages[self._group_to_signal[match.lastgroup]]
+        return found
+
+    def scan(self, texts: Iterable[str]) -> Set[int]:
+        """Retourne les positions des étapes touchées par au moins un des textes."""
+        found: Set[int] = set()
+        for text in texts:
+            found |= self.stages_in(text)
+        return found
+
+    def progress(self, hit_stages: Set[int]) -> Tuple[str, List[str]]:
+        """
+        Déduit le stage courant et les stages complétés à partir des étapes touchées
+
+        Les étapes sont validées dans l'ordre du script : la première étape sans
+        signal arrête la progression.
+        """
+        completed = []
+        for pos, stage_id in enumerate(self.stage_ids):
+            if pos not in hit_stages:
+                break
+            completed.append(stage_id)
+        current_stage_id = completed[-1] if completed else self.stage_ids[0]
+        return current_stage_id, completed
+
+
+def script_signature(script: Dict[str, Any]) -> tuple:
+    """Clé identifiant le contenu des signaux d'un script (change si le script est modifié)."""
+    return (
+        script.get('script_id', ""),
+        tuple((stage['stage_id'], tuple(stage['success_signals'])) for stage in script['stages'])
+    )
+
+
+def get_stage_matcher(script: Dict[str, Any]) -> StageMatcher:
+    """Retourne le matcher compilé du script (construit au premier appel puis mis en cache)."""
+    key = script_signature(script)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = StageMatcher(script)
+        _matcher_cache[key] = matcher
+        if len(_matcher_cache) > MATCHER_CACHE_SIZE:
+            _matcher_cache.popitem(last=False)
+    else:
+        _matcher_cache.move_to_end(key)
+    return matcher
+
+
+def register_stage_matcher(script: Dict[str, Any], matcher: StageMatcher) -> None:
+    """Enregistre un matcher déjà construit (ex : chargé depuis un artefact précompilé)."""
+    key = script_signature(script)
+    _matcher_cache[key] = matcher
+    _matcher_cache.move_to_end(key)
+    if len(_matcher_cache) > MATCHER_CACHE_SIZE:
+        _matcher_cache.popitem(last=False)
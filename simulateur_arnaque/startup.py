@@ -0,0 +1,152 @@
+"""
+Démarrage du simulateur : profil des temps d'import et préchauffage des clients LLM
+
+Les dépendances lourdes (LangChain, SDK Google) ne sont plus importées au
+chargement de main.py. Pendant que l'utilisateur choisit le scénario, un
+thread de préchauffage les importe et crée les clients LLM dans le pool
+partagé (voir llm.factory) : les agents les récupèrent ensuite sans attendre.
+
+Avec --startup-profile, chaque module importé est chronométré (temps cumulé,
+imports imbriqués compris) ainsi que les phases d'initialisation.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Modules importés par le préchauffage (dans cet ordre)
+WARMUP_MODULES = (
+    "langchain_core.messages",
+    "simulateur_arnaque.agents.victim_agent",
+    "simulateur_arnaque.agents.moderator",
+    "simulateur_arnaque.audience_events",
+)
+
+
+class _ImportTimer(MetaPathFinder):
+    """Chronomètre l'exécution de chaque module importé"""
+
+    def __init__(self, timings: Dict[str, float]):
+        self.timings = timings
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        # Éviter la récursion : on délègue aux autres finders
+        if getattr(self._local, "active", False):
+            return None
+        self._local.active = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.active = False
+
+        loader = spec.loader
+        # Les loaders partagés (modules intégrés, gelés) ne sont pas instrumentés
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+        timings = self.timings
+
+        def timed_exec_module(module):
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                timings[fullname] = time.perf_counter() - start
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+
+class StartupProfile:
+    """Temps d'import par module et durée des phases de démarrage"""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Chronométrer les imports et les phases (--startup-profile)
+        """
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.phases: List[Tuple[str, float, str]] = []
+        self._timer: Optional[_ImportTimer] = None
+        if enabled:
+            self._timer = _ImportTimer(self.imports)
+            sys.meta_path.insert(0, self._timer)
+
+    @contextmanager
+    def phase(self, label: str) -> Iterator[None]:
+        """Chronométrer une phase d'initialisation"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((label, time.perf_counter() - start, threading.current_thread().name))
+
+    def stop(self) -> None:
+        """Retirer le chronomètre des imports"""
+        if self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def report(self, console, min_ms: float = 5.0) -> None:
+        """Afficher les temps mesurés (modules au-delà de min_ms)"""
+        if not self.enabled:
+            return
+        self.stop()
+        console.print("\n[bold]⏱️  Profil de démarrage[/bold]")
+        console.print("[yellow]Phases :[/yellow]")
+        for label, seconds, thread in self.phases:
+            console.print(f"  {seconds * 1000:8.1f} ms  {label} [dim]({thread})[/dim]")
+        console.print(f"[yellow]Imports (temps cumulé ≥ {min_ms:g} ms) :[/yellow]")
+        for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+            if seconds * 1000 >= min_ms:
+                console.print(f"  {seconds * 1000:8.1f} ms  {name}")
+        console.print(f"[yellow]Depuis le lancement :[/yellow] {(time.perf_counter() - self.started) * 1000:.1f} ms")
+
+
+def warm_up(profile: StartupProfile) -> threading.Thread:
+    """
+    Importer les agents et créer les clients LLM en arrière-plan
+
+    Les erreurs sont ignorées ici : elles réapparaîtront (et seront affichées)
+    à la création des agents.
+
+    Returns:
+        Le thread de préchauffage (déjà démarré)
+    """
+    def run():
+        try:
+            for module in WARMUP_MODULES:
+                with profile.phase(f"import {module}"):
+                    importlib.import_module(module)
+
+            from .config.llm_config import VICTIM_TEMPERATURE
+            from .agents.moderator import MODERATOR_MODEL, MODERATOR_LOCATION, MODERATOR_TEMPERATURE
+            from .llm.factory import create_chat_model
+            with profile.phase("client LLM victime"):
+                create_chat_model(temperature=VICTIM_TEMPERATURE)
+            with profile.phase("client LLM modérateur"):
+                create_chat_model(
+                    temperature=MODERATOR_TEMPERATURE,
+                    model=MODERATOR_MODEL,
+                    location=MODERATOR_LOCATION
+                )
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run, name="llm-warmup", daemon=True)
+    thread.start()
+    return thread
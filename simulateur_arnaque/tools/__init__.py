@@ -6,6 +6,20 @@ Tools disponibles:
 - Audio tools: play_dog_bark, play_cough, play_doorbell, etc.
 """
 
-from .audio_tools import AudioEffectsManager, get_audio_tools, get_audio_manager
+import importlib
 
-__all__ = ["AudioEffectsManager", "get_audio_tools", "get_audio_manager"]
\ No newline at end of file
+# Imports différés : LangChain et les SDK des fournisseurs ne sont chargés
+# qu'au premier accès à une classe (et pas à l'import du package)
+_LAZY_IMPORTS = {
+    "AudioEffectsManager": ".audio_tools",
+    "get_audio_tools": ".audio_tools",
+    "get_audio_manager": ".audio_tools",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,5 +3,21 @@ Tests Package - Tests unitaires et d'intégration
 
 Tests disponibles:
 - test_victim_agent: Tests pour VictimAgent
+- test_victim_streaming: Tests pour le streaming des réponses de la victime (arrêt anticipé)
+- test_memory: Tests pour la mémoire à budget de tokens
 - test_audio_tools: Tests pour les outils audio
+- test_director: Tests pour le Director et la détection des étapes
+- test_script_loader: Tests pour le registre des scripts d'arnaque
+- test_llm_backend: Tests pour le backend LLM local (fake) et la factory
+- test_rate_limiter: Tests pour la limitation de débit des appels LLM
+- test_hedging: Tests pour le doublement des appels lents et les nouvelles tentatives
+- test_circuit_breaker: Tests pour le disjoncteur et les réponses de secours
+- test_instrumentation: Tests pour les mesures des appels LLM (histogrammes, JSONL, Prometheus)
+- test_response_cache: Tests pour le cache des réponses LLM et les cassettes
+- test_batching: Tests pour le micro-batching des appels LLM
+- test_suggestion_filter: Tests pour le pré-filtrage local des suggestions de l'audience
+- test_decision_cache: Tests pour la mémoïsation des décisions du modérateur
+- test_event_ranker: Tests pour la sélection locale des événements (sans LLM)
+- test_tournament: Tests pour la modération par tournoi des grands ensembles de suggestions
+- test_startup: Tests pour les imports différés et le profil de démarrage
 """
\ No newline at end of file
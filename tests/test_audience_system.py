@@ -7,8 +7,9 @@ Tests pour:
 - AudienceEventManager
 """
 
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from simulateur_arnaque.agents.moderator import ModeratorAgent
 from simulateur_arnaque.audience_interface import AudienceInterface, AudienceEvent
 from simulateur_arnaque.audience_events import AudienceEventManager
@@ -314,6 +315,129 @@ class TestAudienceEventManager:
         assert manager.current_constraint is None
         assert manager.last_event is None
 
+    
+    def test_aprocess_audience_round_with_suggestions(self, mock_moderator, mock_interface):
+        """Test la version asynchrone d'un tour avec suggestions"""
+        mock_moderator.afilter_and_select = AsyncMock(
+            return_value=mock_moderator.filter_and_select.return_value
+        )
+        manager = AudienceEventManager(
+            moderator=mock_moderator,
+            interface=mock_interface
+        )
+        
+        constraint = asyncio.run(manager.aprocess_audience_round(
+            conversation_context="Test context",
+            current_objective="Test objective",
+            collect_mode="simulated",
+            vote_mode="simulated"
+        ))
+        
+        assert constraint == "CONSTRAINT TEXT"
+        assert mock_moderator.afilter_and_select.await_count == 1
+        assert not mock_moderator.filter_and_select.called
+    
+    def test_aprocess_audience_round_without_suggestions(self, mock_moderator, mock_interface):
+        """Test la version asynchrone d'un tour sans suggestions"""
+        mock_interface.collect_suggestions.return_value = []
+        mock_moderator.agenerate_fallback_events = AsyncMock(
+            return_value=mock_moderator.generate_fallback_events.return_value
+        )
+        manager = AudienceEventManager(
+            moderator=mock_moderator,
+            interface=mock_interface
+        )
+        
+        constraint = asyncio.run(manager.aprocess_audience_round(
+            conversation_context="Test context",
+            collect_mode="simulated",
+            vote_mode="simulated"
+        ))
+        
+        assert constraint is not None
+        assert mock_moderator.agenerate_fallback_events.await_count == 1
+
+    def test_should_prefetch(self, mock_moderator, mock_interface):
+        """Test: la modération est lancée un tour avant le vote"""
+        manager = AudienceEventManager(
+            moderator=mock_moderator,
+            interface=mock_interface,
+            vote_frequency=3,
+            prefetch_turns=1
+        )
+
+        prefetch_turns = []
+        for turn in range(1, 7):
+            manager.should_trigger_audience()
+            if manager.should_prefetch():
+                prefetch_turns.append(turn)
+
+        assert prefetch_turns == [2, 5]
+
+    def test_prefetched_options_are_used(self, mock_moderator, mock_interface):
+        """Test: au tour du vote, les options préparées en avance sont réutilisées"""
+        manager = AudienceEventManager(moderator=mock_moderator, interface=mock_interface)
+
+        assert manager.prefetch("Test context", collect_mode="simulated", script_id="bank", stage_id="intro")
+        constraint = manager.process_audience_round(
+            conversation_context="Test context",
+            collect_mode="simulated",
+            vote_mode="simulated",
+            script_id="bank",
+            stage_id="intro"
+        )
+        manager.close()
+
+        assert constraint == "CONSTRAINT TEXT"
+        assert mock_moderator.filter_and_select.call_count == 1
+        assert mock_interface.collect_suggestions.call_count == 1
+        assert manager.get_statistics()['prefetch']['used'] == 1
+
+    def test_prefetch_discarded_when_stage_changes(self, mock_moderator, mock_interface):
+        """Test: options préparées pour une autre étape -> nouvelle modération"""
+        manager = AudienceEventManager(moderator=mock_moderator, interface=mock_interface)
+
+        manager.prefetch("Test context", collect_mode="simulated", script_id="bank", stage_id="intro")
+        manager.process_audience_round(
+            conversation_context="Test context",
+            collect_mode="simulated",
+            vote_mode="simulated",
+            script_id="bank",
+            stage_id="code_securite"
+        )
+        manager.close()
+
+        assert mock_interface.collect_suggestions.call_count == 1
+        assert mock_moderator.filter_and_select.call_count == 2
+        assert manager.prefetch_stats['stale'] == 1
+
+    def test_failed_prefetch_moderates_again(self, mock_moderator, mock_interface):
+        """Test: une modération en avance en échec ne fait pas échouer le tour"""
+        events = mock_moderator.filter_and_select.return_value
+        mock_moderator.filter_and_select.side_effect = [RuntimeError("API indisponible"), events]
+        manager = AudienceEventManager(moderator=mock_moderator, interface=mock_interface)
+
+        manager.prefetch("Test context", collect_mode="simulated", script_id="bank", stage_id="intro")
+        constraint = manager.process_audience_round(
+            conversation_context="Test context",
+            collect_mode="simulated",
+            vote_mode="simulated",
+            script_id="bank",
+            stage_id="intro"
+        )
+        manager.close()
+
+        assert constraint == "CONSTRAINT TEXT"
+        assert mock_interface.collect_suggestions.call_count == 1
+        assert mock_moderator.filter_and_select.call_count == 2
+        assert manager.prefetch_stats['failed'] == 1
+
+    def test_no_prefetch_for_console(self, mock_moderator, mock_interface):
+        """Test: pas de collecte en avance quand les suggestions sont saisies à la console"""
+        manager = AudienceEventManager(moderator=mock_moderator, interface=mock_interface)
+
+        assert not manager.prefetch("Test context", collect_mode="console")
+        assert not mock_interface.collect_suggestions.called
 
 class TestIntegration:
     """Tests d'intégration pour le système complet"""
@@ -0,0 +1,155 @@
+"""
+Tests unitaires pour le micro-batching des appels LLM
+
+Tests pour:
+- MicroBatcher (fenêtre de collecte, taille maximum, erreurs par requête)
+- BatchedChatModel (invoke / ainvoke, statistiques)
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+from simulateur_arnaque.llm.batching import BatchedChatModel, MicroBatcher
+from simulateur_arnaque.llm.rate_limiter import RateLimitedChatModel, RateLimiter
+
+
+class RecordingModel(FakeChatModel):
+    """Modèle qui note la taille de chaque batch reçu"""
+
+    def __init__(self):
+        super().__init__(latency_ms=0, tokens_per_second=0)
+        self.batch_sizes = []
+
+    def batch(self, inputs, *args, **kwargs):
+        self.batch_sizes.append(len(inputs))
+        return [
+            ValueError("prompt refusé") if "refusé" in text else self.invoke(text)
+            for text in inputs
+        ]
+
+
+class ConcurrencyModel(FakeChatModel):
+    """Modèle qui note le nombre maximum d'appels simultanés"""
+
+    def __init__(self):
+        super().__init__(latency_ms=20, tokens_per_second=0)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def invoke(self, input, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return super().invoke(input)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _submit_concurrently(batcher, prompts):
+    """Soumettre depuis plusieurs threads (une session par thread)"""
+    results = [None] * len(prompts)
+
+    def call(i):
+        try:
+            results[i] = batcher.submit(prompts[i]).result(timeout=5)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestMicroBatcher:
+    """Tests pour le batcher"""
+
+    def test_requests_in_window_share_a_batch(self):
+        """Test: les requêtes arrivées dans la fenêtre partent ensemble"""
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=8, max_wait=0.1)
+
+        results = _submit_concurrently(batcher, [f"Bonjour {i}" for i in range(5)])
+
+        assert all(r.content for r in results)
+        assert model.batch_sizes == [5]
+
+    def test_full_batch_does_not_wait(self):
+        """Test: un batch plein part sans attendre la fin de la fenêtre"""
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=2, max_wait=5.0)
+
+        start = time.monotonic()
+        _submit_concurrently(batcher, ["Bonjour", "Allô"])
+
+        assert time.monotonic() - start < 1.0
+        assert model.batch_sizes == [2]
+
+    def test_errors_go_to_their_caller(self):
+        """Test: une erreur dans le batch ne concerne que sa requête"""
+        batcher = MicroBatcher(RecordingModel(), max_batch_size=2, max_wait=0.1)
+
+        ok, refused = _submit_concurrently(batcher, ["Bonjour", "prompt refusé"])
+
+        assert ok.content
+        assert isinstance(refused, ValueError)
+        assert batcher.get_stats()["errors"] == 1
+
+    def test_stats(self):
+        """Test: taille moyenne, appels économisés et débit sont rapportés"""
+        batcher = MicroBatcher(RecordingModel(), max_batch_size=4, max_wait=0.05)
+
+        _submit_concurrently(batcher, [f"Bonjour {i}" for i in range(8)])
+        stats = batcher.get_stats()
+
+        assert stats["requests"] == 8
+        assert stats["calls_saved"] == 8 - stats["batches"]
+        assert stats["avg_batch_size"] >= 2
+        assert stats["requests_per_second"] > 0
+
+
+class TestBatchedChatModel:
+    """Tests pour le modèle à micro-batching"""
+
+    def test_async_callers_are_batched(self):
+        """Test: des ainvoke concurrents sont regroupés"""
+        model = RecordingModel()
+        batched = BatchedChatModel(model, MicroBatcher(model, max_batch_size=8, max_wait=0.05))
+
+        async def main():
+            return await asyncio.gather(*(batched.ainvoke(f"Bonjour {i}") for i in range(3)))
+
+        assert len(asyncio.run(main())) == 3
+        assert model.batch_sizes == [3]
+
+    def test_invoke_raises_caller_error(self):
+        """Test: invoke lève l'erreur de sa propre requête"""
+        model = RecordingModel()
+        batched = BatchedChatModel(model, MicroBatcher(model, max_batch_size=1, max_wait=0))
+
+        with pytest.raises(ValueError):
+            batched.invoke("prompt refusé")
+
+    def test_call_options_bypass_the_batcher(self):
+        """Test: un appel avec des options (stop, config) part directement avec ses options"""
+        model = RecordingModel()
+        batched = BatchedChatModel(model, MicroBatcher(model, max_batch_size=8, max_wait=0.05))
+
+        assert batched.invoke("Bonjour", stop=["."]).content
+        assert model.batch_sizes == []
+
+    def test_rate_limited_batch_respects_concurrency(self):
+        """Test: un batch ne dépasse pas le nombre d'appels simultanés du limiteur"""
+        model = ConcurrencyModel()
+        limited = RateLimitedChatModel(model, RateLimiter(max_concurrency=2))
+
+        assert len(limited.batch([f"Bonjour {i}" for i in range(8)])) == 8
+        assert model.max_active == 2
+        assert limited.limiter.in_flight == 0
@@ -0,0 +1,151 @@
+"""
+Tests unitaires pour le disjoncteur et les réponses de secours
+
+Tests pour:
+- CircuitBreaker (ouverture, SLO, semi-ouverture)
+- CannedResponder (répliques selon l'étape du script)
+- pick_default_events (tirage pondéré)
+"""
+
+import random
+import time
+import pytest
+from simulateur_arnaque.agents import moderator as moderator_module
+from simulateur_arnaque.agents.moderator import ModeratorAgent
+from simulateur_arnaque.llm.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from simulateur_arnaque.llm.response_cache import CassetteMissError
+from simulateur_arnaque.agents.canned_responses import CannedResponder, pick_default_events
+from simulateur_arnaque.audience_events import DEFAULT_EVENTS
+
+
+SCRIPT = {
+    'stages': [
+        {'stage_id': 'appel_banque', 'victim_objectives': [
+            "Demander le nom complet et le service du conseiller",
+            "Proposer de rappeler la banque directement"
+        ]},
+        {'stage_id': 'code_securite', 'victim_objectives': [
+            "REFUSER ABSOLUMENT de communiquer tout code"
+        ]}
+    ]
+}
+
+
+class TestCircuitBreaker:
+    """Tests pour le disjoncteur"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test: N échecs consécutifs ouvrent le disjoncteur"""
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+        for _ in range(3):
+            assert breaker.allow()
+            breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_success_resets_count(self):
+        """Test: un succès remet le compteur d'échecs à zéro"""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        breaker.record_failure()
+
+        assert breaker.state == CLOSED
+
+    def test_slo_violation_counts_as_failure(self):
+        """Test: un appel plus lent que le SLO compte comme un échec"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60, slo_seconds=1.0)
+        breaker.record_success(2.5)
+
+        assert breaker.state == OPEN
+        assert breaker.get_stats()["slo_violations"] == 1
+
+    def test_half_open_probe(self):
+        """Test: après le délai, un seul appel de test passe et referme le disjoncteur"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        """Test: un appel de test en échec rouvre le disjoncteur"""
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_released_probe_can_be_retried(self):
+        """Test: un appel de test abandonné (cassette) libère sa place sans changer l'état"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+    def test_cassette_miss_releases_probe(self, monkeypatch):
+        """Test: une réponse absente de la cassette pendant l'appel de test ne bloque pas le disjoncteur"""
+        class _MissingModel:
+            def invoke(self, input, *args, **kwargs):
+                raise CassetteMissError("absente")
+
+        monkeypatch.setattr(moderator_module, "create_chat_model", lambda **kwargs: _MissingModel())
+        agent = ModeratorAgent()
+        agent.breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        agent.breaker.record_failure()
+        time.sleep(0.06)
+
+        with pytest.raises(CassetteMissError):
+            agent._guarded_invoke(_MissingModel(), [], "select")
+        assert agent.breaker.allow()
+
+
+class TestCannedResponses:
+    """Tests pour les réponses de secours"""
+
+    def test_lines_follow_objective(self):
+        """Test: la réplique correspond à l'objectif courant"""
+        canned = CannedResponder(SCRIPT)
+
+        line = canned.respond("REFUSER ABSOLUMENT de communiquer tout code")
+
+        assert "non" in line.lower()
+
+    def test_stage_objectives_add_lines(self):
+        """Test: les autres objectifs de l'étape enrichissent les répliques"""
+        canned = CannedResponder(SCRIPT)
+        objective = "Demander le nom complet et le service du conseiller"
+
+        lines = {canned.respond(objective) for _ in range(6)}
+
+        assert len(lines) == 6
+        assert any("banque" in line or "agence" in line or "fils" in line for line in lines)
+
+    def test_unknown_objective_has_generic_line(self):
+        """Test: un objectif inconnu donne une réplique générique"""
+        assert CannedResponder().respond("Listen politely and be confused")
+
+    def test_weighted_events(self):
+        """Test: tirage sans doublon, en évitant les événements récents"""
+        recent = [e['event'] for e in DEFAULT_EVENTS[:5]]
+
+        events = pick_default_events(3, exclude=recent, rng=random.Random(0))
+
+        assert len({e['event'] for e in events}) == 3
+        assert not any(e['event'] in recent for e in events)
+        assert set(events[0]) == {'event', 'description'}
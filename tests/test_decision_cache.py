@@ -0,0 +1,134 @@
+"""
+Tests unitaires pour la mémoïsation des décisions du modérateur
+
+Tests pour:
+- DecisionCache (LRU, durée de vie)
+- ModeratorAgent (décisions et verdicts par suggestion réutilisés)
+"""
+
+import pytest
+from langchain_core.messages import AIMessage
+from simulateur_arnaque.agents import moderator as moderator_module
+from simulateur_arnaque.agents.decision_cache import DecisionCache
+from simulateur_arnaque.agents.moderator import ModeratorAgent
+
+
+class _ScriptedModel:
+    """Modèle qui renvoie toujours la même réponse et compte les appels"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, input, *args, **kwargs):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+
+SELECTION = """1. [Le chien aboie] - Jeanne doit calmer Poupoune
+2. [La casserole déborde] - Elle court à la cuisine
+3. [La voisine frappe à la fenêtre] - Elle veut emprunter du sucre
+REJETÉES: Un dragon vole au-dessus de la maison; La télé explose"""
+
+SUGGESTIONS = [
+    "Le chien aboie", "La casserole déborde", "La voisine frappe à la fenêtre",
+    "Le facteur sonne à la porte", "La télé s'éteint toute seule",
+]
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    """ModeratorAgent branché sur un modèle scripté, avec des caches vides"""
+    model = _ScriptedModel(SELECTION)
+    monkeypatch.setattr(moderator_module, "create_chat_model", lambda **kwargs: model)
+    agent = ModeratorAgent()
+    agent.decisions = DecisionCache()
+    agent.verdicts = DecisionCache()
+    return agent, model
+
+
+class TestDecisionCache:
+    """Tests pour le LRU à durée de vie"""
+
+    def test_ttl_expires_entries(self):
+        """Test: une entrée trop ancienne n'est plus servie"""
+        now = [0.0]
+        cache = DecisionCache(max_entries=10, ttl=60, clock=lambda: now[0])
+        cache.put("k", [1])
+
+        assert cache.get("k") == [1]
+        now[0] = 61
+        assert cache.get("k") is None
+        assert cache.get_stats()["expired"] == 1
+
+    def test_lru_eviction(self):
+        """Test: l'entrée la moins récemment utilisée est évincée"""
+        cache = DecisionCache(max_entries=2, ttl=0)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_returns_copies(self):
+        """Test: modifier une valeur servie ne modifie pas le cache"""
+        cache = DecisionCache(max_entries=2, ttl=0)
+        cache.put("k", [{"event": "x"}])
+        cache.get("k")[0]["event"] = "y"
+
+        assert cache.get("k") == [{"event": "x"}]
+
+
+class TestModeratorMemoization:
+    """Tests pour les décisions mémorisées du modérateur"""
+
+    def test_same_set_same_stage_is_cached(self, scripted):
+        """Test: même ensemble normalisé, même script et même étape : pas de nouvel appel"""
+        agent, model = scripted
+        first = agent.filter_and_select(SUGGESTIONS, "ctx 1", script_id="bank", stage_id="intro")
+        second = agent.filter_and_select(
+            [s.upper() for s in reversed(SUGGESTIONS)], "ctx 2", script_id="bank", stage_id="intro"
+        )
+
+        assert model.calls == 1
+        assert second == first
+        assert agent.get_decision_cache_stats()["decisions"]["hits"] == 1
+
+    def test_other_stage_is_a_miss(self, scripted):
+        """Test: une autre étape demande une nouvelle décision"""
+        agent, model = scripted
+        agent.filter_and_select(SUGGESTIONS, "ctx", script_id="bank", stage_id="intro")
+        agent.filter_and_select(SUGGESTIONS, "ctx", script_id="bank", stage_id="code")
+
+        assert model.calls == 2
+
+    def test_overlapping_set_reuses_verdicts(self, scripted):
+        """Test: 3 suggestions déjà retenues suffisent pour un ensemble qui se recoupe"""
+        agent, model = scripted
+        agent.filter_and_select(SUGGESTIONS, "ctx", script_id="bank", stage_id="intro")
+        events = agent.filter_and_select(
+            SUGGESTIONS[:3] + ["Le chat renverse un vase"], "ctx", script_id="bank", stage_id="intro"
+        )
+
+        assert model.calls == 1
+        assert [e['event'] for e in events] == ["Le chien aboie", "La casserole déborde", "La voisine frappe à la fenêtre"]
+
+    def test_rejected_verdicts_are_not_resent(self, scripted):
+        """Test: une suggestion déjà rejetée n'est plus envoyée au LLM"""
+        agent, model = scripted
+        agent.verdicts.put(("b", "s", "le facteur sonne a la porte"), False)
+        prepared = agent.suggestion_filter.prepare(["Le facteur sonne à la porte", "La toux"])
+        _, pending = agent._plan_selection(prepared, ("b", "s"))
+        assert pending.suggestions == ["La toux"]
+
+    def test_fallback_generation_is_cached(self, scripted):
+        """Test: génération de secours mémorisée par script et étape"""
+        agent, model = scripted
+        first = agent.generate_fallback_events("Script: A\nDernière phrase: x", script_id="bank", stage_id="intro")
+        second = agent.generate_fallback_events("Script: A\nDernière phrase: y", script_id="bank", stage_id="intro")
+
+        assert model.calls == 1
+        assert second == first
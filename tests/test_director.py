@@ -0,0 +1,286 @@
+"""
+Tests unitaires pour le Director (Partie 2)
+
+Tests pour:
+- StageMatcher (détection compilée des signaux)
+- analyze_conversation
+- DirectorState (analyse incrémentale)
+- RiskTracker (risque agrégé par message)
+- analyze_batch (analyse vectorisée par lot)
+"""
+
+import re
+import pytest
+from unittest.mock import patch
+from simulateur_arnaque.scripts import script_loader
+from simulateur_arnaque.scripts.signal_matcher import StageMatcher, get_stage_matcher
+from simulateur_arnaque.agents import director
+from simulateur_arnaque.agents.director_batch import analyze_batch
+
+
+def _reference_find_stage(history, script):
+    """Implémentation naïve (un re.search par signal et par message) servant de référence"""
+    completed = []
+    current_stage_id = script['stages'][0]['stage_id']
+    for stage in script['stages']:
+        found = any(
+            re.search(rf"\b{re.escape(signal)}\b", msg['content'], re.IGNORECASE)
+            for signal in stage['success_signals']
+            for msg in history
+        )
+        if not found:
+            break
+        completed.append(stage['stage_id'])
+        current_stage_id = stage['stage_id']
+    return current_stage_id, completed
+
+
+def _reference_risk_level(history):
+    """Calcul du risque sur tout l'historique concaténé (implémentation d'origine)"""
+    text = " ".join(m['content'].lower() for m in history)
+    levels = [
+        (3, ["iban", "carte", "sms", "otp", "paiement", "numéro de carte", "virement", "mot de passe"]),
+        (2, ["teamviewer", "anydesk", "prise en main", "installer un logiciel"]),
+        (1, ["urgence", "immédiat", "dépêcher", "vite"]),
+    ]
+    for level, patterns in levels:
+        if any(re.search(p, text) for p in patterns):
+            return level
+    return 0
+
+
+SAMPLE_LINES = [
+    "Bonjour, ici le support Microsoft, votre ordinateur a un virus !",
+    "Oh non, que dois-je faire ?",
+    "Ouvrez le gestionnaire des tâches s'il vous plaît.",
+    "Installez AnyDesk pour que je puisse vous aider.",
+    "Il faut payer par carte bancaire, c'est urgent !",
+    "Votre banque a détecté une activité suspecte sur votre compte.",
+    "Donnez-moi le code reçu par SMS.",
+    "Les virusmania ne comptent pas.",
+]
+
+
+class TestStageMatcher:
+    """Tests pour le matcher compilé des signaux"""
+
+    @pytest.fixture(params=["microsoft_support", "bank_fraud"])
+    def script(self, request):
+        """Charger chaque script livré avec le projet"""
+        return script_loader.load_script(request.param)
+
+    def test_matcher_cached_per_script(self, script):
+        """Test que le matcher est construit une seule fois par script"""
+        assert get_stage_matcher(script) is get_stage_matcher(script)
+
+    def test_word_boundaries(self):
+        """Test que les signaux ne matchent que des mots entiers"""
+        script = {
+            'script_id': "test",
+            'stages': [
+                {'stage_id': "a", 'success_signals': ["virus"]},
+                {'stage_id': "b", 'success_signals': ["carte bancaire"]},
+                {'stage_id': "c", 'success_signals': ["carte"]},
+            ]
+        }
+        matcher = StageMatcher(script)
+
+        assert matcher.stages_in("un VIRUS détecté") == {0}
+        assert matcher.stages_in("virusmania") == set()
+        # "carte bancaire" implique aussi le signal plus court "carte"
+        assert matcher.stages_in("votre carte bancaire") == {1, 2}
+        assert matcher.stages_in("vos cartes bancaires") == set()
+
+    def test_matches_reference_implementation(self, script):
+        """Test que _find_stage donne le même résultat que la recherche naïve"""
+        for end in range(len(SAMPLE_LINES) + 1):
+            history = [{"role": "scammer", "content": line} for line in SAMPLE_LINES[:end]]
+            assert director._find_stage(history, script) == _reference_find_stage(history, script)
+
+
+class TestAnalyzeConversation:
+    """Tests pour analyze_conversation"""
+
+    def test_progression_microsoft(self):
+        """Test la progression des étapes sur le scénario Microsoft"""
+        script = script_loader.load_script("microsoft_support")
+        history = [
+            {"role": "scammer", "content": SAMPLE_LINES[0]},
+            {"role": "victim", "content": SAMPLE_LINES[1]},
+            {"role": "scammer", "content": SAMPLE_LINES[2]},
+        ]
+
+        update = director.analyze_conversation(history, script)
+
+        assert update.script_id == "microsoft_support"
+        assert update.completed_stages == ["alert_initiale", "verification_technique"]
+        assert update.stage_id == "verification_technique"
+        assert update.next_objective_for_victim
+
+
+class TestDirectorState:
+    """Tests pour l'analyse incrémentale du Director"""
+
+    @pytest.fixture(params=["microsoft_support", "bank_fraud"])
+    def script(self, request):
+        """Charger chaque script livré avec le projet"""
+        return script_loader.load_script(request.param)
+
+    def test_incremental_matches_full_analysis(self, script):
+        """Test que l'état incrémental donne les mêmes résultats qu'une analyse complète"""
+        state = director.DirectorState(script)
+        history = []
+
+        for i, line in enumerate(SAMPLE_LINES):
+            history.append({"role": "scammer" if i % 2 == 0 else "victim", "content": line})
+            incremental = state.update(history)
+            full = director.analyze_conversation(history, script)
+            stage_id, completed = _reference_find_stage(history, script)
+
+            assert incremental == full
+            assert (incremental.stage_id, incremental.completed_stages) == (stage_id, completed)
+            assert incremental.risk_level == _reference_risk_level(history)
+
+    def test_only_new_messages_are_scanned(self, script):
+        """Test que les messages déjà analysés ne sont pas relus"""
+        state = director.DirectorState(script)
+        history = [{"role": "scammer", "content": line} for line in SAMPLE_LINES[:3]]
+        state.update(history)
+
+        history.append({"role": "scammer", "content": SAMPLE_LINES[3]})
+        with patch.object(state.matcher, 'stages_in', wraps=state.matcher.stages_in) as spy:
+            state.update(history)
+
+        assert [c.args[0] for c in spy.call_args_list] == [SAMPLE_LINES[3]]
+
+    def test_rebind_carries_state_over(self, script):
+        """Test que l'état survit au rechargement du script quand les stage_id existent encore"""
+        state = director.DirectorState(script)
+        history = [{"role": "scammer", "content": line} for line in SAMPLE_LINES]
+        before = state.update(history)
+        reloaded = dict(script, stages=[dict(stage) for stage in script['stages']])
+        reloaded['stages'][0]['victim_objectives'] = ["Nouvel objectif"]
+        reloaded['stages'][-1]['stage_id'] = "etape_renommee"
+
+        rebound = state.rebind(reloaded)
+        after = rebound.update(history)
+
+        assert rebound.processed_messages == len(history)
+        assert after.completed_stages == [s for s in before.completed_stages if s != script['stages'][-1]['stage_id']]
+        assert after.risk_level == before.risk_level
+
+    def test_reset_when_history_cleared(self, script):
+        """Test qu'un historique vidé réinitialise l'état"""
+        state = director.DirectorState(script)
+        state.update([{"role": "scammer", "content": line} for line in SAMPLE_LINES])
+
+        update = state.update([])
+
+        assert update.completed_stages == []
+        assert update.risk_level == 0
+        assert update.stage_id == script['stages'][0]['stage_id']
+
+
+    def test_reset_when_history_replaced(self, script):
+        """Test qu'un autre historique, aussi long, réinitialise l'état"""
+        state = director.DirectorState(script)
+        state.update([{"role": "scammer", "content": line} for line in SAMPLE_LINES])
+        other = [{"role": "scammer", "content": "Bonjour madame, il fait beau aujourd'hui"}] * len(SAMPLE_LINES)
+
+        update = state.update(other)
+
+        assert update == director.analyze_conversation(other, script)
+        assert update.completed_stages == []
+        assert update.risk_level == 0
+
+
+class TestRiskTracker:
+    """Tests pour l'agrégat de risque"""
+
+    def test_factors_recorded(self):
+        """Test que les catégories responsables du niveau sont enregistrées"""
+        tracker = director.RiskTracker()
+
+        tracker.add("Installez AnyDesk, vite !")
+
+        assert tracker.level == 2
+        assert tracker.factors == ["remote"]
+
+    def test_default_never_decreases(self):
+        """Test que sans decay ni fenêtre, le risque reste au maximum atteint"""
+        tracker = director.RiskTracker()
+        tracker.add("Donnez-moi votre IBAN")
+
+        for _ in range(20):
+            tracker.add("Bon, parlons de la météo.")
+
+        assert tracker.level == 3
+        assert tracker.factors == ["sensitive"]
+
+    def test_window_lets_risk_come_down(self):
+        """Test que la fenêtre glissante fait redescendre le risque"""
+        tracker = director.RiskTracker(window=3)
+        tracker.add("Donnez-moi votre IBAN")
+        tracker.add("Il faut faire vite")
+        assert tracker.level == 3
+
+        tracker.add("Bon.")
+        tracker.add("D'accord.")
+
+        assert tracker.level == 1
+        assert tracker.factors == ["urgent"]
+
+    def test_decay_lets_risk_come_down(self):
+        """Test que le decay éteint progressivement une catégorie"""
+        tracker = director.RiskTracker(decay=0.5)
+        tracker.add("Quel est votre mot de passe ?")
+        tracker.add("Bon.")
+        assert tracker.level == 3
+
+        tracker.add("D'accord.")
+
+        assert tracker.level == 0
+        assert tracker.factors == []
+
+    def test_state_exposes_factors(self):
+        """Test que DirectorUpdate transporte les catégories de risque"""
+        script = script_loader.load_script("bank_fraud")
+        update = director.analyze_conversation(
+            [{"role": "scammer", "content": "Donnez-moi le code reçu par SMS."}], script
+        )
+
+        assert update.risk_level == 3
+        assert update.risk_factors == ["sensitive"]
+
+
+class TestAnalyzeBatch:
+    """Tests pour l'analyse vectorisée par lot"""
+
+    @pytest.fixture(params=["microsoft_support", "bank_fraud"])
+    def script(self, request):
+        """Charger chaque script livré avec le projet"""
+        return script_loader.load_script(request.param)
+
+    def test_batch_matches_analyze_conversation(self, script):
+        """Test que le lot donne les mêmes DirectorUpdate qu'une analyse individuelle"""
+        transcripts = [
+            [{"role": "scammer", "content": line} for line in SAMPLE_LINES[start:end]]
+            for start in range(len(SAMPLE_LINES))
+            for end in range(start, len(SAMPLE_LINES) + 1)
+        ]
+
+        result = analyze_batch(transcripts, script)
+
+        assert len(result) == len(transcripts)
+        expected = [director.analyze_conversation(t, script) for t in transcripts]
+        assert result.to_updates() == expected
+        assert result.current_stage_ids() == [u.stage_id for u in expected]
+
+    def test_empty_batch(self, script):
+        """Test qu'un lot vide ou des transcriptions vides sont gérés"""
+        assert len(analyze_batch([], script)) == 0
+
+        result = analyze_batch([[], []], script)
+
+        assert result.completed_count.tolist() == [0, 0]
+        assert result.risk_level.tolist() == [0, 0]
@@ -0,0 +1,131 @@
+"""
+Tests unitaires pour la sélection locale des événements (sans LLM)
+
+Tests pour:
+- tfidf_similarities (n-grammes de caractères)
+- LocalEventRanker (priors lus dans les scripts, doublons avec DEFAULT_EVENTS)
+- ModeratorAgent en mode "local" / "auto" et compare_with_llm
+"""
+
+import pytest
+from langchain_core.messages import AIMessage
+from simulateur_arnaque.agents import moderator as moderator_module
+from simulateur_arnaque.agents.decision_cache import DecisionCache
+from simulateur_arnaque.agents.event_ranker import LocalEventRanker, compare_with_llm, tfidf_similarities
+from simulateur_arnaque.agents.moderator import ModeratorAgent
+from simulateur_arnaque.agents.suggestion_filter import SuggestionFilter
+
+
+class _ScriptedModel:
+    """Modèle qui renvoie toujours la même sélection et compte les appels"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, input, *args, **kwargs):
+        self.calls += 1
+        return AIMessage(content="1. [Le chien aboie] - a\n2. [La sonnette retentit] - b\n3. [Le chat renverse un vase] - c")
+
+
+@pytest.fixture
+def agent_factory(monkeypatch):
+    """Crée un ModeratorAgent branché sur un modèle scripté"""
+    model = _ScriptedModel()
+    monkeypatch.setattr(moderator_module, "create_chat_model", lambda **kwargs: model)
+
+    def build(selection_mode):
+        agent = ModeratorAgent(selection_mode=selection_mode)
+        agent.decisions = DecisionCache()
+        agent.verdicts = DecisionCache()
+        return agent, model
+    return build
+
+
+class TestLocalEventRanker:
+    """Tests pour le classement local"""
+
+    def test_tfidf_prefers_matching_document(self):
+        """Test: le document qui partage le plus de n-grammes avec la requête arrive en tête"""
+        scores = tfidf_similarities(["Jeanne cherche ses lunettes"], ["Le chat dort", "Jeanne ne trouve plus ses lunettes"])
+        assert scores[1] > scores[0]
+
+    def test_stage_prior(self):
+        """Test: quand on demande un code, Jeanne ne trouve plus ses lunettes"""
+        ranking = LocalEventRanker().rank(None, "Script: Fraude bancaire", "Gagner du temps", stage_id="code_securite", script_id="bank_fraud")
+
+        assert len(ranking.events) == 3
+        assert "lunettes" in ranking.events[0]['event']
+        assert 0.0 <= ranking.confidence <= 1.0
+
+    def test_priors_read_from_script(self):
+        """Test: les priors viennent du champ audience_priors de chaque étape des scripts"""
+        from simulateur_arnaque.scripts.script_loader import get_registry
+        ranker = LocalEventRanker()
+        registry = get_registry()
+
+        for script_id in registry.discover():
+            priors = [ranker.stage_priors(script_id, stage['stage_id']) for stage in registry.get(script_id)['stages']]
+            assert all(priors)
+            # Priors propres à chaque étape
+            assert len({tuple(sorted(p.items())) for p in priors}) == len(priors)
+        assert ranker.stage_priors("bank_fraud", "code_securite")["lunette"] == 0.2
+
+    def test_missing_priors_warned_once(self, capsys):
+        """Test: une étape sans priors est classée sans bonus, avec un seul avertissement"""
+        ranker = LocalEventRanker()
+
+        assert ranker.stage_priors("bank_fraud", "etape_inconnue") == {}
+        assert ranker.stage_priors("bank_fraud", "etape_inconnue") == {}
+        assert capsys.readouterr().out.count("audience_priors") == 1
+
+    def test_audience_replaces_duplicate_default(self):
+        """Test: une suggestion proche d'un événement par défaut le remplace"""
+        prepared = SuggestionFilter().prepare(["La sonnette de la porte retentit"] * 5)
+        ranking = LocalEventRanker().rank(prepared, "Quelqu'un sonne", stage_id="virement_urgent", script_id="bank_fraud")
+        names = [name for name, _ in ranking.scores]
+
+        assert "La sonnette de la porte retentit" in names
+        assert names.count("La sonnette de la porte retentit") == 1
+        assert ranking.events[0]['event'] == "La sonnette de la porte retentit"
+
+
+class TestModeratorSelectionModes:
+    """Tests pour les modes de sélection du modérateur"""
+
+    def test_local_mode_makes_no_call(self, agent_factory):
+        """Test: en mode local, aucun appel LLM"""
+        agent, model = agent_factory("local")
+        events = agent.filter_and_select(["Le chien aboie", "Le facteur sonne"], "Script: Fraude", stage_id="code_securite")
+
+        assert len(events) == 3
+        assert model.calls == 0
+        assert agent.get_local_selection_stats()["local"] == 1
+
+    def test_auto_mode_escalates_when_uncertain(self, agent_factory, monkeypatch):
+        """Test: en mode auto, confiance trop faible -> modérateur LLM"""
+        agent, model = agent_factory("auto")
+        monkeypatch.setattr(agent.local_ranker, "is_confident", lambda ranking: False)
+        events = agent.filter_and_select(["Le chien aboie", "Le facteur sonne"], "Script: Fraude", stage_id="code_securite")
+
+        assert model.calls == 1
+        assert events[0]['event'] == "Le chien aboie"
+        assert agent.get_local_selection_stats()["escalated"] == 1
+
+    def test_unknown_mode(self, agent_factory):
+        """Test: un mode inconnu est refusé"""
+        with pytest.raises(ValueError):
+            agent_factory("random")
+
+    def test_compare_with_llm(self, agent_factory):
+        """Test: l'accord est calculé par rapport à la sélection du LLM"""
+        agent, model = agent_factory("local")
+        report = compare_with_llm(agent, [{
+            'suggestions': ["Le chien aboie", "La sonnette retentit", "Le chat renverse un vase"],
+            'conversation_context': "Script: Fraude",
+            'script_id': "bank_fraud",
+            'stage_id': "appel_banque",
+        }])
+
+        assert model.calls == 1
+        assert report["all"]["rounds"] == 1
+        assert 0.0 <= report["all"]["mean_overlap"] <= 1.0
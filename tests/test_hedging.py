@@ -0,0 +1,222 @@
+"""
+Tests unitaires pour le doublement des appels lents (hedging)
+
+Tests pour:
+- is_transient_error / backoff_delay
+- HedgedChatModel (doublement, annulation, nouvelles tentatives, métriques)
+"""
+
+import asyncio
+import random
+import time
+import pytest
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+from simulateur_arnaque.llm.hedging import (
+    HedgedChatModel,
+    HedgeMetrics,
+    backoff_delay,
+    is_transient_error
+)
+
+
+class ServiceUnavailable(Exception):
+    """Erreur 503 (même nom que l'exception de google.api_core)"""
+
+
+class SlowFirstModel(FakeChatModel):
+    """Modèle dont seul le premier appel est lent"""
+
+    def __init__(self, first_delay):
+        super().__init__(latency_ms=0, tokens_per_second=0)
+        self.first_delay = first_delay
+        self.started = 0
+        self.cancelled = 0
+
+    def invoke(self, input, *args, **kwargs):
+        self.started += 1
+        if self.started == 1:
+            time.sleep(self.first_delay)
+        return super().invoke(input)
+
+    async def ainvoke(self, input, *args, **kwargs):
+        self.started += 1
+        try:
+            if self.started == 1:
+                await asyncio.sleep(self.first_delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return super().invoke(input)
+
+
+class FlakyModel(FakeChatModel):
+    """Modèle qui échoue aux premiers appels"""
+
+    def __init__(self, failures, error):
+        super().__init__(latency_ms=0, tokens_per_second=0)
+        self.failures = failures
+        self.error = error
+
+    def invoke(self, input, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return super().invoke(input)
+
+
+def _hedged(model, label, **options):
+    """Modèle doublé avec des métriques neuves"""
+    hedged = HedgedChatModel(model, label, **options)
+    hedged.metrics = HedgeMetrics()
+    return hedged
+
+
+class TestHelpers:
+    """Tests pour la classification des erreurs et le backoff"""
+
+    def test_transient_errors(self):
+        """Test: 5xx et erreurs réseau sont rejouables, pas le quota ni les erreurs de prompt"""
+        assert is_transient_error(ServiceUnavailable("503 The service is unavailable"))
+        assert is_transient_error(ConnectionError("reset by peer"))
+        assert not is_transient_error(Exception("429 Quota exceeded"))
+        assert not is_transient_error(ValueError("max_tokens 1500 invalide"))
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test: le délai est tiré entre 0 et base * 2^tentative, plafonné"""
+        rng = random.Random(0)
+        delays = [backoff_delay(3, 0.1, cap=10, rng=rng) for _ in range(200)]
+
+        assert all(0 <= d <= 0.8 for d in delays)
+        assert len(set(delays)) > 100
+        assert backoff_delay(20, 0.1, cap=1.0, rng=rng) <= 1.0
+
+
+class TestHedgedChatModel:
+    """Tests pour le modèle à appels doublés"""
+
+    def test_fast_call_is_not_hedged(self):
+        """Test: une réponse avant le délai ne déclenche pas de doublement"""
+        model = _hedged(FakeChatModel(latency_ms=0, tokens_per_second=0), "test", hedging=True, min_delay=0.5)
+
+        assert model.invoke("Bonjour").content
+        stats = model.metrics.get_stats()
+        assert stats["calls"] == 1
+        assert stats["hedges"] == 0
+
+    def test_slow_call_is_hedged(self):
+        """Test: après le délai, le doublon répond en premier"""
+        inner = SlowFirstModel(first_delay=0.5)
+        model = _hedged(inner, "test", hedging=True, min_delay=0.05)
+        model.metrics.hedge_delay = lambda percentile, min_delay: min_delay
+
+        start = time.monotonic()
+        assert model.invoke("Bonjour").content
+        assert time.monotonic() - start < 0.4
+        assert inner.started == 2
+        stats = model.metrics.get_stats()
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_async_loser_is_cancelled(self):
+        """Test: en asynchrone, l'appel perdant est annulé"""
+        inner = SlowFirstModel(first_delay=1.0)
+        model = _hedged(inner, "test", hedging=True, min_delay=0.05)
+        model.metrics.hedge_delay = lambda percentile, min_delay: min_delay
+
+        async def main():
+            response = await model.ainvoke("Bonjour")
+            await asyncio.sleep(0)
+            return response
+
+        assert asyncio.run(main()).content
+        assert inner.cancelled == 1
+        assert model.metrics.get_stats()["hedge_wins"] == 1
+
+    def test_sync_loser_is_cancelled(self):
+        """Test: en synchrone aussi, l'appel perdant est annulé (pas de place ni de quota gardés)"""
+        inner = SlowFirstModel(first_delay=1.0)
+        model = _hedged(inner, "test", hedging=True, min_delay=0.05)
+        model.metrics.hedge_delay = lambda percentile, min_delay: min_delay
+
+        start = time.monotonic()
+        assert model.invoke("Bonjour").content
+        assert time.monotonic() - start < 0.5
+        deadline = time.monotonic() + 1.0
+        while inner.cancelled == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert inner.cancelled == 1
+
+    @pytest.mark.parametrize("asynchronous", [False, True])
+    def test_cancelled_primary_recorded_as_lower_bound(self, asynchronous):
+        """Test: un premier appel annulé compte pour le temps écoulé, en synchrone comme en asynchrone"""
+        inner = SlowFirstModel(first_delay=1.0)
+        model = _hedged(inner, "test", hedging=True, min_delay=0.05)
+        model.metrics.hedge_delay = lambda percentile, min_delay: min_delay
+
+        if asynchronous:
+            asyncio.run(model.ainvoke("Bonjour"))
+        else:
+            model.invoke("Bonjour")
+        stats = model.metrics.get_stats()
+
+        assert stats["primary_cancelled"] == 1
+        assert len(model.metrics.primary) == 1
+        assert model.metrics.primary[0] >= 0.05
+        assert model.metrics.effective[0] == model.metrics.primary[0]
+
+    def test_p99_primary_does_not_fall_after_hedge_wins(self):
+        """Test: les doublons gagnants ne font pas baisser le p99 du premier appel"""
+        model = _hedged(FakeChatModel(latency_ms=0, tokens_per_second=0), "test", hedging=True, min_delay=0.05)
+        for _ in range(50):
+            model.metrics.record_primary(0.06)
+        before = model.metrics.get_stats()["p99_primary_ms"]
+        model.metrics.hedge_delay = lambda percentile, min_delay: min_delay
+
+        async def main():
+            for _ in range(3):
+                model.model = SlowFirstModel(first_delay=1.0)
+                await model.ainvoke("Bonjour")
+
+        asyncio.run(main())
+        stats = model.metrics.get_stats()
+        assert stats["hedge_wins"] == 3
+        assert len(model.metrics.primary) == 53
+        assert stats["p99_primary_ms"] >= before
+
+    def test_hedge_delay_follows_percentile(self):
+        """Test: après l'échauffement, le délai est le percentile des latences"""
+        metrics = HedgeMetrics()
+        for ms in range(1, 101):
+            metrics.record_primary(ms / 1000)
+
+        assert metrics.hedge_delay(95, 0.0) == pytest.approx(0.095)
+        assert metrics.hedge_delay(95, 0.2) == 0.2
+
+    def test_transient_error_is_retried(self):
+        """Test: une erreur 503 est rejouée après backoff"""
+        model = _hedged(FlakyModel(2, ServiceUnavailable("503")), "test", attempts=3, base_delay=0.001)
+
+        assert model.invoke("Bonjour").content
+        assert model.metrics.get_stats()["retries"] == 2
+
+    def test_permanent_error_is_raised(self):
+        """Test: une erreur non transitoire remonte sans nouvelle tentative"""
+        model = _hedged(FlakyModel(1, ValueError("prompt invalide")), "test", base_delay=0.001)
+
+        with pytest.raises(ValueError):
+            model.invoke("Bonjour")
+        assert model.metrics.get_stats()["retries"] == 0
+
+    def test_p99_improves_on_heavy_tail(self):
+        """Test: sur une latence à queue lourde, le doublement réduit le p99"""
+        inner = FakeChatModel(seed=3, latency="heavy_tail", latency_ms=5, tokens_per_second=0)
+        model = _hedged(inner, "test", hedging=True, percentile=90, min_delay=0.005)
+
+        async def main():
+            for i in range(120):
+                await model.ainvoke(f"Bonjour {i}")
+
+        asyncio.run(main())
+        stats = model.metrics.get_stats()
+        assert stats["hedges"] > 0
+        assert stats["p99_ms"] <= stats["p99_primary_ms"]
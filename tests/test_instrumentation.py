@@ -0,0 +1,105 @@
+"""
+Tests unitaires pour l'instrumentation des appels LLM
+
+Tests pour:
+- Histogram (buckets cumulés, quantiles)
+- track_call / LLMMetrics (tokens, coût, erreurs, JSONL)
+- Export Prometheus et endpoint HTTP local
+"""
+
+import json
+import urllib.request
+import pytest
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+from simulateur_arnaque.llm import instrumentation
+from simulateur_arnaque.llm.instrumentation import (
+    Histogram,
+    LLMMetrics,
+    estimate_cost,
+    start_metrics_server,
+    track_call
+)
+
+
+class Usage:
+    """Réponse avec usage rapporté par le fournisseur"""
+    content = "Bonjour"
+    usage_metadata = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+
+
+@pytest.fixture
+def metrics(monkeypatch, tmp_path):
+    """Registre neuf écrivant dans un JSONL temporaire"""
+    registry = LLMMetrics(jsonl_path=str(tmp_path / "calls.jsonl"))
+    monkeypatch.setattr(instrumentation, "_metrics", registry)
+    yield registry
+    registry.close()
+
+
+class TestHistogram:
+    """Tests pour l'histogramme"""
+
+    def test_cumulative_and_quantile(self):
+        """Test: les buckets sont cumulés et le quantile donne la borne du bucket"""
+        histogram = Histogram((0.1, 1.0, 10.0))
+        for value in (0.05, 0.5, 0.5, 5.0, 50.0):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [("0.1", 1), ("1", 3), ("10", 4), ("+Inf", 5)]
+        assert histogram.quantile(0.5) == 1.0
+        assert histogram.quantile(1.0) == float("inf")
+
+
+class TestTrackCall:
+    """Tests pour la mesure des appels"""
+
+    def test_reported_usage_and_cost(self, metrics):
+        """Test: l'usage rapporté par le fournisseur est utilisé tel quel"""
+        with track_call("victim", "gemini-2.0-flash-001", "respond", "s1", "prompt") as call:
+            call.response = Usage()
+
+        summary = metrics.summary()["victim"]
+        assert summary["calls"] == 1
+        assert summary["prompt_tokens"] == 120
+        assert summary["completion_tokens"] == 30
+        assert summary["cost_usd"] == pytest.approx(estimate_cost("gemini-2.0-flash-001", 120, 30))
+
+    def test_estimated_usage_with_fake_backend(self, metrics):
+        """Test: sans usage rapporté, les tokens sont estimés et signalés comme tels"""
+        model = FakeChatModel(latency_ms=0, tokens_per_second=0)
+        prompt = "Bonjour madame, ici le service technique."
+        with track_call("victim", "fake", "respond", "s1", prompt) as call:
+            call.response = model.invoke(prompt)
+
+        with open(metrics.jsonl_path, encoding="utf-8") as f:
+            event = json.loads(f.readline())
+        assert event["tokens_estimated"] is True
+        assert event["prompt_tokens"] == (len(prompt) + 3) // 4
+        assert event["session_id"] == "s1"
+
+    def test_error_is_recorded_and_raised(self, metrics):
+        """Test: un appel en erreur est compté puis l'erreur remonte"""
+        with pytest.raises(RuntimeError):
+            with track_call("moderator", "gemini-1.5-flash", "select", "s1", "prompt"):
+                raise RuntimeError("backend down")
+
+        assert metrics.summary()["moderator"]["errors"] == 1
+
+
+class TestExport:
+    """Tests pour l'export Prometheus"""
+
+    def test_http_endpoint(self, metrics):
+        """Test: /metrics sert les histogrammes au format texte"""
+        with track_call("victim", "fake", "respond", "s1", "prompt") as call:
+            call.response = Usage()
+        server = start_metrics_server(0)
+        try:
+            port = server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        finally:
+            server.shutdown()
+
+        assert "# TYPE llm_call_duration_seconds histogram" in body
+        assert 'llm_prompt_tokens_sum{agent="victim",model="fake",operation="respond"} 120' in body
+        assert 'le="+Inf"} 1' in body
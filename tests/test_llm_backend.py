@@ -0,0 +1,154 @@
+"""
+Tests unitaires pour le backend LLM local (fake) et la factory
+
+Tests pour:
+- LatencyProfile
+- FakeChatModel
+- create_chat_model (pool de clients partagés)
+"""
+
+import asyncio
+import random
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from simulateur_arnaque.llm.fake_backend import FakeChatModel, LatencyProfile
+from simulateur_arnaque.llm import factory
+from simulateur_arnaque.llm.factory import create_chat_model, get_pool_stats
+from simulateur_arnaque.agents.moderator import ModeratorAgent
+
+
+@pytest.fixture
+def model():
+    """Modèle sans latence"""
+    return FakeChatModel(seed=1, latency_ms=0, tokens_per_second=0)
+
+
+class TestLatencyProfile:
+    """Tests pour les profils de latence"""
+
+    def test_fixed(self):
+        """Test: le profil fixe retourne toujours le même délai"""
+        profile = LatencyProfile("fixed", median_ms=250)
+        assert profile.sample(random.Random(0)) == 0.25
+
+    def test_lognormal_is_reproducible(self):
+        """Test: même graine, mêmes délais"""
+        profile = LatencyProfile("lognormal", median_ms=100)
+        first = [profile.sample(random.Random(3)) for _ in range(5)]
+        second = [profile.sample(random.Random(3)) for _ in range(5)]
+        assert first == second
+
+    def test_heavy_tail_bounds(self):
+        """Test: la queue lourde ne descend pas sous le délai de base et reste bornée"""
+        profile = LatencyProfile("heavy_tail", median_ms=100, max_factor=20)
+        rng = random.Random(0)
+        samples = [profile.sample(rng) for _ in range(2000)]
+        assert min(samples) >= 0.1
+        assert max(samples) <= 2.0
+        assert max(samples) > 5 * sorted(samples)[1000]
+
+    def test_unknown_profile(self):
+        """Test: un profil inconnu est refusé"""
+        with pytest.raises(ValueError):
+            LatencyProfile("uniform")
+
+
+class TestFakeChatModel:
+    """Tests pour le modèle local"""
+
+    def test_deterministic(self, model):
+        """Test: même graine et même prompt, même réponse"""
+        other = FakeChatModel(seed=1, latency_ms=0, tokens_per_second=0)
+        prompt = [SystemMessage(content="Jeanne"), HumanMessage(content="Donnez-moi votre carte")]
+
+        assert model.invoke(prompt).content == other.invoke(prompt).content
+
+    def test_victim_reacts_to_keywords(self, model):
+        """Test: la réponse de la victime dépend des mots-clés du scammeur"""
+        response = model.invoke([HumanMessage(content="Allumez votre ordinateur et cliquez")]).content
+
+        assert any(word in response for word in ("bouton", "écran", "souris", "ordinateur"))
+
+    def test_moderator_format(self, model):
+        """Test: la sortie modérateur est lisible par ModeratorAgent._parse_response"""
+        prompt = [
+            SystemMessage(content="Tu es un modérateur d'événements"),
+            HumanMessage(content="SUGGESTIONS:\n- Le chat miaule\n- Le four sonne - il brûle")
+        ]
+        text = model.invoke(prompt).content
+
+        events = ModeratorAgent._parse_response(None, text)
+        assert len(events) == 3
+        assert {"Le chat miaule", "Le four sonne"} <= {e['event'] for e in events}
+
+    def test_stream_matches_invoke(self, model):
+        """Test: les morceaux du stream reconstituent la réponse complète"""
+        prompt = "Bonjour madame"
+
+        chunks = [chunk.content for chunk in model.stream(prompt)]
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == model.invoke(prompt).content
+
+    def test_async_and_batch(self, model):
+        """Test: ainvoke et batch donnent les mêmes réponses qu'invoke"""
+        prompts = ["Bonjour", "Votre compte est bloqué", "Virus !"]
+        expected = [model.invoke(p).content for p in prompts]
+
+        assert [r.content for r in model.batch(prompts)] == expected
+        assert asyncio.run(model.ainvoke(prompts[0])).content == expected[0]
+
+    def test_token_rate(self):
+        """Test: le débit émulé allonge la génération"""
+        slow = FakeChatModel(latency_ms=0, tokens_per_second=1000)
+        text = slow.generate_text("Bonjour")
+
+        assert slow._generation_time(text) == pytest.approx(((len(text) + 3) // 4) / 1000)
+
+
+class TestFactory:
+    """Tests pour create_chat_model et le pool de clients"""
+
+    @pytest.fixture(autouse=True)
+    def empty_pool(self):
+        """Pool vide avant et après chaque test"""
+        factory.clear_pool()
+        yield
+        factory.clear_pool()
+
+    def test_fake_backend(self):
+        """Test: le backend fake ne nécessite aucun credential"""
+        assert isinstance(create_chat_model(temperature=0.3, backend="fake"), FakeChatModel)
+
+    def test_unknown_backend(self):
+        """Test: un backend inconnu est refusé"""
+        with pytest.raises(ValueError):
+            create_chat_model(backend="openai-v0")
+
+    def test_clients_are_shared(self):
+        """Test: même configuration, même client"""
+        first = create_chat_model(temperature=0.3, backend="fake")
+        second = create_chat_model(temperature=0.3, backend="fake")
+        other = create_chat_model(temperature=0.8, backend="fake")
+
+        assert first is second
+        assert other is not first
+        stats = get_pool_stats()
+        assert stats["size"] == 2
+        assert stats["created"] == 2
+        assert stats["reused"] == 1
+
+    def test_dedicated_client(self):
+        """Test: shared=False crée un client hors du pool"""
+        shared = create_chat_model(backend="fake")
+
+        assert create_chat_model(backend="fake", shared=False) is not shared
+        assert get_pool_stats()["size"] == 1
+
+    def test_credentials_loaded_once(self, tmp_path):
+        """Test: le fichier de credentials n'est lu qu'une fois"""
+        missing = str(tmp_path / "absent.json")
+
+        assert factory._load_credentials(missing) is None
+        assert factory._load_credentials(missing) is None
+        assert get_pool_stats()["credentials_loads"] == 1
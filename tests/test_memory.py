@@ -0,0 +1,168 @@
+"""
+Tests unitaires pour la mémoire à budget de tokens (Partie 1)
+
+Tests pour:
+- RollingMemory
+- PromptAssembler (prompt à préfixe stable)
+"""
+
+import pytest
+from simulateur_arnaque.agents.memory import RollingMemory, estimate_tokens, local_summarizer
+from simulateur_arnaque.agents.prompt_assembler import PromptAssembler
+
+
+def _fill(memory, exchanges, length=200):
+    """Ajoute des échanges scammeur/victime de taille fixe"""
+    for i in range(exchanges):
+        memory.add("Scammer", f"Message {i}. " + "x" * length)
+        memory.add("Jeanne", f"Réponse {i}. " + "y" * length)
+
+
+class TestRollingMemory:
+    """Tests pour RollingMemory"""
+
+    def test_estimate_tokens(self):
+        """Test: l'estimation suit ~4 caractères par token"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a" * 400) == 100
+
+    def test_full_mode_keeps_everything(self):
+        """Test: sans budget, tout l'historique est gardé mot pour mot"""
+        memory = RollingMemory(token_budget=None)
+        _fill(memory, 20)
+
+        stats = memory.get_stats()
+        assert stats["verbatim_messages"] == 40
+        assert stats["folded_messages"] == 0
+        assert "Summary" not in memory.format()
+
+    def test_budget_folds_old_exchanges(self):
+        """Test: au-delà du budget, les anciens échanges sont résumés"""
+        memory = RollingMemory(token_budget=300, keep_last=2, background=False)
+        _fill(memory, 10)
+
+        stats = memory.get_stats()
+        assert 4 <= stats["verbatim_messages"] < 20
+        assert stats["folded_messages"] + stats["verbatim_messages"] == 20
+        assert memory._verbatim_tokens <= 300
+        history = memory.format()
+        assert history.startswith("Summary of the earlier conversation:")
+        assert "Message 0." in history
+        assert "Réponse 9." in history
+
+    def test_budget_includes_summary(self):
+        """Test: le résumé compte dans le budget de l'historique"""
+        summary = "Résumé. " + "z" * 600
+        memory = RollingMemory(token_budget=400, keep_last=1, summarizer=lambda s, m: summary, background=False)
+        _fill(memory, 10)
+
+        assert memory.summary == summary
+        assert memory._verbatim_tokens + estimate_tokens(memory.summary) <= 400
+        assert memory.get_stats()["verbatim_messages"] >= 2
+
+    def test_keep_last_is_never_folded(self):
+        """Test: les keep_last derniers échanges restent même si le budget est dépassé"""
+        memory = RollingMemory(token_budget=10, keep_last=3, background=False)
+        _fill(memory, 3)
+
+        assert memory.get_stats()["verbatim_messages"] == 6
+
+    def test_background_summarizer(self):
+        """Test: le résumeur est appelé en arrière-plan avec les messages retirés"""
+        calls = []
+
+        def summarizer(summary, messages):
+            calls.append(len(messages))
+            return f"{len(messages)} messages résumés"
+
+        memory = RollingMemory(token_budget=300, keep_last=1, summarizer=summarizer)
+        _fill(memory, 5)
+        memory.wait()
+
+        stats = memory.get_stats()
+        assert sum(calls) == stats["folded_messages"] == 10 - stats["verbatim_messages"]
+        assert stats["pending_fold"] == 0
+        assert memory.summary.endswith("messages résumés")
+
+    def test_failing_summarizer_falls_back_to_local(self):
+        """Test: une erreur du résumeur utilise le résumé extractif local"""
+        def summarizer(summary, messages):
+            raise RuntimeError("quota")
+
+        memory = RollingMemory(token_budget=100, keep_last=1, summarizer=summarizer, background=False)
+        _fill(memory, 3)
+
+        assert "Message 0." in memory.summary
+
+    def test_reset(self):
+        """Test: reset vide la mémoire et le résumé"""
+        memory = RollingMemory(token_budget=100, keep_last=1, background=False)
+        _fill(memory, 5)
+
+        memory.reset()
+
+        assert memory.format() == ""
+        assert memory.summary == ""
+
+    def test_local_summarizer_is_bounded(self):
+        """Test: le résumé local ne dépasse pas max_chars"""
+        messages = [{"role": "Scammer", "content": "z" * 500}] * 50
+
+        assert len(local_summarizer("", messages, max_chars=300)) <= 301
+
+
+class TestPromptAssembler:
+    """Tests pour l'assemblage incrémental du prompt"""
+
+    def _turn(self, assembler, memory, i):
+        """Construit le prompt d'un tour puis enregistre l'échange"""
+        messages = assembler.build(f"Message {i}", f"OBJECTIVE {i}")
+        memory.add("Scammer", f"Message {i}")
+        memory.add("Jeanne", f"Réponse {i}")
+        return messages
+
+    def test_layout(self):
+        """Test: système fixe en tête, consignes du tour à la fin"""
+        memory = RollingMemory()
+        assembler = PromptAssembler("SYSTEM", memory)
+        self._turn(assembler, memory, 0)
+
+        messages = assembler.build("Message 1", "OBJECTIVE 1")
+
+        assert [m.type for m in messages] == ["system", "human", "ai", "human"]
+        assert messages[0].content == "SYSTEM"
+        assert messages[-1].content.endswith("OBJECTIVE 1")
+        assert "OBJECTIVE 0" not in "".join(m.content for m in messages)
+
+    def test_prefix_is_extended_not_rebuilt(self):
+        """Test: sans résumé, chaque prompt prolonge le préfixe précédent"""
+        memory = RollingMemory()
+        assembler = PromptAssembler("SYSTEM", memory)
+
+        first = self._turn(assembler, memory, 0)
+        second = self._turn(assembler, memory, 1)
+
+        assert all(a is b for a, b in zip(first[:-1], second))
+        stats = assembler.get_stats()
+        assert stats["prefix_hits"] == 1
+        assert stats["reused_tokens"] > 0
+
+    def test_fold_rebuilds_prefix(self):
+        """Test: un résumé de la mémoire invalide le préfixe"""
+        memory = RollingMemory(token_budget=30, keep_last=1, background=False)
+        assembler = PromptAssembler("SYSTEM", memory)
+        for i in range(4):
+            messages = self._turn(assembler, memory, i)
+
+        assert messages[1].content.startswith("Summary of the earlier conversation:")
+        assert assembler.get_stats()["prefix_hits"] < 3
+
+    def test_provider_cache_usage(self):
+        """Test: les tokens servis depuis le cache du fournisseur sont comptés"""
+        class Response:
+            usage_metadata = {"input_token_details": {"cache_read": 120}}
+
+        assembler = PromptAssembler("SYSTEM", RollingMemory())
+        assembler.record_usage(Response())
+
+        assert assembler.get_stats()["provider_cached_tokens"] == 120
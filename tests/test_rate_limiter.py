@@ -0,0 +1,165 @@
+"""
+Tests unitaires pour la limitation de débit des appels LLM
+
+Tests pour:
+- RateLimiter (seaux RPM/TPM, concurrence, priorités)
+- RateLimitedChatModel (file d'attente, erreurs de quota)
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+from simulateur_arnaque.llm.rate_limiter import (
+    RateLimiter,
+    RateLimitedChatModel,
+    RateLimitTimeout,
+    PRIORITY_VICTIM,
+    PRIORITY_MODERATOR,
+    PRIORITY_BACKGROUND
+)
+
+
+class ResourceExhausted(Exception):
+    """Erreur de quota (même nom que l'exception de google.api_core)"""
+
+
+class FlakyModel(FakeChatModel):
+    """Modèle qui dépasse le quota aux premiers appels"""
+
+    def __init__(self, failures, error=ResourceExhausted("429 Quota exceeded")):
+        super().__init__(latency_ms=0, tokens_per_second=0)
+        self.failures = failures
+        self.error = error
+
+    def invoke(self, input, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return super().invoke(input)
+
+
+class TestRateLimiter:
+    """Tests pour le limiteur partagé"""
+
+    def test_priority_order(self):
+        """Test: quand une place se libère, la priorité la plus haute passe en premier"""
+        limiter = RateLimiter(max_concurrency=1)
+        held = limiter.acquire()
+        order = []
+
+        def call(priority):
+            permit = limiter.acquire(priority=priority)
+            order.append(priority)
+            limiter.release(permit)
+
+        threads = []
+        for priority in (PRIORITY_BACKGROUND, PRIORITY_MODERATOR, PRIORITY_VICTIM):
+            thread = threading.Thread(target=call, args=(priority,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.05)
+
+        limiter.release(held)
+        for thread in threads:
+            thread.join(timeout=2)
+
+        assert order == [PRIORITY_VICTIM, PRIORITY_MODERATOR, PRIORITY_BACKGROUND]
+
+    def test_requests_per_minute(self):
+        """Test: au-delà du RPM, l'appel attend la recharge du seau"""
+        limiter = RateLimiter(requests_per_minute=600)
+        for _ in range(600):
+            limiter.release(limiter.acquire())
+
+        start = time.monotonic()
+        limiter.release(limiter.acquire())
+
+        assert time.monotonic() - start >= 0.05
+        assert limiter.get_stats()["queued"] == 1
+
+    def test_tokens_are_reconciled(self):
+        """Test: la réservation de tokens est corrigée par la consommation réelle"""
+        limiter = RateLimiter(tokens_per_minute=1000)
+
+        permit = limiter.acquire(tokens=400)
+        limiter.release(permit, used_tokens=100)
+
+        assert limiter.get_stats()["tokens_available"] == pytest.approx(900, abs=2)
+
+    def test_timeout(self):
+        """Test: sans quota dans le délai, RateLimitTimeout est levée et la file est vidée"""
+        limiter = RateLimiter(max_concurrency=1)
+        limiter.acquire()
+
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(timeout=0.05)
+        assert limiter.get_stats()["queue_length"] == 0
+
+    def test_async_concurrency_bound(self):
+        """Test: les appels asynchrones respectent la concurrence maximale"""
+        limiter = RateLimiter(max_concurrency=2)
+        model = RateLimitedChatModel(FakeChatModel(latency_ms=20, tokens_per_second=0), limiter)
+        peak = []
+
+        async def call(i):
+            response = await model.ainvoke(f"Bonjour {i}")
+            peak.append(limiter.get_stats()["in_flight"])
+            return response
+
+        async def main():
+            return await asyncio.gather(*(call(i) for i in range(6)))
+
+        assert len(asyncio.run(main())) == 6
+        assert max(peak) <= 2
+        assert limiter.get_stats()["acquired"] == 6
+
+
+class TestRateLimitedChatModel:
+    """Tests pour le modèle soumis au limiteur"""
+
+    def test_quota_error_is_retried(self):
+        """Test: une erreur de quota met en pause puis relance l'appel"""
+        limiter = RateLimiter()
+        model = RateLimitedChatModel(FlakyModel(failures=2), limiter, quota_pause=0.01)
+
+        assert model.invoke("Bonjour").content
+        assert limiter.get_stats()["quota_errors"] == 2
+        assert limiter.get_stats()["in_flight"] == 0
+
+    def test_quota_retries_exhausted(self):
+        """Test: après quota_retries échecs, l'erreur remonte"""
+        model = RateLimitedChatModel(FlakyModel(failures=5), RateLimiter(), quota_retries=1, quota_pause=0.01)
+
+        with pytest.raises(ResourceExhausted):
+            model.invoke("Bonjour")
+
+    def test_other_errors_are_not_retried(self):
+        """Test: une erreur autre que le quota remonte immédiatement"""
+        limiter = RateLimiter()
+        model = RateLimitedChatModel(FlakyModel(failures=1, error=ValueError("prompt invalide")), limiter)
+
+        with pytest.raises(ValueError):
+            model.invoke("Bonjour")
+        assert limiter.get_stats()["quota_errors"] == 0
+
+    def test_stream_releases_on_early_close(self):
+        """Test: un flux interrompu rend sa place de concurrence"""
+        limiter = RateLimiter(max_concurrency=1)
+        model = RateLimitedChatModel(FakeChatModel(latency_ms=0, tokens_per_second=0), limiter)
+
+        stream = model.stream("Bonjour madame")
+        next(stream)
+        stream.close()
+
+        assert limiter.get_stats()["in_flight"] == 0
+
+    def test_with_priority_shares_limiter(self):
+        """Test: with_priority garde le même modèle et le même limiteur"""
+        model = RateLimitedChatModel(FakeChatModel(), RateLimiter(), PRIORITY_VICTIM)
+        background = model.with_priority(PRIORITY_BACKGROUND)
+
+        assert background.model is model.model
+        assert background.limiter is model.limiter
+        assert background.priority == PRIORITY_BACKGROUND
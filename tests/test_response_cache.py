@@ -0,0 +1,147 @@
+"""
+Tests unitaires pour le cache des réponses LLM et les cassettes
+
+Tests pour:
+- cache_key (modèle, température, messages)
+- ResponseCache (LRU en mémoire, niveau disque)
+- CachedChatModel (cache, record, replay, strict, flux)
+"""
+
+import json
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+from simulateur_arnaque.llm.response_cache import (
+    CachedChatModel,
+    Cassette,
+    CassetteMissError,
+    ResponseCache,
+    cache_key
+)
+
+
+MESSAGES = [SystemMessage(content="Tu es Jeanne."), HumanMessage(content="Bonjour madame")]
+
+
+def _model(store, mode):
+    inner = FakeChatModel(latency_ms=0, tokens_per_second=0)
+    return CachedChatModel(inner, "fake", 0.8, store, mode), inner
+
+
+class TestCacheKey:
+    """Tests pour la clé de cache"""
+
+    def test_key_depends_on_all_parts(self):
+        """Test: modèle, température et messages changent la clé"""
+        key = cache_key("fake", 0.8, MESSAGES)
+
+        assert key == cache_key("fake", 0.8, list(MESSAGES))
+        assert key != cache_key("gemini", 0.8, MESSAGES)
+        assert key != cache_key("fake", 0.3, MESSAGES)
+        assert key != cache_key("fake", 0.8, MESSAGES[:1])
+
+
+class TestResponseCache:
+    """Tests pour le cache à deux niveaux"""
+
+    def test_lru_eviction(self):
+        """Test: au-delà de max_entries, la plus ancienne réponse sort"""
+        cache = ResponseCache(max_entries=2, directory=None)
+        cache.put("a", {"content": "A"})
+        cache.put("b", {"content": "B"})
+        cache.get("a")
+        cache.put("c", {"content": "C"})
+
+        assert cache.get("b") is None
+        assert cache.get("a")["content"] == "A"
+
+    def test_disk_tier(self, tmp_path):
+        """Test: une réponse sortie de la mémoire est relue sur le disque"""
+        cache = ResponseCache(max_entries=1, directory=str(tmp_path))
+        cache.put("a" * 64, {"content": "A"})
+        cache.put("b" * 64, {"content": "B"})
+
+        fresh = ResponseCache(max_entries=1, directory=str(tmp_path))
+        assert fresh.get("a" * 64)["content"] == "A"
+        assert fresh.get_stats()["disk_hits"] == 1
+
+
+class TestCachedChatModel:
+    """Tests pour le modèle servi depuis le cache ou la cassette"""
+
+    def test_cache_mode(self):
+        """Test: le deuxième appel identique ne touche pas le modèle"""
+        model, inner = _model(ResponseCache(directory=None), "cache")
+
+        first = model.invoke(MESSAGES)
+        second = model.invoke(MESSAGES)
+
+        assert second.content == first.content
+        assert inner.calls == 1
+
+    def test_record_then_strict_replay(self, tmp_path):
+        """Test: une session enregistrée est rejouée sans appel, et une absence échoue"""
+        path = str(tmp_path / "session.json")
+        recorder, _ = _model(Cassette(path, "record"), "record")
+        recorded = recorder.invoke(MESSAGES).content
+
+        replayer, inner = _model(Cassette(path, "strict"), "strict")
+        assert replayer.invoke(MESSAGES).content == recorded
+        assert inner.calls == 0
+        with pytest.raises(CassetteMissError):
+            replayer.invoke([HumanMessage(content="Réplique jamais enregistrée")])
+
+    def test_record_appends_one_line_per_response(self, tmp_path):
+        """Test: chaque réponse enregistrée ajoute une ligne, sans réécrire la cassette"""
+        path = tmp_path / "session.jsonl"
+        recorder, _ = _model(Cassette(str(path), "record"), "record")
+        recorder.invoke(MESSAGES)
+        first = path.read_text(encoding="utf-8")
+        recorder.invoke([HumanMessage(content="Allô ?")])
+        lines = path.read_text(encoding="utf-8").splitlines()
+
+        assert len(lines) == 2
+        assert path.read_text(encoding="utf-8").startswith(first)
+
+    def test_legacy_cassette_is_read(self, tmp_path):
+        """Test: une cassette à l'ancien format JSON est rejouée, puis convertie à l'enregistrement"""
+        path = tmp_path / "session.json"
+        key = cache_key("fake", 0.8, MESSAGES)
+        path.write_text(json.dumps({"version": 1, "entries": {key: {"content": "Ancienne"}}}), encoding="utf-8")
+
+        assert Cassette(str(path), "strict").get(key)["content"] == "Ancienne"
+        recorder, _ = _model(Cassette(str(path), "record"), "record")
+        recorder.invoke([HumanMessage(content="Allô ?")])
+        assert len(Cassette(str(path), "strict").entries) == 2
+
+    def test_replay_falls_back_to_live(self, tmp_path):
+        """Test: en mode replay, une absence appelle le modèle sans l'enregistrer"""
+        cassette = Cassette(str(tmp_path / "session.json"), "replay")
+        model, inner = _model(cassette, "replay")
+
+        assert model.invoke(MESSAGES).content
+        assert inner.calls == 1
+        assert cassette.entries == {}
+
+    def test_stream_is_recorded_and_replayed(self, tmp_path):
+        """Test: un flux est enregistré puis rejoué en un seul morceau"""
+        path = str(tmp_path / "session.json")
+        recorder, _ = _model(Cassette(path, "record"), "record")
+        streamed = "".join(chunk.content for chunk in recorder.stream(MESSAGES))
+
+        replayer, inner = _model(Cassette(path, "strict"), "strict")
+        chunks = list(replayer.stream(MESSAGES))
+
+        assert len(chunks) == 1
+        assert chunks[0].content == streamed
+        assert inner.calls == 0
+
+    def test_batch_only_calls_missing(self):
+        """Test: seules les réponses absentes partent dans le batch réel"""
+        model, inner = _model(ResponseCache(directory=None), "cache")
+        model.invoke(MESSAGES)
+
+        responses = model.batch([MESSAGES, [HumanMessage(content="Allô ?")]])
+
+        assert len(responses) == 2
+        assert inner.calls == 2
@@ -0,0 +1,277 @@
+"""
+Tests unitaires pour le chargement des scripts (Partie 2)
+
+Tests pour:
+- ScriptRegistry (cache mémoire, invalidation, préchargement)
+- load_script
+- script_compiler (validation et artefacts précompilés)
+- ScriptWatcher (rechargement à chaud)
+"""
+
+import json
+import os
+import pytest
+from simulateur_arnaque.scripts import script_loader
+from simulateur_arnaque.scripts.script_loader import ScriptRegistry
+from simulateur_arnaque.scripts import script_compiler
+from simulateur_arnaque.scripts.script_compiler import ScriptValidationError, validate_script
+from simulateur_arnaque.scripts.script_watcher import ScriptWatcher
+
+
+def _touch_later(path):
+    """Avance le mtime d'un fichier pour garantir la détection du changement"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _write_script(directory, script_id, signals=("virus",), title="Test"):
+    """Écrit un script minimal dans le dossier"""
+    script = {
+        "script_id": script_id,
+        "title": title,
+        "stages": [
+            {
+                "stage_id": "alerte",
+                "summary": "Alerte",
+                "victim_objectives": ["Rester sceptique"],
+                "success_signals": list(signals)
+            },
+            {
+                "stage_id": "paiement",
+                "summary": "Paiement",
+                "victim_objectives": ["Refuser"],
+                "success_signals": ["carte"]
+            }
+        ]
+    }
+    path = directory / f"{script_id}.json"
+    path.write_text(json.dumps(script), encoding="utf-8")
+    return path
+
+
+class TestScriptRegistry:
+    """Tests pour le registre de scripts"""
+
+    def test_discover_and_preload(self, tmp_path):
+        """Test que tous les *.json du dossier sont découverts et chargés"""
+        _write_script(tmp_path, "beta", title="Beta")
+        _write_script(tmp_path, "alpha", title="Alpha")
+        registry = ScriptRegistry(str(tmp_path))
+
+        assert registry.discover() == ["alpha", "beta"]
+        assert registry.preload() == ["alpha", "beta"]
+        assert registry.list_scripts() == [("alpha", "Alpha"), ("beta", "Beta")]
+
+    def test_served_from_memory(self, tmp_path):
+        """Test qu'un script inchangé n'est pas relu"""
+        _write_script(tmp_path, "alpha")
+        registry = ScriptRegistry(str(tmp_path))
+
+        assert registry.get("alpha") is registry.get("alpha")
+
+    def test_reload_when_file_changes(self, tmp_path):
+        """Test qu'un fichier modifié (taille/mtime) est rechargé"""
+        path = _write_script(tmp_path, "alpha")
+        registry = ScriptRegistry(str(tmp_path))
+        first = registry.get("alpha")
+
+        _write_script(tmp_path, "alpha", signals=("virus", "malware"))
+        _touch_later(path)
+        second = registry.get("alpha")
+
+        assert second is not first
+        assert second['stages'][0]['success_signals'] == ["virus", "malware"]
+
+    def test_get_stage(self, tmp_path):
+        """Test l'accès direct à une étape par stage_id"""
+        _write_script(tmp_path, "alpha")
+        registry = ScriptRegistry(str(tmp_path))
+
+        assert registry.get_stage("alpha", "paiement")['summary'] == "Paiement"
+        with pytest.raises(KeyError):
+            registry.get_stage("alpha", "inconnu")
+
+    def test_preload_skips_broken_script(self, tmp_path):
+        """Test qu'un script invalide n'empêche pas le chargement des autres"""
+        _write_script(tmp_path, "alpha")
+        (tmp_path / "broken.json").write_text("{ pas du json", encoding="utf-8")
+        registry = ScriptRegistry(str(tmp_path))
+
+        assert registry.preload() == ["alpha"]
+
+    def test_missing_script(self, tmp_path):
+        """Test qu'un script absent lève FileNotFoundError"""
+        registry = ScriptRegistry(str(tmp_path))
+
+        with pytest.raises(FileNotFoundError):
+            registry.get("absent")
+
+
+class TestLoadScript:
+    """Tests pour load_script"""
+
+    def test_bundled_scripts(self):
+        """Test le chargement des scripts livrés avec le projet"""
+        for script_id in ("microsoft_support", "bank_fraud"):
+            script = script_loader.load_script(script_id)
+            assert script['script_id'] == script_id
+            assert script_loader.load_script(script_id) is script
+
+
+class TestScriptCompiler:
+    """Tests pour la validation et la précompilation des scripts"""
+
+    @pytest.fixture
+    def script(self):
+        """Script minimal valide"""
+        return {
+            "script_id": "alpha",
+            "title": "Alpha",
+            "stages": [
+                {"stage_id": "a", "summary": "A", "victim_objectives": [], "success_signals": ["virus"]},
+                {"stage_id": "b", "summary": "B", "victim_objectives": ["Refuser"], "success_signals": ["carte"]},
+            ]
+        }
+
+    def test_valid_script(self, script):
+        """Test qu'un script correct passe la validation"""
+        validate_script(script, expected_id="alpha")
+
+    def test_bundled_scripts_are_valid(self):
+        """Test que les scripts livrés respectent le schéma"""
+        for script_id in ("microsoft_support", "bank_fraud"):
+            validate_script(script_loader.load_script(script_id), expected_id=script_id)
+
+    def test_duplicate_stage_ids(self, script):
+        """Test le rejet des stage_id en double"""
+        script['stages'][1]['stage_id'] = "a"
+
+        with pytest.raises(ScriptValidationError) as exc:
+            validate_script(script)
+        assert any("double" in e for e in exc.value.errors)
+
+    def test_empty_signals_and_missing_fields(self, script):
+        """Test le rejet des listes de signaux vides et des champs manquants"""
+        script['stages'][0]['success_signals'] = []
+        del script['stages'][1]['summary']
+        del script['stages'][1]['victim_objectives']
+
+        with pytest.raises(ScriptValidationError) as exc:
+            validate_script(script)
+        assert len(exc.value.errors) == 3
+
+    def test_invalid_audience_priors(self, script):
+        """Test le rejet de priors d'audience qui ne sont pas des bonus numériques"""
+        script['stages'][0]['audience_priors'] = {"lunette": 0.2}
+        script['stages'][1]['audience_priors'] = {"sonnette": "fort"}
+
+        with pytest.raises(ScriptValidationError) as exc:
+            validate_script(script)
+        assert len(exc.value.errors) == 1
+        assert "audience_priors" in exc.value.errors[0]
+
+    def test_registry_uses_fresh_artifact(self, tmp_path):
+        """Test que le registre charge l'artefact quand il est à jour"""
+        path = _write_script(tmp_path, "alpha")
+        artifact_path = script_compiler.compile_script(str(path))
+        assert os.path.exists(artifact_path)
+
+        registry = ScriptRegistry(str(tmp_path))
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(script_loader.json, "load", lambda f: pytest.fail("JSON relu"))
+            script = registry.get("alpha")
+
+        assert script['script_id'] == "alpha"
+        assert registry.get_stage("alpha", "paiement")['summary'] == "Paiement"
+
+    def test_stale_artifact_ignored(self, tmp_path):
+        """Test qu'un artefact plus ancien que le JSON est ignoré"""
+        path = _write_script(tmp_path, "alpha")
+        artifact_path = script_compiler.compile_script(str(path))
+        _write_script(tmp_path, "alpha", signals=("malware",))
+        stat = os.stat(artifact_path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert script_compiler.load_compiled(str(path)) is None
+        script = ScriptRegistry(str(tmp_path)).get("alpha")
+        assert script['stages'][0]['success_signals'] == ["malware"]
+
+    def test_invalid_script_not_compiled(self, tmp_path):
+        """Test que compile_directory signale les scripts invalides"""
+        _write_script(tmp_path, "alpha")
+        _write_script(tmp_path, "beta", signals=())
+
+        results = script_compiler.compile_directory(str(tmp_path))
+
+        assert results["alpha"] == "ok"
+        assert "success_signals" in results["beta"]
+
+
+class TestScriptWatcher:
+    """Tests pour le rechargement à chaud des scripts"""
+
+    @pytest.fixture
+    def watcher(self, tmp_path):
+        """Watcher sur un dossier temporaire (polling manuel)"""
+        watcher = ScriptWatcher(ScriptRegistry(str(tmp_path)), interval=60)
+        yield watcher
+        watcher.stop()
+
+    def test_subscribers_notified_on_change(self, tmp_path, watcher):
+        """Test que les abonnés reçoivent la nouvelle version du script"""
+        path = _write_script(tmp_path, "alpha")
+        watcher.registry.get("alpha")
+        received = []
+        watcher.subscribe("alpha", received.append)
+
+        assert watcher.poll() == []
+
+        _write_script(tmp_path, "alpha", signals=("malware",))
+        _touch_later(path)
+
+        assert watcher.poll() == ["alpha"]
+        assert received[0]['stages'][0]['success_signals'] == ["malware"]
+        assert watcher.poll() == []
+
+    def test_reload_by_another_reader_is_propagated(self, tmp_path, watcher):
+        """Test qu'un rechargement fait par un autre lecteur notifie quand même les abonnés"""
+        path = _write_script(tmp_path, "alpha")
+        watcher.registry.get("alpha")
+        received = []
+        watcher.subscribe("alpha", received.append)
+
+        _write_script(tmp_path, "alpha", signals=("malware",))
+        _touch_later(path)
+        watcher.registry.get("alpha")  # Nouvelle session, load_script...
+
+        assert watcher.poll() == ["alpha"]
+        assert received[0]['stages'][0]['success_signals'] == ["malware"]
+        assert watcher.poll() == []
+
+    def test_invalid_edit_keeps_previous_version(self, tmp_path, watcher):
+        """Test qu'une modification invalide n'est pas propagée"""
+        path = _write_script(tmp_path, "alpha")
+        original = watcher.registry.get("alpha")
+        received = []
+        watcher.subscribe("alpha", received.append)
+
+        path.write_text("{ en cours d'édition", encoding="utf-8")
+        _touch_later(path)
+
+        assert watcher.poll() == []
+        assert received == []
+        assert watcher.registry._entries["alpha"].script is original
+
+    def test_unsubscribe(self, tmp_path, watcher):
+        """Test qu'un abonné retiré n'est plus notifié"""
+        path = _write_script(tmp_path, "alpha")
+        watcher.registry.get("alpha")
+        received = []
+        watcher.subscribe("alpha", received.append)
+        watcher.unsubscribe("alpha", received.append)
+
+        _write_script(tmp_path, "alpha", signals=("malware",))
+        _touch_later(path)
+        watcher.poll()
+
+        assert received == []
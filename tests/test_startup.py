@@ -0,0 +1,62 @@
+"""
+Tests unitaires pour le démarrage (imports différés et profil de démarrage)
+"""
+
+import subprocess
+import sys
+from simulateur_arnaque.startup import StartupProfile
+
+
+def _imported_modules(code):
+    """Modules chargés après l'exécution de code dans un interpréteur neuf"""
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyImports:
+    """Tests pour les imports différés"""
+
+    def test_agents_package_is_light(self):
+        """Test: importer le package agents (et le director) ne charge pas LangChain"""
+        modules = _imported_modules("from simulateur_arnaque.agents import director")
+
+        assert "simulateur_arnaque.agents.director" in modules
+        assert not any(m.startswith(("langchain", "google")) for m in modules)
+
+    def test_lazy_attribute(self):
+        """Test: les classes restent accessibles depuis le package"""
+        modules = _imported_modules(
+            "import simulateur_arnaque.agents as agents\nassert agents.__all__"
+        )
+
+        assert "simulateur_arnaque.agents.victim_agent" not in modules
+
+
+class TestStartupProfile:
+    """Tests pour le profil de démarrage"""
+
+    def test_records_imports_and_phases(self):
+        """Test: les imports et les phases sont chronométrés"""
+        profile = StartupProfile(enabled=True)
+        try:
+            sys.modules.pop("colorsys", None)
+            with profile.phase("import colorsys"):
+                import colorsys  # noqa: F401
+        finally:
+            profile.stop()
+
+        assert "colorsys" in profile.imports
+        assert profile.phases[0][0] == "import colorsys"
+
+    def test_disabled_profile_records_nothing(self):
+        """Test: sans --startup-profile, rien n'est mesuré"""
+        profile = StartupProfile(enabled=False)
+
+        with profile.phase("phase"):
+            pass
+
+        assert profile.phases == []
+        assert profile._timer is None
@@ -0,0 +1,124 @@
+"""
+Tests unitaires pour le pré-filtrage local des suggestions de l'audience
+
+Tests pour:
+- normalize_suggestion / blocked_rule (liste de blocage)
+- stem / shingles (racines françaises légères)
+- SuggestionFilter (regroupement des quasi-doublons, budget de tokens)
+"""
+
+from simulateur_arnaque.agents import suggestion_filter
+from simulateur_arnaque.agents.suggestion_filter import (
+    BANDS,
+    NUM_PERMUTATIONS,
+    SuggestionFilter,
+    blocked_rule,
+    estimated_similarity,
+    minhash,
+    normalize_suggestion,
+    shingles,
+)
+
+
+class TestBlocklist:
+    """Tests pour la normalisation et la liste de blocage"""
+
+    def test_normalize(self):
+        """Test: minuscules, sans accents ni ponctuation"""
+        assert normalize_suggestion("  La TÉLÉ s'allume !!  ") == "la tele s allume"
+
+    def test_rejection_rules(self):
+        """Test: chaque règle du prompt du modérateur est reconnue"""
+        assert blocked_rule(normalize_suggestion("Un voleur sort un couteau")) == "violence"
+        assert blocked_rule(normalize_suggestion("La police débarque")) == "autorites"
+        assert blocked_rule(normalize_suggestion("Un OVNI atterrit dans le jardin")) == "fantaisie"
+        assert blocked_rule(normalize_suggestion("Jeanne raccroche")) == "fin_brutale"
+
+    def test_everyday_events_pass(self):
+        """Test: les événements du quotidien ne sont pas bloqués"""
+        for suggestion in ("Le chien aboie", "La voisine frappe à la fenêtre",
+                           "Le robot aspirateur se coince", "Les larmes aux yeux"):
+            assert blocked_rule(normalize_suggestion(suggestion)) is None
+
+    def test_harmless_expressions_pass(self):
+        """Test: expressions courantes proches de mots bloqués (faux positifs)"""
+        for suggestion in ("Le petit-fils est mort de rire", "Jeanne doit aller faire une prise de sang",
+                           "Un film de pirates commence à la télé", "Le polichinelle tombe de l'étagère",
+                           "La voisine sexagénaire passe prendre le thé", "Jeanne garde son sang-froid",
+                           "Le magistrat du village appelle", "Jeanne marche pieds nus sur le carrelage"):
+            assert blocked_rule(normalize_suggestion(suggestion)) is None, suggestion
+
+    def test_blocked_words_still_caught(self):
+        """Test: les formes bloquées restent reconnues"""
+        assert blocked_rule(normalize_suggestion("Un policier sonne")) == "autorites"
+        assert blocked_rule(normalize_suggestion("Jeanne est morte")) == "fin_brutale"
+        assert blocked_rule(normalize_suggestion("Un pirate informatique appelle")) == "technologie"
+
+
+class TestSimilarity:
+    """Tests pour les racines et les signatures MinHash"""
+
+    def test_verb_forms_share_stem(self):
+        """Test: "aboie" et "se met à aboyer" donnent les mêmes racines"""
+        assert shingles("le chien aboie") == shingles("le chien se met a aboyer")
+
+    def test_minhash_estimates_jaccard(self):
+        """Test: signatures identiques pour des ensembles identiques, proches de 0 sinon"""
+        a = minhash(shingles("la casserole deborde"))
+        assert estimated_similarity(a, minhash(shingles("la casserole deborde encore"))) == 1.0
+        assert estimated_similarity(a, minhash(shingles("le telephone fixe sonne"))) < 0.2
+
+
+class TestSuggestionFilter:
+    """Tests pour le regroupement et le budget"""
+
+    def test_clusters_near_duplicates(self):
+        """Test: un représentant par groupe, pondéré par la taille du groupe"""
+        result = SuggestionFilter().prepare([
+            "le chien aboie",
+            "Le chien se met à aboyer comme un fou !",
+            "LE CHIEN ABOIE",
+            "La casserole déborde",
+            "Putain de chat",
+        ])
+
+        assert result.received == 5
+        assert result.blocked == {"vulgarite": 1}
+        assert result.suggestions == ["le chien aboie", "La casserole déborde"]
+        assert result.clusters[0].count == 3
+        assert result.clusters[0].variants == 2
+
+    def test_near_duplicate_of_later_member_is_merged(self, monkeypatch):
+        """Test: deux quasi-doublons qui ne partagent que des seaux ouverts par d'autres suggestions sont regroupés"""
+        rows = NUM_PERMUTATIONS // BANDS
+        twin = tuple(range(NUM_PERMUTATIONS))
+        signatures = {"jumeau un": twin, "jumeau deux": twin}
+        for band in range(BANDS):
+            # Leurre k : identique aux jumeaux sur la seule bande k, placé avant eux dans le seau
+            decoy = [1000 * (band + 1) + i for i in range(NUM_PERMUTATIONS)]
+            decoy[band * rows:(band + 1) * rows] = twin[band * rows:(band + 1) * rows]
+            signatures[f"leurre {band}"] = tuple(decoy)
+        monkeypatch.setattr(suggestion_filter, "minhash", lambda features: signatures[next(iter(features))])
+        monkeypatch.setattr(suggestion_filter, "shingles", lambda normalized: frozenset([normalized]))
+
+        result = SuggestionFilter().prepare([f"leurre {band}" for band in range(BANDS)] + ["jumeau un", "jumeau deux"])
+
+        assert len(result.clusters) == BANDS + 1
+        assert result.clusters[0].count == 2
+
+    def test_token_budget_independent_of_audience(self):
+        """Test: le budget de tokens est tenu quelle que soit la taille de l'audience"""
+        suggestions = [f"Événement numéro {i} très original" for i in range(5000)]
+        result = SuggestionFilter(threshold=0.9, token_budget=100, max_suggestions=1000).prepare(suggestions)
+
+        sent = sum(len(c.representative) + 12 for c in result.clusters) / 4
+        assert sent <= 100
+        assert result.dropped > 0
+
+    def test_all_blocked(self):
+        """Test: aucun groupe si toutes les suggestions sont rejetées"""
+        prefilter = SuggestionFilter()
+        result = prefilter.prepare(["Un dragon crache du feu", "Des zombies attaquent"])
+
+        assert result.clusters == []
+        assert prefilter.get_stats()["blocked"] == 2
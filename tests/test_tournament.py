@@ -0,0 +1,162 @@
+"""
+Tests unitaires pour la modération par tournoi (map-reduce)
+
+Tests pour:
+- ModeratorAgent._shards (répartition en lots)
+- Tours du tournoi (top-k par lot, lots en échec, finale)
+- Version asynchrone et parallélisme (fan-out)
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from simulateur_arnaque.agents import moderator as moderator_module
+from simulateur_arnaque.agents.decision_cache import DecisionCache
+from simulateur_arnaque.agents.moderator import ModeratorAgent
+
+SUGGESTIONS = [
+    "Le chat renverse le vase", "La voisine sonne deux fois", "Le facteur chante faux",
+    "Poupoune réclame son goûter", "Le petit-fils siffle très fort", "La bouilloire tombe en panne",
+    "La radio apporte un colis", "Le plombier veut un café", "La télé fait un bruit étrange",
+    "Le canari demande du sucre", "Le livreur arrose les fleurs", "La cocotte-minute cherche ses clés",
+    "Le réveil annonce la météo", "Le curé perd ses lunettes", "La machine à laver fuit dans la cuisine",
+    "Le perroquet imite la sonnerie", "La pharmacienne livre les médicaments", "Le jardinier taille la haie",
+    "La sœur de Jeanne raconte ses vacances", "Le notaire lit une lettre",
+]
+
+
+class _ShardModel:
+    """Retient les premières suggestions de chaque prompt, compte les appels en cours"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def _respond(self, messages) -> AIMessage:
+        prompt = messages[-1].content
+        top_k = int(re.search(r"Sélectionne les (\d+) MEILLEURES", prompt).group(1))
+        suggestions = re.findall(r"^- (.+?)(?: \(×\d+\))?$", prompt, re.MULTILINE)
+        lines = [f"{i}. [{s}] - impact" for i, s in enumerate(suggestions[:top_k], 1)]
+        return AIMessage(content="\n".join(lines + ["REJETÉES: aucune"]))
+
+    def invoke(self, messages, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            return self._respond(messages)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return self._respond(messages)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def agent_factory(monkeypatch):
+    """Crée un ModeratorAgent en mode tournoi branché sur un modèle scripté"""
+
+    def build(model, shard_size=5, fan_out=4, shard_top_k=2):
+        monkeypatch.setattr(moderator_module, "create_chat_model", lambda **kwargs: model)
+        agent = ModeratorAgent(shard_size=shard_size, fan_out=fan_out, shard_top_k=shard_top_k)
+        agent.decisions = DecisionCache()
+        agent.verdicts = DecisionCache()
+        agents.append(agent)
+        return agent
+
+    agents = []
+    yield build
+    for agent in agents:
+        agent.breaker.reset()
+
+
+class TestShards:
+    """Tests pour la répartition en lots"""
+
+    def test_round_robin_shards(self, agent_factory):
+        """Test: lots d'au plus shard_size suggestions, les plus proposées réparties"""
+        agent = agent_factory(_ShardModel(), shard_size=5)
+        prepared = agent.suggestion_filter.prepare(SUGGESTIONS * 2 + SUGGESTIONS[:4], limit=False)
+        shards = agent._shards(prepared)
+
+        assert len(prepared.clusters) == 20
+        assert [len(s.clusters) for s in shards] == [5, 5, 5, 5]
+        assert all(s.clusters[0].count == 3 for s in shards)
+
+    def test_small_set_is_a_single_call(self, agent_factory):
+        """Test: sous la taille d'un lot, un seul appel comme avant"""
+        model = _ShardModel()
+        agent = agent_factory(model, shard_size=5)
+        events = agent.filter_and_select(SUGGESTIONS[:5], "ctx")
+
+        assert len(events) == 3
+        assert model.calls == 1
+        assert agent.get_tournament_stats()["tournaments"] == 0
+
+
+class TestTournament:
+    """Tests pour les tours du tournoi"""
+
+    def test_two_rounds_then_final(self, agent_factory):
+        """Test: 20 suggestions, lots de 5, top-2 : 4 lots, 2 lots pour les 8 gagnants, puis la finale"""
+        model = _ShardModel()
+        agent = agent_factory(model, shard_size=5, shard_top_k=2)
+        events = agent.filter_and_select(SUGGESTIONS, "ctx", script_id="bank", stage_id="intro")
+        stats = agent.get_tournament_stats()
+
+        assert len(events) == 3
+        assert all(e['event'] in SUGGESTIONS for e in events)
+        assert model.calls == 7
+        assert stats["rounds"] == 2 and stats["shards"] == 6
+
+    def test_failed_shard_keeps_its_most_proposed(self, agent_factory):
+        """Test: un lot sans réponse laisse passer ses suggestions les plus proposées"""
+        agent = agent_factory(_ShardModel(), shard_size=5, shard_top_k=2)
+        prepared = agent.suggestion_filter.prepare(SUGGESTIONS + SUGGESTIONS[4:5], limit=False)
+        shards = agent._shards(prepared)
+        contents = [None] + ["1. [Le notaire lit une lettre] - a\nREJETÉES: aucune"] * 3
+        winners = agent._reduce_round(prepared, shards, contents, ("ctx",))
+
+        assert winners.clusters[:2] == shards[0].clusters[:2]
+        assert winners.clusters[0].representative == SUGGESTIONS[4]
+        assert [c.representative for c in winners.clusters[2:]] == ["Le notaire lit une lettre"]
+        assert agent.get_tournament_stats()["failed_shards"] == 1
+
+    def test_shards_run_concurrently(self, agent_factory):
+        """Test: jusqu'à fan_out lots modérés en même temps"""
+        model = _ShardModel(delay=0.05)
+        agent = agent_factory(model, shard_size=5, fan_out=4)
+        agent.selection_llm = model
+        agent.filter_and_select(SUGGESTIONS, "ctx")
+
+        assert 1 < model.max_active <= 4
+
+    def test_async_tournament(self, agent_factory):
+        """Test: version asynchrone, même contrat et fan-out respecté"""
+        model = _ShardModel(delay=0.01)
+        agent = agent_factory(model, shard_size=5, fan_out=2)
+        agent.selection_llm = model
+        events = asyncio.run(agent.afilter_and_select(SUGGESTIONS, "ctx"))
+
+        assert len(events) == 3
+        assert all(set(e) == {'event', 'description'} for e in events)
+        assert model.max_active <= 2
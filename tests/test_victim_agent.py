@@ -62,4 +62,4 @@ class TestVictimAgent:
         # Juste vérifier que ça s'exécute sans erreur
         # (La réponse réelle dépend de l'API OpenAI)
         assert hasattr(victim, 'process')
-        assert callable(victim.process)
\ No newline at end of file
+        assert callable(victim.process)
@@ -0,0 +1,127 @@
+"""
+Tests unitaires pour le streaming des réponses de la victime
+
+Tests pour:
+- truncate_to_sentences (arrêt anticipé à la limite de phrases)
+- VictimAgent.respond_stream (fermeture du flux, texte partiel, réplique de secours)
+"""
+
+import pytest
+from simulateur_arnaque.agents import base_agent as base_agent_module
+from simulateur_arnaque.agents.victim_agent import VictimAgent, truncate_to_sentences
+from simulateur_arnaque.llm.circuit_breaker import CircuitBreaker
+from simulateur_arnaque.llm.fake_backend import FakeChatModel
+
+LONG_ANSWER = "Oh là là. Attendez. Mon chien aboie. Je cherche mes lunettes. Vous êtes qui déjà? Ma fille arrive."
+
+
+class _TrackedStream:
+    """Flux qui compte les morceaux lus et retient sa fermeture"""
+
+    def __init__(self, chunks, fail_after=None):
+        self._chunks = iter(chunks)
+        self._fail_after = fail_after
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._fail_after is not None and self.read >= self._fail_after:
+            raise ConnectionError("connexion coupée")
+        chunk = next(self._chunks)
+        self.read += 1
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class _StreamingModel(FakeChatModel):
+    """Modèle local qui répond toujours LONG_ANSWER et garde ses flux"""
+
+    def __init__(self, fail_after=None):
+        super().__init__(latency_ms=0, tokens_per_second=0)
+        self.fail_after = fail_after
+        self.streams = []
+
+    def generate_text(self, input):
+        return LONG_ANSWER
+
+    def stream(self, input, config=None, **kwargs):
+        stream = _TrackedStream(list(super().stream(input, config, **kwargs)), self.fail_after)
+        self.streams.append(stream)
+        return stream
+
+
+@pytest.fixture
+def victim_factory(monkeypatch):
+    """Crée une VictimAgent branchée sur un modèle local scripté"""
+
+    def build(model):
+        monkeypatch.setattr(base_agent_module, "create_chat_model", lambda **kwargs: model)
+        victim = VictimAgent(memory_mode="full")
+        victim.breaker = CircuitBreaker("test")
+        return victim
+    return build
+
+
+class TestTruncateToSentences:
+    """Tests pour l'arrêt anticipé du streaming"""
+
+    def test_cut_after_limit(self):
+        """Test: le texte est coupé après max_sentences phrases"""
+        text, reached = truncate_to_sentences("Oh là là... Je ne sais pas. Attendez! Mon chien aboie. Et puis", 4)
+        assert reached
+        assert text == "Oh là là... Je ne sais pas. Attendez! Mon chien aboie."
+
+    def test_under_limit(self):
+        """Test: un texte court est gardé tel quel"""
+        text, reached = truncate_to_sentences("Allô? Qui est à l'appareil", 4)
+        assert not reached
+        assert text == "Allô? Qui est à l'appareil"
+
+    def test_abbreviations_are_not_sentence_ends(self):
+        """Test: "M." et "Mme." ne comptent pas comme des fins de phrase"""
+        _, reached = truncate_to_sentences("M. Martin et Mme. Durand sont là. Oui", 2)
+        assert not reached
+
+
+class TestRespondStream:
+    """Tests pour la réponse de Jeanne morceau par morceau"""
+
+    def test_stream_closed_after_max_sentences(self, victim_factory):
+        """Test: après max_sentences phrases, le flux est fermé sans lire la suite"""
+        model = _StreamingModel()
+        victim = victim_factory(model)
+
+        text = "".join(victim.respond_stream("Bonjour, ici votre banque", max_sentences=2))
+
+        assert text == "Oh là là. Attendez."
+        stream = model.streams[0]
+        assert stream.closed
+        assert stream.read < len(LONG_ANSWER.split(" "))
+        assert victim.chat_history[-1] == {"role": "Jeanne", "content": "Oh là là. Attendez."}
+
+    def test_partial_text_kept_on_error(self, victim_factory):
+        """Test: une coupure au milieu du flux garde la partie déjà affichée"""
+        model = _StreamingModel(fail_after=5)
+        victim = victim_factory(model)
+
+        text = "".join(victim.respond_stream("Donnez-moi votre code"))
+
+        assert text == "Oh là là. Attendez. Mon "
+        assert victim.chat_history[-1]["content"] == "Oh là là. Attendez. Mon"
+        assert victim.breaker.get_stats()["failures"] == 1
+
+    def test_canned_response_when_nothing_streamed(self, victim_factory):
+        """Test: une erreur avant le premier morceau donne une réplique de secours"""
+        model = _StreamingModel(fail_after=0)
+        victim = victim_factory(model)
+
+        text = "".join(victim.respond_stream("Donnez-moi votre code"))
+
+        assert text
+        assert victim.chat_history[-1]["content"] == text.strip()
+        assert model.streams[0].closed